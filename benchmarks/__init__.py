@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Benchmarks for the models and the database layer, run with
+# `python -m benchmarks` from the repository root. The app's modules live in
+# src/ and import each other as top-level packages, as when run by main.py.
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,130 @@
+import os
+import sys
+import inspect
+import logging
+import argparse
+import tempfile
+
+from . import SRC_DIR
+from .dataset import DEFAULT_SEED, GENERATOR_VERSION, build_database, cached_database
+from .soak import DEFAULT_OPS, DEFAULT_TASKS, DEFAULT_WARMUP
+from .harness import (DEFAULT_MIN_TIME, DEFAULT_REPEAT, DEFAULT_THRESHOLD, compare, environment, format_time,
+                      load_results, measure, print_comparison, select, write_results)
+
+# python -m benchmarks run [--sizes 1000 10000] [--output results.json] [--baseline old.json]
+# python -m benchmarks compare old.json new.json
+# python -m benchmarks generate tasks.db --size 100000
+# python -m benchmarks soak [--ops 200] [--scenario notes search]
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+REPO_DIR = os.path.dirname(SRC_DIR)
+DEFAULT_CACHE_DIR = os.path.join(REPO_DIR, ".benchmark_cache")
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+def uncovered_methods(benchmarks) -> list:
+    from database.db_manager import DatabaseManager
+    covered = {name for benchmark in benchmarks for name in benchmark.covers}
+    public = {name for name, attr in vars(DatabaseManager).items()
+              if not name.startswith("_") and inspect.isfunction(attr)}
+    return sorted(public - covered)
+
+def command_run(args):
+    from .bench_database import database_benchmarks
+    from .bench_models import model_benchmarks
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="todo-bench-") as work_dir:
+        for size in args.sizes:
+            print(f"== {size} tasks", flush=True)
+            source = cached_database(args.cache_dir, size, args.seed)
+            legacy = cached_database(args.cache_dir, size, args.seed, legacy=True)
+            benchmarks = database_benchmarks(source, legacy, work_dir, args.seed) + \
+                         model_benchmarks(source, work_dir, args.seed)
+            missing = uncovered_methods(benchmarks)
+            if missing:
+                print(f"warning: no benchmark covers DatabaseManager.{', '.join(missing)}", file=sys.stderr)
+            for benchmark in select(benchmarks, args.filter):
+                result = measure(benchmark, size, args.repeat, args.min_time)
+                results.append(result)
+                print(f"{benchmark.name:<44} {format_time(result.median):>10}  (x{result.loops})", flush=True)
+
+    meta = environment()
+    meta.update({"seed": args.seed, "generator_version": GENERATOR_VERSION, "sizes": args.sizes,
+                 "repeat": args.repeat, "min_time": args.min_time})
+    write_results(args.output, results, meta)
+    print(f"Wrote {len(results)} results to {args.output}")
+    if args.baseline:
+        return report(args.baseline, args.output, args.threshold, args.show_all)
+    return 0
+
+def report(baseline_path, current_path, threshold, show_all=False) -> int:
+    rows = compare(load_results(baseline_path), load_results(current_path), threshold)
+    print(f"\nCompared with {baseline_path} (threshold {threshold:.0%}):")
+    print_comparison(rows, show_all=show_all)
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+def command_compare(args):
+    return report(args.baseline, args.current, args.threshold, args.show_all)
+
+def command_generate(args):
+    build_database(args.path, args.size, args.seed)
+    print(f"Generated {args.size} tasks in {args.path}")
+    return 0
+
+def command_soak(args):
+    from .soak import run_soak
+    with tempfile.TemporaryDirectory(prefix="todo-soak-") as work_dir:
+        results = run_soak(work_dir, args.tasks, args.ops, args.warmup, args.scenario, args.seed)
+    failed = [result.scenario for result in results if result.over_budget]
+    if failed:
+        print(f"Growth over budget in: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Todo2 model and database benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks and write JSON results")
+    run.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, metavar="N",
+                     help=f"dataset sizes (default: {' '.join(map(str, DEFAULT_SIZES))}; up to 1000000)")
+    run.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run.add_argument("--filter", metavar="REGEX", help="only benchmarks whose name matches")
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="samples per benchmark")
+    run.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="minimum seconds per sample")
+    run.add_argument("--output", default=DEFAULT_OUTPUT)
+    run.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="where generated databases are kept")
+    run.add_argument("--baseline", help="results file to compare against; exits 1 on regressions")
+    run.set_defaults(handler=command_run)
+
+    compare_parser = commands.add_parser("compare", help="compare two results files; exits 1 on regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.set_defaults(handler=command_compare)
+
+    for command in (run, compare_parser):
+        command.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                             help=f"relative slowdown that counts as a regression (default {DEFAULT_THRESHOLD})")
+        command.add_argument("--show-all", action="store_true", help="list unchanged and new benchmarks too")
+
+    generate = commands.add_parser("generate", help="write a generated database, e.g. to try the app on")
+    generate.add_argument("path")
+    generate.add_argument("--size", type=int, default=10000)
+    generate.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    generate.set_defaults(handler=command_generate)
+
+    soak = commands.add_parser("soak", help="drive the main window through scripted edits and fail on "
+                                           "memory, QObject or connection growth")
+    soak.add_argument("--tasks", type=int, default=DEFAULT_TASKS, help=f"tasks in the list (default {DEFAULT_TASKS})")
+    soak.add_argument("--ops", type=int, default=DEFAULT_OPS, help=f"measured operations per scenario (default {DEFAULT_OPS})")
+    soak.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="unmeasured operations first")
+    soak.add_argument("--scenario", nargs="+", metavar="NAME", help="only these scenarios, e.g. notes mixed")
+    soak.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    soak.set_defaults(handler=command_soak)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
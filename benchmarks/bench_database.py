@@ -0,0 +1,187 @@
+import os
+import time
+import itertools
+from typing import List
+
+from database.db_manager import NOTES_CHUNK_CHARS, DatabaseManager
+from models.order_key import keys_between
+from models.saved_view import SavedView
+from models.task import today_day_number
+
+from .dataset import DEFAULT_SEED, sample_ids, working_copy
+from .harness import Benchmark
+
+# One or more benchmarks for every public DatabaseManager method, run against a
+# working copy of a generated database. Write benchmarks leave the row count
+# roughly where it was (delete what they add and the other way round) so that
+# every sample sees the same amount of data; rows an add benchmark inserted are
+# deleted, and their tombstones purged, in the untimed setup of its next sample.
+
+BATCH_SIZE = 100
+SAMPLE_IDS = 2000
+ARCHIVE_AFTER_DAYS = 30
+
+def database_benchmarks(source_path: str, legacy_path: str, work_dir: str, seed: int = DEFAULT_SEED) -> List[Benchmark]:
+    path = working_copy(source_path, os.path.join(work_dir, "bench.db"))
+    db = DatabaseManager(path)
+    persistent = DatabaseManager(path, persistent=True)
+    ids = itertools.cycle(sample_ids(path, SAMPLE_IDS, seed))
+    today = today_day_number()
+    counter = itertools.count()
+    state = {}
+
+    def add_one():
+        state["task_id"] = db.add_task("Benchmark task", due_date="2030-01-01", priority="High", category="Work")
+
+    def add_batch():
+        state["task_ids"] = db.add_tasks([{"title": f"Batch task {i}", "due_date": "2030-01-01", "category": "Home"}
+                                          for i in range(BATCH_SIZE)])
+
+    def purge_deleted():
+        db.purge_deleted_tasks(int(time.time()) + 1, BATCH_SIZE)
+
+    def remove_added():
+        db.delete_tasks([state.pop("task_id")] if "task_id" in state else state.pop("task_ids", []))
+        purge_deleted()
+        if "category" in state:
+            db.delete_category(state.pop("category"))
+        if "sub_category" in state:
+            db.delete_sub_category(state.pop("sub_category"))
+        if "view" in state:
+            db.delete_view(state.pop("view"))
+
+    def deleted_batch():
+        add_batch()
+        db.delete_tasks(state["task_ids"])
+
+    def toggle_completed():
+        task_id = next(ids)
+        task = db.get_task(task_id)
+        db.update_task(task_id, task["title"], not task["completed"], task["due_date"], task["priority"],
+                       task["category"], task["sub_category"], task["description"], task["notes"], task["recurrence"])
+
+    def update_batch():
+        db.update_tasks([{"id": next(ids), "priority": "Low" if next(counter) % 2 else "High"}
+                         for _ in range(BATCH_SIZE)])
+
+    def complete_batch():
+        db.set_tasks_completed([next(ids) for _ in range(BATCH_SIZE)], next(counter) % 2 == 0)
+
+    def unarchive():
+        # Writing to archived tasks restores them, completion days and all
+        db.set_tasks_completed(state.pop("archived", []), True)
+
+    def archive_batch():
+        state["archived"] = db.archive_completed_tasks(today - ARCHIVE_AFTER_DAYS, BATCH_SIZE)
+
+    def migrate():
+        DatabaseManager(legacy_copy)
+
+    def fresh_legacy_copy():
+        working_copy(legacy_path, legacy_copy)
+
+    def restore_copy():
+        working_copy(source_path, restored_path)
+        state["restored"] = DatabaseManager(restored_path)
+
+    def move_one():
+        # A drag and drop in the manual sort writes the moved task's key only
+        db.set_order_keys({next(ids): keys_between(None, None, 2)[next(counter) % 2]})
+
+    def respace_batch():
+        db.set_order_keys(dict(zip((next(ids) for _ in range(BATCH_SIZE)), keys_between("a0", "a1", BATCH_SIZE))))
+
+    def changes_setup():
+        state["revision"] = db.get_revision()
+        update_batch()
+
+    def new_category():
+        state["category"] = f"Category {next(counter)}"
+        db.add_category(state["category"])
+
+    def new_sub_category():
+        state["sub_category"] = f"Sub-category {next(counter)}"
+        db.add_sub_category(state["sub_category"])
+
+    def new_view():
+        state["view"] = f"View {next(counter)}"
+        db.save_view(SavedView(state["view"], filter_option="Active", category="Work").to_dict())
+
+    legacy_copy = os.path.join(work_dir, "legacy.db")
+    restored_path = os.path.join(work_dir, "restored.db")
+
+    return [
+        Benchmark("db.open", lambda: DatabaseManager(path),
+                  covers=("enable_wal", "create_tables", "update_schema", "connect", "disconnect")),
+        Benchmark("db.migrate_to_typed_columns", migrate, setup=fresh_legacy_copy, covers=("migrate_to_typed_columns", "move_details_out")),
+        Benchmark("db.connect_close_persistent", lambda: (persistent.connect(), persistent.close()),
+                  covers=("close",)),
+        Benchmark("db.get_data_version", persistent.get_data_version, covers=("get_data_version",)),
+        Benchmark("db.add_task", add_one, setup=remove_added, covers=("add_task",)),
+        Benchmark("db.delete_task", lambda: db.delete_task(state["task_id"]), setup=lambda: (purge_deleted(), add_one()),
+                  covers=("delete_task",)),
+        Benchmark("db.get_task", lambda: db.get_task(next(ids)), covers=("get_task",)),
+        Benchmark(f"db.get_tasks[{BATCH_SIZE}]", lambda: db.get_tasks([next(ids) for _ in range(BATCH_SIZE)]),
+                  covers=("get_tasks",)),
+        Benchmark("db.update_task", toggle_completed, covers=("update_task",)),
+        Benchmark(f"db.get_task_details[{BATCH_SIZE}]",
+                  lambda: db.get_task_details([next(ids) for _ in range(BATCH_SIZE)]), covers=("get_task_details",)),
+        Benchmark("db.get_task_details[first chunk]",
+                  lambda: db.get_task_details([next(ids)], notes_limit=NOTES_CHUNK_CHARS)),
+        Benchmark("db.get_notes_chunk", lambda: db.get_notes_chunk(next(ids), 0), covers=("get_notes_chunk",)),
+        Benchmark(f"db.add_tasks[{BATCH_SIZE}]", add_batch, setup=remove_added, covers=("add_tasks",)),
+        Benchmark(f"db.delete_tasks[{BATCH_SIZE}]", lambda: db.delete_tasks(state["task_ids"]),
+                  setup=lambda: (purge_deleted(), add_batch()), covers=("delete_tasks",)),
+        Benchmark(f"db.restore_deleted_tasks[{BATCH_SIZE}]", lambda: db.restore_deleted_tasks(state["task_ids"]),
+                  setup=lambda: (remove_added(), deleted_batch()), covers=("restore_deleted_tasks",)),
+        Benchmark(f"db.purge_deleted_tasks[{BATCH_SIZE}]",
+                  lambda: db.purge_deleted_tasks(int(time.time()) + 1, BATCH_SIZE), setup=deleted_batch,
+                  covers=("purge_deleted_tasks",)),
+        Benchmark(f"db.update_tasks[{BATCH_SIZE}]", update_batch, covers=("update_tasks",)),
+        Benchmark(f"db.set_tasks_completed[{BATCH_SIZE}]", complete_batch, covers=("set_tasks_completed",)),
+        Benchmark("db.set_order_keys[move]", move_one, covers=("set_order_keys",)),
+        Benchmark(f"db.set_order_keys[{BATCH_SIZE}]", respace_batch, covers=("set_order_keys",)),
+        Benchmark("db.get_all_tasks", db.get_all_tasks, covers=("get_all_tasks",)),
+        Benchmark("db.iter_task_chunks[all]", lambda: sum(len(chunk) for chunk in db.iter_task_chunks()),
+                  covers=("iter_task_chunks",)),
+        Benchmark("db.iter_task_chunks[first]", lambda: next(db.iter_task_chunks(), None)),
+        Benchmark("db.get_task_columns", db.get_task_columns, covers=("get_task_columns",)),
+        Benchmark("db.get_tasks_due_between[week]", lambda: db.get_tasks_due_between(today, today + 7),
+                  covers=("get_tasks_due_between",)),
+        Benchmark("db.get_tasks_due_between[week,occurrences]",
+                  lambda: db.get_tasks_due_between(today, today + 7, occurrences=True)),
+        Benchmark("db.get_tasks_due_between[year,all]",
+                  lambda: db.get_tasks_due_between(today - 182, today + 182, open_only=False)),
+        Benchmark("db.get_next_up_tasks", db.get_next_up_tasks, covers=("get_next_up_tasks",)),
+        Benchmark("db.get_open_task_counts[month]", lambda: db.get_open_task_counts(today, today + 30),
+                  covers=("get_open_task_counts",)),
+        Benchmark(f"db.archive_completed_tasks[{BATCH_SIZE}]", archive_batch, setup=unarchive,
+                  covers=("archive_completed_tasks",)),
+        Benchmark(f"db.get_archived_tasks[{BATCH_SIZE}]", lambda: db.get_archived_tasks(BATCH_SIZE),
+                  covers=("get_archived_tasks",)),
+        Benchmark(f"db.get_archived_tasks[{BATCH_SIZE},search]",
+                  lambda: db.get_archived_tasks(BATCH_SIZE, category="Work", search_text="review")),
+        Benchmark(f"db.get_archived_tasks[{BATCH_SIZE},tags]",
+                  lambda: db.get_archived_tasks(BATCH_SIZE, tag_query="urgent|waiting -blocked")),
+        Benchmark("db.get_tag_counts", db.get_tag_counts, covers=("get_tag_counts",)),
+        Benchmark("db.get_revision", db.get_revision, covers=("get_revision",)),
+        Benchmark(f"db.get_changes_since[{BATCH_SIZE}]", lambda: db.get_changes_since(state["revision"]),
+                  setup=changes_setup, covers=("get_changes_since",)),
+        Benchmark("db.advance_revision_after_restore", lambda: state["restored"].advance_revision_after_restore(path),
+                  setup=restore_copy, covers=("advance_revision_after_restore",)),
+        Benchmark("db.add_category", new_category, setup=remove_added, covers=("add_category",)),
+        Benchmark("db.get_all_categories", db.get_all_categories, covers=("get_all_categories",)),
+        Benchmark("db.delete_category", lambda: db.delete_category(state["category"]), setup=new_category,
+                  covers=("delete_category",)),
+        Benchmark("db.add_sub_category", new_sub_category, setup=remove_added, covers=("add_sub_category",)),
+        Benchmark("db.get_all_sub_categories", db.get_all_sub_categories, covers=("get_all_sub_categories",)),
+        Benchmark("db.delete_sub_category", lambda: db.delete_sub_category(state["sub_category"]),
+                  setup=new_sub_category, covers=("delete_sub_category",)),
+        Benchmark("db.set_setting", lambda: db.set_setting("benchmark", str(next(counter))), covers=("set_setting",)),
+        Benchmark("db.get_setting", lambda: db.get_setting("benchmark"), covers=("get_setting",)),
+        Benchmark("db.set_date_format", lambda: db.set_date_format("%Y-%m-%d"), covers=("set_date_format",)),
+        Benchmark("db.get_date_format", db.get_date_format, covers=("get_date_format",)),
+        Benchmark("db.save_view", new_view, setup=remove_added, covers=("save_view",)),
+        Benchmark("db.get_all_views", db.get_all_views, covers=("get_all_views",)),
+        Benchmark("db.delete_view", lambda: db.delete_view(state["view"]), setup=new_view, covers=("delete_view",)),
+    ]
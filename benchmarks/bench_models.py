@@ -0,0 +1,102 @@
+import os
+import random
+from datetime import date
+from typing import List
+
+from database.db_manager import DatabaseManager
+from database.list_cache import CACHED_ROWS, read_list_cache, write_list_cache
+from models.next_up import NextUpIndex, select_next_up
+from models.recurrence import expand_occurrences, merge_occurrences
+from models.saved_view import SavedView, SavedViewCache
+from models.tag_index import TagIndex, parse_tag_query
+from models.due_day_counts import DueDayCounts
+from models.task import Task, today_day_number
+from models.order_key import key_between, respace
+from models.task_filter import MANUAL_SORT, NEXT_UP, filter_and_sort_tasks, load_order_key, matches_filters
+
+from .dataset import DEFAULT_SEED
+from .harness import Benchmark
+
+# The in-memory side: Task conversions, the filter/sort pipeline behind
+# MainWindow.apply_filter_and_sort and the incrementally maintained indexes,
+# over every task of the generated database.
+
+def model_benchmarks(source_path: str, work_dir: str, seed: int = DEFAULT_SEED) -> List[Benchmark]:
+    task_dicts = DatabaseManager(source_path).get_all_tasks()
+    tasks = [Task.from_dict(task) for task in task_dicts]
+    rng = random.Random(seed)
+    next_up = NextUpIndex()
+    next_up.rebuild(tasks)
+    views = SavedViewCache()
+    views.set_views([SavedView("Work", filter_option="Active", category="Work", sort_option="Priority"),
+                     SavedView("Search", search_text="review")])
+    views.set_tasks(tasks)
+    tag_index = TagIndex()
+    tag_index.rebuild(tasks)
+    tag_query = "urgent|waiting q3 -blocked"
+    day_counts = DueDayCounts(DatabaseManager(source_path).get_open_task_counts)
+    day_counts.track(tasks)
+    cache_path = os.path.join(work_dir, "bench.listcache")
+    cached_rows = sorted(tasks, key=load_order_key)[:CACHED_ROWS]
+    write_list_cache(cache_path, 1, {"filter_option": "All", "category": "All Categories",
+                                     "sub_category": "All Sub-Categories"}, cached_rows)
+
+    default_order = filter_and_sort_tasks(tasks)
+    order_keys = sorted(task.order_key for task in tasks)
+    today = today_day_number()
+    current = date.fromordinal(today)
+
+    def edit_one():
+        task = rng.choice(tasks)
+        task.completed = not task.completed
+        next_up.update(task)
+        views.task_updated(task)
+
+    def edit_and_count():
+        # An edit, then reopening the calendar picker on the current month
+        task = rng.choice(tasks)
+        task.completed = not task.completed
+        day_counts.update(task)
+        return day_counts.month(current.year, current.month)
+
+    def move_between():
+        # The key of a row dropped into a random gap of the manual sort
+        index = rng.randrange(1, len(order_keys))
+        return key_between(order_keys[index - 1], order_keys[index])
+
+    return [
+        Benchmark("task.from_dict[all]", lambda: [Task.from_dict(task) for task in task_dicts]),
+        Benchmark("task.to_dict[all]", lambda: [task.to_dict() for task in tasks]),
+        Benchmark("filter.matches_filters[active,work]",
+                  lambda: sum(matches_filters(task, "Active", "Work") for task in tasks)),
+        Benchmark("filter.sort[default]", lambda: filter_and_sort_tasks(tasks)),
+        Benchmark("filter.sort[active,priority,desc]",
+                  lambda: filter_and_sort_tasks(tasks, "Active", sort_option="Priority", descending=True)),
+        Benchmark("filter.sort[category,sub_category]",
+                  lambda: filter_and_sort_tasks(tasks, category_filter="Work", sub_category_filter="Urgent",
+                                                sort_option="Category")),
+        Benchmark("filter.sort[search]", lambda: filter_and_sort_tasks(tasks, search_text="review")),
+        Benchmark("filter.sort[next_up]", lambda: filter_and_sort_tasks(tasks, NEXT_UP)),
+        Benchmark("filter.load_order_sort", lambda: sorted(tasks, key=load_order_key)),
+        Benchmark("filter.sort[manual]", lambda: filter_and_sort_tasks(tasks, sort_option=MANUAL_SORT)),
+        Benchmark("order_key.key_between", move_between),
+        Benchmark("order_key.respace", lambda: respace(order_keys, rng.randrange(len(order_keys)))),
+        # What the default view adds for recurring tasks (MainWindow.with_occurrences)
+        Benchmark("recurrence.expand+merge[14 days]",
+                  lambda: merge_occurrences(default_order, expand_occurrences(default_order, today, today + 14))),
+        Benchmark("due_day_counts.update+month", edit_and_count),
+        Benchmark("tags.rebuild", lambda: TagIndex().rebuild(tasks)),
+        Benchmark("tags.select[a|b c -d]", lambda: tag_index.select(parse_tag_query(tag_query))),
+        Benchmark("filter.sort[tags,scan]", lambda: filter_and_sort_tasks(tasks, tag_query=tag_query)),
+        Benchmark("filter.sort[tags,indexed]",
+                  lambda: filter_and_sort_tasks(tasks, tag_query=tag_query, tag_index=tag_index)),
+        Benchmark("next_up.select_next_up", lambda: select_next_up(tasks)),
+        Benchmark("next_up.rebuild", lambda: NextUpIndex().rebuild(tasks)),
+        Benchmark("next_up.update+top", lambda: (edit_one(), next_up.top())),
+        Benchmark("saved_views.set_tasks", lambda: views.set_tasks(tasks)),
+        Benchmark("saved_views.results[cached]", lambda: (views.results("Work"), views.results("Search"))),
+        Benchmark("saved_views.update+results", lambda: (edit_one(), views.results("Work"), views.results("Search"))),
+        Benchmark("list_cache.write", lambda: write_list_cache(cache_path, 1, {
+            "filter_option": "All", "category": "All Categories", "sub_category": "All Sub-Categories"}, cached_rows)),
+        Benchmark("list_cache.read", lambda: read_list_cache(cache_path)),
+    ]
@@ -0,0 +1,181 @@
+import os
+import random
+import shutil
+import sqlite3
+from typing import Iterator, List, Optional
+
+from database.db_manager import INITIAL_ORDER_KEY_SQL, DatabaseManager, open_connection
+from models.task import Priority, day_number_to_date, today_day_number
+
+# Seeded synthetic task data with the shape of a real list: short titles with
+# the odd long one, notes on a minority of tasks, a few categories holding most
+# tasks, due dates clustered around today with a long tail and some undated
+# tasks. Dates are relative to the day the data is generated, so overdue and
+# due-soon proportions stay the same whenever the benchmarks run.
+#
+# Bump GENERATOR_VERSION whenever the output changes, so cached databases and
+# baselines built from the old data are not compared against the new.
+
+GENERATOR_VERSION = 6
+DEFAULT_SEED = 1234
+INSERT_CHUNK_SIZE = 10000
+
+WORDS = """
+review update draft send call email plan fix write read prepare schedule book renew pay order clean check test
+deploy merge design sketch research compare buy return cancel confirm submit organise archive backup migrate
+report invoice budget meeting agenda slides notes proposal contract release ticket feature bug docs onboarding
+interview dentist groceries laundry garden garage car insurance taxes passport mortgage rent gym physio birthday
+present dinner flight hotel visa kids school homework parents team manager client vendor server database laptop
+phone printer router website blog newsletter podcast course chapter thesis paper grant quarterly weekly monthly
+""".split()
+
+# (name, weight): the first few categories hold most tasks
+CATEGORIES = [("Work", 40), ("Home", 22), ("Personal", 14), ("Errands", 8), ("Health", 6), ("Finance", 4),
+              ("Learning", 3), ("Other", 3)]
+SUB_CATEGORIES = ["", "", "", "Urgent", "Someday", "Project A", "Project B", "Admin", "Follow-up", "Waiting"]
+PRIORITY_WEIGHTS = [(Priority.NONE, 10), (Priority.LOW, 30), (Priority.MEDIUM, 40), (Priority.HIGH, 20)]
+UNDATED_SHARE = 0.2
+COMPLETED_SHARE = 0.4
+NOTES_SHARE = 0.25
+DESCRIPTION_SHARE = 0.3
+# One open dated task in RECURRING_EVERY repeats, with one of these rules
+RECURRING_EVERY = 50
+RECURRENCE_RULES = ["FREQ=DAILY", "FREQ=WEEKLY", "FREQ=WEEKLY;INTERVAL=2", "FREQ=MONTHLY"]
+# (tag, n): one task in n carries the tag, spread so that tags overlap
+TAGS = [("urgent", 12), ("waiting", 10), ("q3", 5), ("blocked", 25), ("reading", 30), ("errand", 15), ("idea", 40)]
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def _text_of_length(rng: random.Random, mean_words: float, sigma: float, cap: int) -> str:
+    # Log-normal lengths: mostly short, sometimes several paragraphs
+    return _words(rng, max(1, min(cap, int(rng.lognormvariate(0, sigma) * mean_words))))
+
+def generate_task_rows(count: int, seed: int = DEFAULT_SEED, today: Optional[int] = None) -> Iterator[tuple]:
+    # Rows in the tasks table's storage form: (title, description, due day or
+    # None, priority int, completed int, category, sub_category, notes)
+    rng = random.Random(seed)
+    today = today_day_number() if today is None else today
+    category_names, category_weights = zip(*CATEGORIES)
+    priorities, priority_weights = zip(*PRIORITY_WEIGHTS)
+    for _ in range(count):
+        title = _text_of_length(rng, 4, 0.5, 30).capitalize()
+        description = _text_of_length(rng, 12, 0.8, 200) if rng.random() < DESCRIPTION_SHARE else ""
+        notes = _text_of_length(rng, 40, 1.0, 1500) if rng.random() < NOTES_SHARE else ""
+        completed = rng.random() < COMPLETED_SHARE
+        if rng.random() < UNDATED_SHARE:
+            due_day = None
+        else:
+            # Open tasks cluster in the coming weeks, completed ones in the past
+            offset = rng.gauss(-30 if completed else 10, 25)
+            if rng.random() < 0.05:
+                offset *= 8  # long tail of far-off and long-forgotten tasks
+            due_day = today + int(offset)
+        yield (title, description, due_day, int(rng.choices(priorities, priority_weights)[0]), int(completed),
+               rng.choices(category_names, category_weights)[0], rng.choice(SUB_CATEGORIES), notes)
+
+def build_database(path: str, count: int, seed: int = DEFAULT_SEED) -> str:
+    # A database with the app's current schema holding `count` generated tasks
+    if os.path.exists(path):
+        os.remove(path)
+    DatabaseManager(path)
+    conn = open_connection(path, isolation_level=None)
+    try:
+        rows = enumerate(generate_task_rows(count, seed), 1)
+        conn.execute("BEGIN")
+        while True:
+            chunk = [row for _, row in zip(range(INSERT_CHUNK_SIZE), rows)]
+            if not chunk:
+                break
+            conn.executemany('''
+                INSERT INTO tasks (id, title, due_date, priority, completed, category, sub_category)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [(task_id, title, *fields) for task_id, (title, _, *fields, _) in chunk])
+            conn.executemany('INSERT INTO task_details (task_id, description, notes) VALUES (?, ?, ?)',
+                             [(task_id, description, notes) for task_id, (_, description, *_, notes) in chunk
+                              if description or notes])
+        # Completed around their due date rather than all today, as in a list that
+        # has been in use for a while (and has not been archived yet)
+        conn.execute("UPDATE tasks SET completed_day = MIN(COALESCE(due_date, ?), ?) WHERE completed = 1",
+                     (today_day_number(), today_day_number()))
+        # The manual order keys the app gives tasks it adds, in id order
+        conn.execute(f"UPDATE tasks SET order_key = {INITIAL_ORDER_KEY_SQL}")
+        conn.execute(f'''
+            UPDATE tasks SET recurrence = CASE id % {len(RECURRENCE_RULES)}
+                {" ".join(f"WHEN {index} THEN '{rule}'" for index, rule in enumerate(RECURRENCE_RULES))} END
+            WHERE completed = 0 AND due_date IS NOT NULL AND id % {RECURRING_EVERY} = 0
+        ''')
+        for tag_id, (name, every) in enumerate(TAGS, 1):
+            conn.execute("INSERT INTO tags (id, name) VALUES (?, ?)", (tag_id, name))
+            conn.execute("INSERT INTO task_tags (task_id, tag_id) SELECT id, ? FROM tasks WHERE (id + ?) % ? = 0",
+                         (tag_id, tag_id, every))
+        conn.executemany("INSERT OR IGNORE INTO categories (name) VALUES (?)", [(name,) for name, _ in CATEGORIES])
+        conn.executemany("INSERT OR IGNORE INTO sub_categories (name) VALUES (?)",
+                         [(name,) for name in SUB_CATEGORIES if name])
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return path
+
+def build_legacy_database(path: str, count: int, seed: int = DEFAULT_SEED) -> str:
+    # The pre-typed-columns schema (text dates and priority labels), as left by
+    # old versions; opening it with DatabaseManager runs the migration
+    if os.path.exists(path):
+        os.remove(path)
+    labels = {int(Priority.NONE): "", int(Priority.LOW): "Low", int(Priority.MEDIUM): "Medium",
+              int(Priority.HIGH): "High"}
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('''
+            CREATE TABLE tasks (
+                id INTEGER PRIMARY KEY, title TEXT NOT NULL, description TEXT, due_date TEXT, priority TEXT,
+                completed BOOLEAN, category TEXT DEFAULT "Other", sub_category TEXT DEFAULT "", notes TEXT DEFAULT ""
+            )
+        ''')
+        conn.executemany('''
+            INSERT INTO tasks (title, description, due_date, priority, completed, category, sub_category, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', ((title, description, day_number_to_date(due_day) or "", labels[priority], completed, category,
+               sub_category, notes)
+              for title, description, due_day, priority, completed, category, sub_category, notes
+              in generate_task_rows(count, seed)))
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+def cached_database(cache_dir: str, count: int, seed: int = DEFAULT_SEED, legacy: bool = False) -> str:
+    # Generated databases are kept between runs; large ones take a while to build.
+    # Dates are relative to the generation day, so the cache is rebuilt daily.
+    os.makedirs(cache_dir, exist_ok=True)
+    kind = "legacy" if legacy else "tasks"
+    path = os.path.join(cache_dir, f"{kind}-v{GENERATOR_VERSION}-s{seed}-n{count}-d{today_day_number()}.db")
+    if not os.path.exists(path):
+        for name in os.listdir(cache_dir):
+            if name.startswith(f"{kind}-v{GENERATOR_VERSION}-s{seed}-n{count}-"):
+                os.remove(os.path.join(cache_dir, name))
+        temp_path = path + ".part"
+        (build_legacy_database if legacy else build_database)(temp_path, count, seed)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(temp_path + suffix):
+                os.remove(temp_path + suffix)
+        os.replace(temp_path, path)
+    return path
+
+def working_copy(source: str, target: str) -> str:
+    # Benchmarks that write get their own copy, leaving the cached one pristine
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    shutil.copyfile(source, target)
+    return target
+
+def sample_ids(path: str, count: int, seed: int = DEFAULT_SEED) -> List[int]:
+    conn = sqlite3.connect(path)
+    try:
+        ids = [row[0] for row in conn.execute("SELECT id FROM tasks")]
+    finally:
+        conn.close()
+    return random.Random(seed).sample(ids, min(count, len(ids)))
@@ -0,0 +1,140 @@
+import re
+import sys
+import json
+import time
+import sqlite3
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Timing and reporting. A benchmark is a zero-argument callable; cheap calls are
+# looped until a sample takes at least `min_time`, and calls that need fresh
+# state get an untimed `setup` before every single timed call. Times are per
+# call, in seconds; comparisons use the median of the samples.
+
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.1
+MAX_LOOPS = 1_000_000
+DEFAULT_THRESHOLD = 0.15
+# Differences below this are scheduling noise, whatever the ratio
+NOISE_FLOOR_S = 20e-6
+
+@dataclass
+class Benchmark:
+    name: str
+    function: Callable[[], Any]
+    setup: Optional[Callable[[], Any]] = None
+    # DatabaseManager methods exercised, for the coverage check
+    covers: Tuple[str, ...] = ()
+
+@dataclass
+class Result:
+    name: str
+    size: int
+    loops: int
+    samples: List[float] = field(repr=False)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "size": self.size, "loops": self.loops, "median_s": self.median,
+                "min_s": min(self.samples), "max_s": max(self.samples), "samples_s": self.samples}
+
+def _autorange(function, min_time: float) -> int:
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        if time.perf_counter() - started >= min_time or loops >= MAX_LOOPS:
+            return loops
+        loops *= 10
+
+def measure(benchmark: Benchmark, size: int, repeat: int = DEFAULT_REPEAT,
+            min_time: float = DEFAULT_MIN_TIME) -> Result:
+    samples = []
+    if benchmark.setup is not None:
+        for _ in range(repeat):
+            benchmark.setup()
+            started = time.perf_counter()
+            benchmark.function()
+            samples.append(time.perf_counter() - started)
+        return Result(benchmark.name, size, 1, samples)
+
+    loops = _autorange(benchmark.function, min_time)
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            benchmark.function()
+        samples.append((time.perf_counter() - started) / loops)
+    return Result(benchmark.name, size, loops, samples)
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"timestamp": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version, "platform": platform.platform(), "machine": platform.machine(),
+            "git_commit": commit}
+
+def write_results(path: str, results: Iterable[Result], meta: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": [result.to_dict() for result in results]}, f, indent=2)
+        f.write("\n")
+
+def load_results(path: str) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {(result["name"], result["size"]): result for result in data["results"]}
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+def compare(baseline: Dict[Tuple[str, int], Dict[str, Any]], current: Dict[Tuple[str, int], Dict[str, Any]],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    # One row per benchmark in either run, with status "regression",
+    # "improvement", "same", "new" or "missing"
+    rows = []
+    for key in sorted(set(baseline) | set(current), key=lambda key: (key[0], key[1])):
+        before, after = baseline.get(key), current.get(key)
+        row = {"name": key[0], "size": key[1], "baseline_s": before and before["median_s"],
+               "current_s": after and after["median_s"], "ratio": None}
+        if before is None:
+            row["status"] = "new"
+        elif after is None:
+            row["status"] = "missing"
+        else:
+            row["ratio"] = after["median_s"] / before["median_s"] if before["median_s"] else float("inf")
+            difference = after["median_s"] - before["median_s"]
+            if abs(difference) < NOISE_FLOOR_S or abs(row["ratio"] - 1) <= threshold:
+                row["status"] = "same"
+            else:
+                row["status"] = "regression" if difference > 0 else "improvement"
+        rows.append(row)
+    return rows
+
+def print_comparison(rows: List[Dict[str, Any]], out=sys.stdout, show_all: bool = False):
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+        if not show_all and row["status"] in ("same", "new"):
+            continue
+        before = format_time(row["baseline_s"]) if row["baseline_s"] is not None else "-"
+        after = format_time(row["current_s"]) if row["current_s"] is not None else "-"
+        ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else ""
+        print(f"{row['status']:<12} {row['name']:<44} {row['size']:>8} {before:>10} -> {after:>10} {ratio:>7}",
+              file=out)
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())), file=out)
+
+def select(benchmarks: Iterable[Benchmark], pattern: Optional[str]) -> List[Benchmark]:
+    return [benchmark for benchmark in benchmarks if not pattern or re.search(pattern, benchmark.name)]
@@ -0,0 +1,289 @@
+import os
+import gc
+import sys
+import time
+import random
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .dataset import DEFAULT_SEED, WORDS, build_database
+
+# Long-session soak test: drives a MainWindow under the offscreen platform
+# through thousands of scripted operations and fails when memory, live
+# QObjects or signal connections keep growing with the number of operations.
+#
+# Each scenario repeats one kind of operation, so growth that a list rebuild
+# would hide (a connection made again on a row that is later replaced) still
+# shows up; the mixed scenario then interleaves all of them. Before measuring,
+# a scenario is warmed up so caches that fill once (compiled regexes, icon
+# pixmaps, statement caches) are not counted as growth.
+
+DEFAULT_TASKS = 25
+DEFAULT_OPS = 200
+DEFAULT_WARMUP = 30
+# Per-operation growth allowed after warm-up. A real leak grows by at least one
+# object or connection per operation (0.05 allows one in twenty), and bytes
+# allow for allocator and interning noise.
+MEMORY_BUDGET_BYTES_PER_OP = 512
+QOBJECT_BUDGET_PER_OP = 0.05
+CONNECTION_BUDGET_PER_OP = 0.05
+TOP_ALLOCATIONS = 8
+
+@dataclass
+class Sample:
+    snapshot: tracemalloc.Snapshot
+    qobjects: int
+    connections: int
+
+    @property
+    def memory(self) -> int:
+        return sum(stat.size for stat in self.snapshot.statistics("filename"))
+
+@dataclass
+class SoakResult:
+    scenario: str
+    ops: int
+    seconds: float
+    growth: Dict[str, float]
+    over_budget: List[str]
+    top_allocations: List[str]
+
+def _signal_signatures(meta_object, cache={}):
+    # One signature per signal: overloads generated for default arguments
+    # ("clicked()" next to "clicked(bool)") share their connections
+    from PySide6.QtCore import QMetaMethod
+    name = meta_object.className()
+    if name not in cache:
+        signatures, seen = [], set()
+        for index in range(meta_object.methodCount()):
+            method = meta_object.method(index)
+            if method.methodType() == QMetaMethod.Signal and bytes(method.name()) not in seen:
+                seen.add(bytes(method.name()))
+                signatures.append(bytes(method.methodSignature()).decode())
+        cache[name] = signatures
+    return cache[name]
+
+def live_qobjects() -> list:
+    # Everything in the widget trees plus parentless QObjects kept alive from Python
+    import shiboken6
+    from PySide6.QtCore import QObject
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance()
+    objects = {id(app): app}
+    for root in [app] + app.topLevelWidgets():
+        objects[id(root)] = root
+        for child in root.findChildren(QObject):
+            objects[id(child)] = child
+    for candidate in gc.get_objects():
+        if isinstance(candidate, QObject) and id(candidate) not in objects and shiboken6.isValid(candidate):
+            objects[id(candidate)] = candidate
+    return list(objects.values())
+
+def count_connections(objects) -> int:
+    from PySide6.QtCore import SIGNAL
+    return sum(obj.receivers(SIGNAL(signature))
+               for obj in objects for signature in _signal_signatures(obj.metaObject()))
+
+def process_events():
+    # What the event loop does between two user actions, deleteLater() included
+    from PySide6.QtCore import QCoreApplication, QEvent
+    from PySide6.QtWidgets import QApplication
+    QApplication.processEvents()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+def settle():
+    for _ in range(3):
+        process_events()
+    gc.collect()
+
+def take_sample() -> Sample:
+    settle()
+    # Counting creates Python wrappers for the QObjects it visits, which live as
+    # long as the objects do; the harness's own allocations are left out
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__),
+                                                          tracemalloc.Filter(False, tracemalloc.__file__)])
+    objects = live_qobjects()
+    return Sample(snapshot, len(objects), count_connections(objects))
+
+class SoakDriver:
+    # Scripted user actions against one MainWindow. Actions that would open a
+    # modal dialog (edit, delete confirmation) call what the dialog leads to.
+
+    def __init__(self, window, seed: int = DEFAULT_SEED):
+        self.window = window
+        self.rng = random.Random(seed)
+        self.dark = False
+        self.turn = 0
+
+    def operations(self) -> Dict[str, Callable[[], None]]:
+        return {"toggle_completed": self.toggle_completed, "notes": self.toggle_notes, "search": self.search,
+                "sort": self.flip_sort, "filter": self.change_filter, "theme": self.change_theme,
+                "add_delete": self.add_and_delete, "dropdowns": self.pick_dropdowns,
+                "select_for_deletion": self.select_for_deletion}
+
+    def _random_widget(self):
+        widgets = list(self.window.todo_list.task_widgets.values())
+        return self.rng.choice(widgets) if widgets else None
+
+    def toggle_completed(self):
+        widget = self._random_widget()
+        if widget is not None:
+            widget.check_button.click()
+
+    def toggle_notes(self):
+        # Expand and collapse, finishing each animation instead of waiting 200 ms.
+        # Rows take turns: each creates its animation on first use, which a
+        # warm-up of at least one turn per row keeps out of the measurement.
+        widgets = list(self.window.todo_list.task_widgets.values())
+        if not widgets:
+            return
+        widget = widgets[self.turn % len(widgets)]
+        self.turn += 1
+        for _ in range(2):
+            widget.toggle_notes_section()
+            widget.animation.setCurrentTime(widget.animation.duration())
+
+    def search(self):
+        self.window.search_input.setText(self.rng.choice(WORDS)[:self.rng.randint(2, 5)])
+        self.window.search_input.clear()
+
+    def flip_sort(self):
+        combo = self.window.sort_combo
+        combo.setCurrentIndex(self.rng.randrange(combo.count()))
+        self.window.sort_order_button.click()
+
+    def change_filter(self):
+        for combo in (self.window.filter_combo, self.window.category_filter_combo):
+            combo.setCurrentIndex(self.rng.randrange(combo.count()))
+
+    def change_theme(self):
+        from PySide6.QtGui import QColor, QPalette
+        from PySide6.QtWidgets import QApplication
+        self.dark = not self.dark
+        palette = QPalette(QColor("#2b2b2b")) if self.dark else QApplication.style().standardPalette()
+        QApplication.setPalette(palette)
+        self.window.load_and_apply_stylesheet()
+
+    def add_and_delete(self):
+        window = self.window
+        window.task_input.setText(f"Soak task {self.rng.random():.6f}")
+        window.add_task()
+        added = max(window.all_tasks, key=lambda task: task.id)
+        window.perform_delete([added.id])
+
+    def pick_dropdowns(self):
+        for combo in (self.window.priority_combo, self.window.sub_category_combo):
+            combo.setCurrentIndex(self.rng.choice([0, combo.count() - 1]))
+
+    def select_for_deletion(self):
+        widget = self._random_widget()
+        if widget is not None:
+            widget.toggle_selection_for_deletion()
+            widget.toggle_selection_for_deletion()
+
+    def reset_view(self):
+        # Rows are only rebuilt if a control actually changes, so rows an
+        # operation reuses keep whatever it attached to them
+        self.window.search_input.clear()
+        for combo in (self.window.filter_combo, self.window.category_filter_combo, self.window.sort_combo):
+            combo.setCurrentIndex(0)
+        # Undo history is bounded (UNDO_LIMIT steps) but would count as growth
+        self.window.undo_stack.clear()
+
+def run_scenario(name: str, operation: Callable[[], None], reset: Callable[[], None], ops: int,
+                 warmup: int) -> SoakResult:
+    # `reset` puts the window back in the same state before both samples, so
+    # a filter that happens to show fewer rows at the end is not a shrink
+    for _ in range(warmup):
+        operation()
+        process_events()
+    reset()
+    before = take_sample()
+    started = time.perf_counter()
+    for _ in range(ops):
+        operation()
+        process_events()
+    seconds = time.perf_counter() - started
+    reset()
+    after = take_sample()
+
+    growth = {"bytes/op": (after.memory - before.memory) / ops,
+              "qobjects/op": (after.qobjects - before.qobjects) / ops,
+              "connections/op": (after.connections - before.connections) / ops}
+    budgets = {"bytes/op": MEMORY_BUDGET_BYTES_PER_OP, "qobjects/op": QOBJECT_BUDGET_PER_OP,
+               "connections/op": CONNECTION_BUDGET_PER_OP}
+    over_budget = [metric for metric, value in growth.items() if value > budgets[metric]]
+    top = [str(stat) for stat in after.snapshot.compare_to(before.snapshot, "lineno")[:TOP_ALLOCATIONS]
+           if stat.size_diff > 0]
+    return SoakResult(name, ops, seconds, growth, over_budget, top)
+
+def _open_window(db_path: str, work_dir: str):
+    from PySide6.QtCore import QSettings
+    from PySide6.QtWidgets import QApplication
+    from database.db_manager import DatabaseManager
+    from ui.main_window import MainWindow
+
+    app = QApplication.instance() or QApplication(["soak"])
+    app.setStyle("Fusion")
+    # The window saves its size through QSettings; keep that out of the user's config
+    QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, work_dir)
+    QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, work_dir)
+    try:
+        import resources_rc
+        resources_rc.qInitResources()
+    except ImportError:
+        pass
+    window = MainWindow(DatabaseManager(db_path))
+    window.show()
+    deadline = time.perf_counter() + 60
+    while window.is_loading() and time.perf_counter() < deadline:
+        app.processEvents()
+    settle()
+    return app, window
+
+def run_soak(work_dir: str, tasks: int = DEFAULT_TASKS, ops: int = DEFAULT_OPS, warmup: int = DEFAULT_WARMUP,
+             scenarios: Optional[List[str]] = None, seed: int = DEFAULT_SEED, out=sys.stdout) -> List[SoakResult]:
+    from database.backup import create_backup
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    # At least one warm-up operation per row, see SoakDriver.toggle_notes()
+    warmup = max(warmup, tasks)
+    db_path = build_database(os.path.join(work_dir, "soak.db"), tasks, seed)
+    # A fresh backup, so the one scheduled a minute after startup is skipped
+    create_backup(db_path)
+    app, window = _open_window(db_path, work_dir)
+    # Timers that would run in the middle of a measurement
+    for timer in (window.backup_timer, window.change_timer, window.archive_timer, window.overdue_scheduler.timer):
+        timer.stop()
+    window.idle_runner.stop()
+
+    driver = SoakDriver(window, seed)
+    operations = driver.operations()
+
+    def mixed():
+        operations[driver.rng.choice(list(operations))]()
+    operations["mixed"] = mixed
+
+    results = []
+    tracemalloc.start()
+    # The first count creates the Qt enum classes and signal lists it uses
+    take_sample()
+    try:
+        for name, operation in operations.items():
+            if scenarios and name not in scenarios:
+                continue
+            result = run_scenario(name, operation, driver.reset_view, ops, warmup)
+            results.append(result)
+            status = "FAIL " + ", ".join(result.over_budget) if result.over_budget else "ok"
+            print(f"{name:<20} {result.ops:>6} ops {result.seconds:7.1f} s  "
+                  f"{result.growth['bytes/op']:9.1f} B/op  {result.growth['qobjects/op']:7.3f} QObjects/op  "
+                  f"{result.growth['connections/op']:7.3f} connections/op  {status}", file=out, flush=True)
+            if result.over_budget:
+                for line in result.top_allocations:
+                    print(f"    {line}", file=out)
+    finally:
+        tracemalloc.stop()
+        window.close()
+        window.deleteLater()
+        settle()
+    return results
@@ -0,0 +1,431 @@
+import json
+import asyncio
+import logging
+import itertools
+import threading
+from http import HTTPStatus
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from database.db_manager import UPDATABLE_TASK_FIELDS, DatabaseManager
+from models.task import NO_DUE_DATE, Task, date_to_day_number
+from models.recurrence import parse_rule
+from models.tag_index import normalize_tags
+from models.task_filter import (ALL_CATEGORIES, ALL_SUB_CATEGORIES, FILTER_OPTIONS, SORT_OPTIONS,
+                                filter_and_sort_tasks)
+
+# A small HTTP/JSON API over the task database for local tools, served with
+# asyncio streams so it needs nothing beyond the standard library:
+#
+#   GET    /tasks?filter=&category=&sub_category=&search=&tags=&sort=&descending=&limit=
+#   POST   /tasks              one task object, or a list of them -> ids
+#   GET    /tasks/<id>
+#   PATCH  /tasks/<id>         the fields to change -> the updated task
+#   DELETE /tasks/<id>
+#   GET    /changes?since=<revision>&wait=<seconds>
+#
+# Reads run on a bounded pool of persistent connections; every write goes
+# through one writer connection, and writes that queue up while a batch is
+# being written are committed together in the next batch. /changes answers as
+# soon as the database revision moves past `since` (long poll), including for
+# writes made by the app itself.
+
+LOCALHOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+READ_POOL_SIZE = 4
+WRITE_BATCH_SIZE = 256
+MAX_BODY_BYTES = 1024 * 1024
+MAX_WAIT_SECONDS = 60
+# How often a waiting /changes request looks for writes made outside the server
+CHANGE_POLL_INTERVAL = 0.5
+IDLE_CONNECTION_TIMEOUT = 30
+# Requests naming another host are refused, so a web page cannot reach the API
+# through DNS rebinding
+ALLOWED_HOSTS = {"127.0.0.1", "localhost"}
+PRIORITY_CHOICES = ("", "Low", "Medium", "High")
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _task_fields(record, partial=False) -> Dict[str, Any]:
+    # Validates a task object from a request body
+    if not isinstance(record, dict):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "expected a JSON object")
+    unknown = set(record) - set(UPDATABLE_TASK_FIELDS) - {"id"}
+    if unknown:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"unknown fields: {', '.join(sorted(unknown))}")
+    fields = {key: record[key] for key in UPDATABLE_TASK_FIELDS if key in record}
+    if not partial or "title" in fields:
+        if not isinstance(fields.get("title"), str) or not fields["title"].strip():
+            raise ApiError(HTTPStatus.BAD_REQUEST, "title must be a non-empty string")
+    for key in ("description", "due_date", "category", "sub_category", "notes", "priority", "recurrence"):
+        if key in fields and not isinstance(fields[key], str):
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"{key} must be a string")
+    if "priority" in fields and fields["priority"] not in PRIORITY_CHOICES:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "priority must be one of Low, Medium, High or empty")
+    if fields.get("due_date") and date_to_day_number(fields["due_date"]) == NO_DUE_DATE:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "due_date must be YYYY-MM-DD")
+    if "completed" in fields and not isinstance(fields["completed"], bool):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "completed must be true or false")
+    if "recurrence" in fields:
+        try:
+            rule = parse_rule(fields["recurrence"].strip())
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+        fields["recurrence"] = rule.to_rule() if rule else ""
+    if "tags" in fields:
+        if not isinstance(fields["tags"], list) or not all(isinstance(tag, str) for tag in fields["tags"]):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "tags must be a list of strings")
+        fields["tags"] = normalize_tags(fields["tags"])
+    return fields
+
+class ReadPool:
+    # Persistent read connections, each used by one request at a time; requests
+    # beyond the pool size wait for a free connection
+    def __init__(self, db_name: str, size: int = READ_POOL_SIZE):
+        self.executor = ThreadPoolExecutor(size, thread_name_prefix="api-read")
+        self.managers = [DatabaseManager(db_name, persistent=True) for _ in range(size)]
+        self.available = asyncio.Queue()
+        for db_manager in self.managers:
+            self.available.put_nowait(db_manager)
+
+    async def run(self, function: Callable[[DatabaseManager], Any]):
+        db_manager = await self.available.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, db_manager)
+        finally:
+            self.available.put_nowait(db_manager)
+
+    def close(self):
+        self.executor.shutdown()
+        for db_manager in self.managers:
+            db_manager.close()
+
+@dataclass
+class WriteRequest:
+    kind: str  # "add", "update" or "delete"
+    payload: Any
+    future: asyncio.Future
+
+class BatchWriter:
+    # Serialises all writes on one connection and one thread. Each run of
+    # same-kind requests in a batch is a single transaction.
+    def __init__(self, db_name: str, on_written: Callable[[], Awaitable[None]]):
+        self.db_manager = DatabaseManager(db_name, persistent=True)
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="api-write")
+        self.queue = asyncio.Queue()
+        self.on_written = on_written
+
+    async def submit(self, kind: str, payload):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(WriteRequest(kind, payload, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self.executor, self._write, batch)
+            except Exception as e:
+                logging.exception("API write batch failed")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            for request, result in zip(batch, results):
+                if request.future.done():
+                    continue
+                if isinstance(result, ApiError):
+                    request.future.set_exception(result)
+                else:
+                    request.future.set_result(result)
+            await self.on_written()
+
+    def _write(self, batch: List[WriteRequest]) -> list:
+        results = []
+        for kind, requests in itertools.groupby(batch, key=lambda request: request.kind):
+            payloads = [request.payload for request in requests]
+            written = self._write_run(kind, payloads)
+            if len(payloads) > 1 and not any(written):
+                # A failing request rolls back the whole run's transaction (or
+                # none matched); alone, each request gets its own outcome
+                written = [self._write_run(kind, [payload])[0] for payload in payloads]
+            results.extend(written)
+        return results
+
+    def _write_run(self, kind: str, payloads: list) -> list:
+        # New ids (None on error) for adds; for updates and deletes, whether
+        # the task was found, or an ApiError when writing it failed
+        if kind == "add":
+            return self.db_manager.add_tasks(payloads) or [None] * len(payloads)
+        if kind == "update":
+            task_ids = [payload["id"] for payload in payloads]
+            applied = set(self.db_manager.update_tasks(payloads))
+        else:
+            task_ids = payloads
+            applied = set(self.db_manager.delete_tasks(payloads))
+        if len(task_ids) == 1 and not applied and self.db_manager.get_task(task_ids[0]) is not None:
+            # The task is there, so the write failed rather than found nothing
+            return [ApiError(HTTPStatus.INTERNAL_SERVER_ERROR, f"could not write task {task_ids[0]}")]
+        return [task_id in applied for task_id in task_ids]
+
+    def close(self):
+        self.executor.shutdown()
+        self.db_manager.close()
+
+def _query_tasks(db_manager, params) -> List[Dict[str, Any]]:
+    task_dicts = {task["id"]: task for task in db_manager.get_all_tasks()}
+    tasks = filter_and_sort_tasks((Task.from_dict(task) for task in task_dicts.values()), **params)
+    return [task_dicts[task.id] for task in tasks]
+
+class TaskApiServer:
+    def __init__(self, db_name: str, port: int = DEFAULT_PORT, read_pool_size: int = READ_POOL_SIZE):
+        self.db_name = db_name
+        self.port = port
+        self.read_pool_size = read_pool_size
+        self.server = None
+        self.read_pool = None
+        self.writer = None
+        self.writer_task = None
+        self.written = None
+        self.connections = {}  # handler task -> stream writer
+
+    async def start(self):
+        # port=0 picks a free port; self.port holds the real one afterwards
+        self.read_pool = ReadPool(self.db_name, self.read_pool_size)
+        self.written = asyncio.Condition()
+        self.writer = BatchWriter(self.db_name, self._wake_waiters)
+        self.writer_task = asyncio.create_task(self.writer.run())
+        self.server = await asyncio.start_server(self.handle_connection, LOCALHOST, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logging.info("Task API listening on http://%s:%d", LOCALHOST, self.port)
+
+    async def stop(self):
+        if self.server is None:
+            return
+        self.server.close()
+        await self.server.wait_closed()
+        # Idle keep-alive connections would otherwise be cancelled mid-read
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        self.writer_task.cancel()
+        self.writer.close()
+        self.read_pool.close()
+        self.server = None
+        logging.info("Task API stopped")
+
+    async def _wake_waiters(self):
+        async with self.written:
+            self.written.notify_all()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_CONNECTION_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (len(parts) == 3 and parts[2] == "HTTP/1.1" and
+                              headers.get("connection", "").lower() != "close")
+                try:
+                    if len(parts) != 3:
+                        raise ApiError(HTTPStatus.BAD_REQUEST, "malformed request line")
+                    length = int(headers.get("content-length") or 0)
+                    if length > MAX_BODY_BYTES:
+                        keep_alive = False
+                        raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(parts[0], parts[1], headers, body)
+                except ApiError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except ValueError as e:
+                    status, payload = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+                except Exception:
+                    logging.exception("Task API request failed: %s", request_line)
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                        f"Content-Type: application/json; charset=utf-8\r\n"
+                        f"Content-Length: {len(data)}\r\n")
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode("latin-1") + b"\r\n" + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.connections[task]
+            writer.close()
+
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        host = headers.get("host", "").rsplit(":", 1)[0]
+        if host not in ALLOWED_HOSTS:
+            raise ApiError(HTTPStatus.FORBIDDEN, "requests must be addressed to localhost")
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        segments = [segment for segment in url.path.split("/") if segment]
+        data = None
+        if body:
+            # Browsers cannot send a cross-origin JSON body without a preflight,
+            # which this server never answers
+            if not headers.get("content-type", "").startswith("application/json"):
+                raise ApiError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "request bodies must be application/json")
+            try:
+                data = json.loads(body)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}")
+
+        if segments == ["tasks"]:
+            if method == "GET":
+                return HTTPStatus.OK, await self.query_tasks(query)
+            if method == "POST":
+                return HTTPStatus.CREATED, await self.add_tasks(data)
+        elif len(segments) == 2 and segments[0] == "tasks" and segments[1].isdigit():
+            task_id = int(segments[1])
+            if method == "GET":
+                return HTTPStatus.OK, await self.get_task(task_id)
+            if method == "PATCH":
+                return HTTPStatus.OK, await self.update_task(task_id, data)
+            if method == "DELETE":
+                if not await self.writer.submit("delete", task_id):
+                    raise ApiError(HTTPStatus.NOT_FOUND, f"no task with id {task_id}")
+                return HTTPStatus.OK, {"deleted": task_id}
+        elif segments == ["changes"]:
+            if method == "GET":
+                return HTTPStatus.OK, await self.wait_for_changes(int(query.get("since", 0)),
+                                                                  float(query.get("wait", 0)))
+        else:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no such resource: {url.path}")
+        raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported on {url.path}")
+
+    async def query_tasks(self, query):
+        params = {
+            "filter_option": query.get("filter", "All"),
+            "category_filter": query.get("category", ALL_CATEGORIES),
+            "sub_category_filter": query.get("sub_category", ALL_SUB_CATEGORIES),
+            "sort_option": query.get("sort", "Due Date"),
+            "descending": query.get("descending", "").lower() in ("1", "true"),
+            "search_text": query.get("search", "").lower(),
+            "tag_query": query.get("tags", ""),
+        }
+        if params["filter_option"] not in FILTER_OPTIONS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"filter must be one of {', '.join(FILTER_OPTIONS)}")
+        if params["sort_option"] not in SORT_OPTIONS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"sort must be one of {', '.join(SORT_OPTIONS)}")
+        tasks = await self.read_pool.run(lambda db_manager: _query_tasks(db_manager, params))
+        if "limit" in query:
+            if not query["limit"].isdigit():
+                raise ApiError(HTTPStatus.BAD_REQUEST, "limit must be a non-negative integer")
+            tasks = tasks[:int(query["limit"])]
+        return tasks
+
+    async def get_task(self, task_id: int):
+        task = await self.read_pool.run(lambda db_manager: db_manager.get_task(task_id))
+        if task is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no task with id {task_id}")
+        return task
+
+    async def add_tasks(self, data):
+        records = data if isinstance(data, list) else [data]
+        tasks = [_task_fields(record) for record in records]
+        # Submitted one by one so they share a batch with other clients' writes
+        task_ids = await asyncio.gather(*(self.writer.submit("add", task) for task in tasks))
+        if None in task_ids:
+            raise ApiError(HTTPStatus.INTERNAL_SERVER_ERROR, "could not add tasks")
+        return {"ids": task_ids} if isinstance(data, list) else {"id": task_ids[0]}
+
+    async def update_task(self, task_id: int, data):
+        change = _task_fields(data, partial=True)
+        change["id"] = task_id
+        if not await self.writer.submit("update", change):
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no task with id {task_id}")
+        return await self.get_task(task_id)
+
+    async def wait_for_changes(self, since: int, wait: float):
+        wait = max(0.0, min(wait, MAX_WAIT_SECONDS))
+        deadline = asyncio.get_running_loop().time() + wait
+        while True:
+            revision, changed, deleted = await self.read_pool.run(
+                lambda db_manager: db_manager.get_changes_since(since))
+            remaining = deadline - asyncio.get_running_loop().time()
+            if revision != since or remaining <= 0:
+                return {"revision": revision, "changed": changed, "deleted": deleted}
+            # Woken early by our own writes; the timeout catches everyone else's
+            async with self.written:
+                try:
+                    await asyncio.wait_for(self.written.wait(), min(remaining, CHANGE_POLL_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+
+def serve(db_name: str, port: int = DEFAULT_PORT):
+    # Runs the server in the foreground until interrupted
+    async def main():
+        server = TaskApiServer(db_name, port)
+        await server.start()
+        print(f"Serving the task API on http://{LOCALHOST}:{server.port} (Ctrl+C to stop)", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+class ServerThread(threading.Thread):
+    # Hosts the server's event loop next to the GUI. start() returns once the
+    # server is listening or has failed; check `error` afterwards.
+    def __init__(self, db_name: str, port: int = DEFAULT_PORT):
+        super().__init__(name="task-api", daemon=True)
+        self.server = TaskApiServer(db_name, port)
+        self.loop = None
+        self.error: Optional[Exception] = None
+        self._ready = threading.Event()
+        self._stopped = None
+
+    def start(self):
+        super().start()
+        self._ready.wait()
+
+    def run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        try:
+            await self.server.start()
+        except OSError as e:
+            self.error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        await self._stopped.wait()
+        await self.server.stop()
+
+    def stop(self):
+        if self.loop is not None and self.error is None and self.is_alive():
+            self.loop.call_soon_threadsafe(self._stopped.set)
+            self.join()
@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Headless entry point for scripts and automations: `python src/cli.py <command>`.
+# It works on the same database as the app through DatabaseManager and never
+# imports Qt (or numpy), so it starts in a few tens of milliseconds. Output is
+# JSON on stdout; errors go to stderr.
+
+from database.db_manager import TASK_CHUNK_SIZE, DatabaseManager
+from models.task import NO_DUE_DATE, Task, date_to_day_number
+from models.recurrence import parse_rule
+from models.tag_index import normalize_tags
+from models.task_filter import (ALL_CATEGORIES, ALL_SUB_CATEGORIES, FILTER_OPTIONS, SORT_OPTIONS,
+                                filter_and_sort_tasks)
+
+DEFAULT_DB = "todo.db"
+PRIORITY_CHOICES = ["Low", "Medium", "High"]
+TASK_FIELDS = ["title", "description", "due_date", "priority", "completed", "category", "sub_category", "notes",
+               "recurrence", "tags"]
+
+def _print_json(value, args):
+    json.dump(value, sys.stdout, ensure_ascii=False, indent=2 if args.pretty else None)
+    sys.stdout.write("\n")
+
+def _read_stdin_ids():
+    try:
+        return [int(token) for token in sys.stdin.read().split()]
+    except ValueError as e:
+        raise SystemExit(f"todo: expected task ids on stdin: {e}")
+
+def _task_ids(args):
+    # Ids come from the arguments, or from stdin (whitespace separated) when
+    # there are none or the only one is "-", so `todo query ... --ids | todo rm` works
+    if not args.ids or args.ids == ["-"]:
+        return _read_stdin_ids()
+    try:
+        return [int(task_id) for task_id in args.ids]
+    except ValueError as e:
+        raise SystemExit(f"todo: invalid task id: {e}")
+
+def _recurrence(text, where):
+    # A recurrence rule in the stored, normalised spelling
+    try:
+        rule = parse_rule((text or "").strip())
+    except ValueError as e:
+        raise SystemExit(f"todo: {where}: {e}")
+    return rule.to_rule() if rule else ""
+
+def _due_date(text, where):
+    # "" for no due date; anything else must be a YYYY-MM-DD date
+    text = str(text or "").strip()
+    if text and date_to_day_number(text) == NO_DUE_DATE:
+        raise SystemExit(f"todo: {where}: invalid due date {text!r} (expected YYYY-MM-DD)")
+    return text
+
+def _read_stdin_tasks():
+    # One task per line: a JSON object with TASK_FIELDS keys, or a plain title
+    tasks = []
+    for line_number, line in enumerate(sys.stdin, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SystemExit(f"todo: line {line_number}: {e}")
+            task = {key: record[key] for key in TASK_FIELDS if key in record}
+        else:
+            task = {"title": line}
+        if not str(task.get("title") or "").strip():
+            raise SystemExit(f"todo: line {line_number}: missing title")
+        task["due_date"] = _due_date(task.get("due_date"), f"line {line_number}")
+        if task.get("priority", "Medium") not in PRIORITY_CHOICES + [""]:
+            raise SystemExit(f"todo: line {line_number}: invalid priority {task['priority']!r} "
+                             f"(expected one of {', '.join(PRIORITY_CHOICES)})")
+        task["priority"] = task.get("priority", "Medium")
+        task["recurrence"] = _recurrence(task.get("recurrence"), f"line {line_number}")
+        if not isinstance(task.get("tags", []), list):
+            raise SystemExit(f"todo: line {line_number}: tags must be a list")
+        task["tags"] = normalize_tags(str(tag) for tag in task.get("tags", []))
+        tasks.append(task)
+    return tasks
+
+def command_add(db_manager, args):
+    if args.title == "-":
+        tasks = _read_stdin_tasks()
+    else:
+        tasks = [{"title": args.title, "description": args.description, "due_date": _due_date(args.due, "--due"),
+                  "priority": args.priority, "category": args.category, "sub_category": args.sub_category,
+                  "notes": args.notes, "recurrence": _recurrence(args.repeat, "--repeat"),
+                  "tags": normalize_tags(args.tag)}]
+    task_ids = db_manager.add_tasks(tasks)
+    if tasks and not task_ids:
+        raise SystemExit("todo: could not add tasks (see the log for details)")
+    _print_json(task_ids, args)
+
+def _load_tasks(db_manager):
+    return [Task.from_dict(task) for task in db_manager.get_all_tasks()]
+
+def _print_tasks(db_manager, tasks, args):
+    if args.limit is not None:
+        tasks = tasks[:args.limit]
+    if args.ids_only:
+        sys.stdout.write("".join(f"{task.id}\n" for task in tasks))
+        return
+    if args.details:
+        # Descriptions and notes are only read for the tasks printed
+        details = db_manager.get_task_details([task.id for task in tasks])
+        for task in tasks:
+            task.description, task.notes = details[task.id]["description"], details[task.id]["notes"]
+    _print_json([task.to_dict() for task in tasks], args)
+
+def command_list(db_manager, args):
+    # Streams the app's default order (open tasks first, by due date, undated
+    # last), so --limit and skipping completed tasks stop reading early
+    tasks = []
+    chunk_size = min(args.limit or TASK_CHUNK_SIZE, TASK_CHUNK_SIZE)
+    for chunk in db_manager.iter_task_chunks(chunk_size):
+        for task in chunk:
+            if task["completed"] and not args.all:
+                break
+            tasks.append(Task.from_dict(task))
+        else:
+            if args.limit is None or len(tasks) < args.limit:
+                continue
+        break
+    _print_tasks(db_manager, tasks, args)
+
+def command_query(db_manager, args):
+    # Same filters and sort options as the app's toolbar
+    tasks = filter_and_sort_tasks(_load_tasks(db_manager), args.filter, args.category or ALL_CATEGORIES,
+                                  args.sub_category or ALL_SUB_CATEGORIES, args.sort, args.descending,
+                                  (args.search or "").lower(), args.tags or "")
+    _print_tasks(db_manager, tasks, args)
+
+def command_tags(db_manager, args):
+    _print_json(dict(db_manager.get_tag_counts()), args)
+
+def _report_missing(task_ids, applied):
+    missing = sorted(set(task_ids) - set(applied))
+    if missing:
+        print(f"todo: no task with id {', '.join(map(str, missing))}", file=sys.stderr)
+        return 1
+    return 0
+
+def command_done(db_manager, args):
+    task_ids = _task_ids(args)
+    applied = db_manager.set_tasks_completed(task_ids, not args.undo)
+    _print_json(applied, args)
+    return _report_missing(task_ids, applied)
+
+def command_rm(db_manager, args):
+    task_ids = _task_ids(args)
+    applied = db_manager.delete_tasks(task_ids)
+    _print_json(applied, args)
+    return _report_missing(task_ids, applied)
+
+def command_export(db_manager, args):
+    from database.import_export import export_tasks
+    try:
+        count = export_tasks(db_manager, args.path, args.format)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"todo: {e}")
+    _print_json({"path": args.path, "exported": count}, args)
+
+def command_serve(db_manager, args):
+    from api.server import DEFAULT_PORT, serve
+    serve(db_manager.db_name, args.port or DEFAULT_PORT)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="todo", description="Script the Todo2 task database without the GUI.")
+    parser.add_argument("--db", default=os.environ.get("TODO_DB", DEFAULT_DB),
+                        help=f"database file (default: $TODO_DB or {DEFAULT_DB})")
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--pretty", action="store_true", help="indent JSON output")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", parents=[output], help="add a task, or one per stdin line with '-'")
+    add.add_argument("title", help="task title, or '-' to read plain titles or JSON objects from stdin")
+    add.add_argument("--due", default="", metavar="YYYY-MM-DD")
+    add.add_argument("--priority", default="Medium", choices=PRIORITY_CHOICES)
+    add.add_argument("--category", default="Other")
+    add.add_argument("--sub-category", default="")
+    add.add_argument("--description", default="")
+    add.add_argument("--notes", default="")
+    add.add_argument("--repeat", default="", metavar="RULE",
+                     help="recurrence rule, e.g. FREQ=WEEKLY or FREQ=MONTHLY;INTERVAL=3;UNTIL=2026-12-31")
+    add.add_argument("--tag", action="append", default=[], help="tag the task; repeat for more tags")
+    add.set_defaults(handler=command_add)
+
+    for name, help_text, handler in (("list", "list open tasks in the app's default order", command_list),
+                                     ("query", "filter and sort tasks like the app's toolbar", command_query)):
+        command = commands.add_parser(name, parents=[output], help=help_text)
+        command.add_argument("--limit", type=int, metavar="N")
+        command.add_argument("--ids-only", action="store_true", help="print one id per line instead of JSON")
+        command.add_argument("--details", action="store_true",
+                             help="include descriptions and notes (otherwise null, with has_notes)")
+        command.set_defaults(handler=handler)
+        if name == "list":
+            command.add_argument("--all", action="store_true", help="include completed tasks")
+        else:
+            command.add_argument("--filter", default="All", choices=FILTER_OPTIONS)
+            command.add_argument("--category")
+            command.add_argument("--sub-category")
+            command.add_argument("--search", help="case-insensitive title substring")
+            command.add_argument("--tags", metavar="QUERY",
+                                 help="tag filter: 'a b' has both, 'a|b' either, '-a' not a")
+            command.add_argument("--sort", default="Due Date", choices=SORT_OPTIONS)
+            command.add_argument("--descending", action="store_true")
+
+    tags = commands.add_parser("tags", parents=[output], help="list tags with the number of tasks carrying each")
+    tags.set_defaults(handler=command_tags)
+
+    done = commands.add_parser("done", parents=[output], help="mark tasks completed")
+    done.add_argument("ids", nargs="*", help="task ids; read from stdin when omitted or '-'")
+    done.add_argument("--undo", action="store_true", help="mark the tasks open again")
+    done.set_defaults(handler=command_done)
+
+    rm = commands.add_parser("rm", parents=[output], help="delete tasks")
+    rm.add_argument("ids", nargs="*", help="task ids; read from stdin when omitted or '-'")
+    rm.set_defaults(handler=command_rm)
+
+    export = commands.add_parser("export", parents=[output], help="export all tasks to a .jsonl or .csv file")
+    export.add_argument("path")
+    export.add_argument("--format", choices=["jsonl", "csv"], help="default: from the file extension")
+    export.set_defaults(handler=command_export)
+
+    serve = commands.add_parser("serve", help="serve the local JSON API on 127.0.0.1 until interrupted")
+    serve.add_argument("--port", type=int, help="default: 8765")
+    serve.set_defaults(handler=command_serve)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Only problems are worth printing; the app's rotating log file is left alone
+    logging.basicConfig(level=logging.WARNING, format="todo: %(levelname)s: %(message)s")
+    db_manager = DatabaseManager(args.db)
+    return args.handler(db_manager, args) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import os
+import time
+import sqlite3
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from diagnostics.tracing import traced
+from .db_manager import DatabaseManager, open_connection
+
+# Online backups through the sqlite3 backup API. Pages are copied a few at a
+# time with a pause between steps, so the database is only locked for one short
+# step at a time and writers in the app keep going. Snapshots are timestamped
+# files in a backups/ directory next to the database and are pruned with a
+# keep-last/daily/weekly retention policy.
+
+BACKUP_DIR_NAME = "backups"
+TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S-%f"
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+# A write from another connection restarts the copy; after this many restarts
+# the rest is copied in one step instead
+MAX_BACKUP_RESTARTS = 5
+
+@dataclass
+class RetentionPolicy:
+    keep_last: int = 5
+    keep_daily: int = 7
+    keep_weekly: int = 4
+
+@dataclass
+class BackupSnapshot:
+    path: str
+    created: datetime
+    size: int
+
+    def label(self) -> str:
+        return f"{self.created:%Y-%m-%d %H:%M:%S} ({self.size / (1024 * 1024):.1f} MB)"
+
+class BackupCancelled(Exception):
+    pass
+
+class _RestartLimitReached(Exception):
+    pass
+
+def backup_dir_for(db_name: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_name)), BACKUP_DIR_NAME)
+
+def _snapshot_prefix(db_name: str) -> str:
+    return os.path.splitext(os.path.basename(db_name))[0] + "-"
+
+def list_backups(db_name: str, backup_dir: Optional[str] = None) -> List[BackupSnapshot]:
+    # Newest first
+    backup_dir = backup_dir or backup_dir_for(db_name)
+    prefix = _snapshot_prefix(db_name)
+    snapshots = []
+    try:
+        names = os.listdir(backup_dir)
+    except FileNotFoundError:
+        return []
+    for name in names:
+        if not (name.startswith(prefix) and name.endswith(".db")):
+            continue
+        try:
+            created = datetime.strptime(name[len(prefix):-len(".db")], TIMESTAMP_FORMAT)
+        except ValueError:
+            continue
+        path = os.path.join(backup_dir, name)
+        snapshots.append(BackupSnapshot(path, created, os.path.getsize(path)))
+    snapshots.sort(key=lambda snapshot: snapshot.created, reverse=True)
+    return snapshots
+
+def expired_backups(snapshots: List[BackupSnapshot], policy: RetentionPolicy) -> List[BackupSnapshot]:
+    # Keeps the newest `keep_last`, plus the newest snapshot of each of the last
+    # `keep_daily` days and `keep_weekly` ISO weeks that have one
+    snapshots = sorted(snapshots, key=lambda snapshot: snapshot.created, reverse=True)
+    keep = {snapshot.path for snapshot in snapshots[:policy.keep_last]}
+    for period, limit in ((lambda created: created.date(), policy.keep_daily),
+                          (lambda created: created.isocalendar()[:2], policy.keep_weekly)):
+        seen = set()
+        for snapshot in snapshots:
+            key = period(snapshot.created)
+            if key not in seen and len(seen) < limit:
+                seen.add(key)
+                keep.add(snapshot.path)
+    return [snapshot for snapshot in snapshots if snapshot.path not in keep]
+
+def prune_backups(db_name: str, policy: RetentionPolicy = RetentionPolicy(), backup_dir: Optional[str] = None):
+    for snapshot in expired_backups(list_backups(db_name, backup_dir), policy):
+        try:
+            os.remove(snapshot.path)
+            logging.info("Removed expired backup %s", snapshot.path)
+        except OSError as e:
+            logging.warning("Could not remove backup %s: %s", snapshot.path, e)
+
+def _copy_database(source, target, progress=None, is_cancelled=None):
+    restarts = 0
+    last_remaining = None
+
+    def on_step(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if is_cancelled and is_cancelled():
+            raise BackupCancelled()
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > MAX_BACKUP_RESTARTS:
+                raise _RestartLimitReached()
+        last_remaining = remaining
+        if progress:
+            progress(total - remaining, int((total - remaining) * 100 / total) if total else 100)
+        # Leaves the database unlocked between steps for the app's own writes
+        time.sleep(BACKUP_STEP_SLEEP)
+
+    try:
+        source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=on_step)
+    except _RestartLimitReached:
+        logging.info("Backup restarted %d times by concurrent writes; copying in one step", restarts)
+        source.backup(target)
+
+@traced("backup.create_backup")
+def create_backup(db_name: str, backup_dir: Optional[str] = None, policy: RetentionPolicy = RetentionPolicy(),
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[str]:
+    # Returns the snapshot path, or None when cancelled
+    backup_dir = backup_dir or backup_dir_for(db_name)
+    os.makedirs(backup_dir, exist_ok=True)
+    path = os.path.join(backup_dir, f"{_snapshot_prefix(db_name)}{datetime.now():{TIMESTAMP_FORMAT}}.db")
+    temp_path = path + ".part"
+    source = open_connection(db_name)
+    target = sqlite3.connect(temp_path)
+    completed = False
+    try:
+        _copy_database(source, target, progress, is_cancelled)
+        completed = True
+    except BackupCancelled:
+        logging.info("Backup cancelled")
+    finally:
+        target.close()
+        source.close()
+        if not completed:
+            os.remove(temp_path)
+    if not completed:
+        return None
+    os.replace(temp_path, path)
+    logging.info("Backed up %s to %s", db_name, path)
+    prune_backups(db_name, policy, backup_dir)
+    return path
+
+@traced("backup.restore_backup")
+def restore_backup(db_name: str, snapshot_path: str, progress: Optional[Callable[[int, int], None]] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[str]:
+    # Replaces the live database with a snapshot after backing up the current
+    # state first, so a restore can itself be undone. Returns the path of that
+    # safety backup, or None when cancelled before anything changed.
+    safety_path = create_backup(db_name, progress=progress, is_cancelled=is_cancelled)
+    if safety_path is None:
+        return None
+
+    source = sqlite3.connect(snapshot_path)
+    target = open_connection(db_name)
+    try:
+        # Not cancellable: a half-restored database is worse than waiting
+        source.backup(target, pages=BACKUP_PAGES_PER_STEP,
+                      progress=lambda status, remaining, total: progress and progress(
+                          total - remaining, int((total - remaining) * 100 / total) if total else 100))
+    finally:
+        source.close()
+        target.close()
+
+    # A manager of its own: opening it also upgrades snapshots that predate
+    # schema changes, and the caller's manager may be in use on another thread
+    DatabaseManager(db_name).advance_revision_after_restore(safety_path)
+    logging.info("Restored %s from %s (previous state saved to %s)", db_name, snapshot_path, safety_path)
+    return safety_path
@@ -1,43 +1,340 @@
+import time
+import random
 import sqlite3
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
+from models.task import (Task, Priority, date_to_day_number, day_number_to_date, priority_from_label, priority_label,
+                         today_day_number, NO_DUE_DATE)
+from models.next_up import NEXT_UP_LIMIT, select_next_up
+from models.recurrence import expand_occurrences, parse_rule
+from models.tag_index import normalize_tags, parse_tag_query
+from models.order_key import DIGITS, is_order_key, keys_between
+from diagnostics.tracing import trace_methods
+
+# due_date is a proleptic Gregorian day number (date.toordinal()), priority a
+# models.task.Priority value. Conversion to the UI's strings happens here.
+TASK_COLUMNS = "id, title, due_date, priority, completed, category, sub_category, recurrence, has_notes, order_key"
+
+TASKS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        due_date INTEGER,
+        priority INTEGER NOT NULL DEFAULT 0 CHECK (priority BETWEEN 0 AND 3),
+        completed INTEGER NOT NULL DEFAULT 0 CHECK (completed IN (0, 1)),
+        category TEXT DEFAULT "Other",
+        sub_category TEXT DEFAULT "",
+        rev INTEGER NOT NULL DEFAULT 0,
+        completed_day INTEGER,
+        recurrence TEXT NOT NULL DEFAULT "",
+        has_notes INTEGER NOT NULL DEFAULT 0,
+        deleted_at INTEGER,
+        order_key TEXT NOT NULL DEFAULT ""
+    )
+'''
+
+# Deleting a task only sets deleted_at (a Unix time) on its row, a tombstone
+# that restore_deleted_tasks() clears again; purge_deleted_tasks() removes the
+# row, its tags and its text for good later. Every read leaves tombstoned rows
+# out, and the partial indexes below leave them out too. (Full indexes stay
+# full: the planner would walk a partial one covering all live rows for a
+# plain scan, one row lookup per task.)
+LIVE_SQL = "deleted_at IS NULL"
+
+TASK_INDEXES_SQL = [
+    # Range scans on due dates ("due this week"), covering priority for ordering
+    'CREATE INDEX IF NOT EXISTS idx_tasks_due_priority ON tasks (due_date, priority)',
+    # Open tasks in priority order, then by due date, without a sort step
+    f'CREATE INDEX IF NOT EXISTS idx_tasks_open_priority_due ON tasks (priority DESC, due_date) '
+    f'WHERE completed = 0 AND {LIVE_SQL}',
+    'CREATE INDEX IF NOT EXISTS idx_tasks_completed_due ON tasks (completed, due_date)',
+    # Completed tasks old enough for the archive, oldest first
+    f'CREATE INDEX IF NOT EXISTS idx_tasks_completed_day ON tasks (completed_day) WHERE completed = 1 AND {LIVE_SQL}',
+    # The few open recurring tasks, for expanding their occurrences in a date range
+    f'CREATE INDEX IF NOT EXISTS idx_tasks_recurring_due ON tasks (due_date) '
+    f'WHERE completed = 0 AND recurrence != \'\' AND {LIVE_SQL}',
+    # The last key of the manual order, which new tasks are appended after
+    'CREATE INDEX IF NOT EXISTS idx_tasks_order_key ON tasks (order_key)',
+]
+
+# order_key places a task in the "Manual" sort (models.order_key). New tasks
+# go last, and tasks from before the column existed keep the order they were
+# added in: their key is their id as a fixed-width integer part ("d" and four
+# base-62 digits, room for 62**4 ids).
+INITIAL_ORDER_KEY_SQL = "'d' || " + " || ".join(f"substr('{DIGITS}', id / {62 ** power} % 62 + 1, 1)"
+                                                 for power in (3, 2, 1, 0))
+LAST_ORDER_KEY_SQL = "SELECT MAX(order_key) FROM tasks"
+
+TASK_CHUNK_SIZE = 250
+UPDATABLE_TASK_FIELDS = ("title", "description", "due_date", "priority", "completed", "category", "sub_category", "notes",
+                         "recurrence", "tags")
+
+# A database-wide revision bumped by every task write. Each task row carries the
+# revision of its last change and deletions are logged, so a reader holding an
+# older revision can fetch just the difference (get_changes_since).
+TASK_REVISION_COLUMNS = "title, due_date, priority, completed, category, sub_category, recurrence, order_key"
+NEXT_REVISION_SQL = "UPDATE db_revision SET value = value + 1 WHERE id = 1;"
+CURRENT_REVISION_SQL = "(SELECT value FROM db_revision WHERE id = 1)"
+
+REVISION_SQL = [
+    'CREATE TABLE IF NOT EXISTS db_revision (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO db_revision (id, value) VALUES (1, 0)',
+    'CREATE TABLE IF NOT EXISTS task_deletions (id INTEGER PRIMARY KEY, rev INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS idx_tasks_rev ON tasks (rev)',
+    'CREATE INDEX IF NOT EXISTS idx_task_deletions_rev ON task_deletions (rev)',
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_revision_insert AFTER INSERT ON tasks BEGIN
+        {NEXT_REVISION_SQL}
+        UPDATE tasks SET rev = {CURRENT_REVISION_SQL} WHERE id = NEW.id;
+        DELETE FROM task_deletions WHERE id = NEW.id;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_revision_update AFTER UPDATE OF {TASK_REVISION_COLUMNS} ON tasks BEGIN
+        {NEXT_REVISION_SQL}
+        UPDATE tasks SET rev = {CURRENT_REVISION_SQL} WHERE id = NEW.id;
+    END''',
+    # Purging a tombstoned task was logged when it was deleted
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_revision_delete AFTER DELETE ON tasks WHEN OLD.{LIVE_SQL} BEGIN
+        {NEXT_REVISION_SQL}
+        INSERT OR REPLACE INTO task_deletions (id, rev) VALUES (OLD.id, {CURRENT_REVISION_SQL});
+    END''',
+]
+
+# To other readers a tombstone is a deletion and clearing it an insert. The
+# tombstones themselves are only ever looked up by age, for purging.
+TOMBSTONE_SQL = [
+    'CREATE INDEX IF NOT EXISTS idx_tasks_deleted ON tasks (deleted_at) WHERE deleted_at IS NOT NULL',
+    'CREATE INDEX IF NOT EXISTS idx_archived_tasks_deleted ON archived_tasks (deleted_at) WHERE deleted_at IS NOT NULL',
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_revision_tombstone AFTER UPDATE OF deleted_at ON tasks
+        WHEN (NEW.deleted_at IS NULL) != (OLD.deleted_at IS NULL) BEGIN
+        {NEXT_REVISION_SQL}
+        UPDATE tasks SET rev = {CURRENT_REVISION_SQL} WHERE id = NEW.id;
+        INSERT OR REPLACE INTO task_deletions (id, rev)
+            SELECT NEW.id, {CURRENT_REVISION_SQL} WHERE NEW.deleted_at IS NOT NULL;
+        DELETE FROM task_deletions WHERE id = NEW.id AND NEW.{LIVE_SQL};
+    END''',
+]
+
+# Completed tasks move to archived_tasks, a table of the same shape, once they
+# were completed long enough ago (archive_completed_tasks), so loading,
+# filtering and rendering only ever see recent history. completed_day is the
+# day number a task was last marked completed, kept by triggers so that every
+# writer (the window, the CLI, the API) records it.
+ARCHIVE_COLUMNS = TASK_COLUMNS + ", completed_day"
+TODAY_SQL = "CAST(julianday('now', 'localtime') - 1721424.5 AS INTEGER)"
+
+COMPLETION_SQL = [
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_completed_day_insert AFTER INSERT ON tasks
+        WHEN NEW.completed = 1 AND NEW.completed_day IS NULL BEGIN
+        UPDATE tasks SET completed_day = {TODAY_SQL} WHERE id = NEW.id;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_completed_day_update AFTER UPDATE OF completed ON tasks
+        WHEN NEW.completed != OLD.completed BEGIN
+        UPDATE tasks SET completed_day = CASE WHEN NEW.completed = 1 THEN {TODAY_SQL} END WHERE id = NEW.id;
+    END''',
+]
+
+# A task's tags are rows of task_tags, which outlive archiving since task ids
+# are never reused; tags no task uses any more are dropped. Tag names compare
+# case-insensitively, like models.tag_index does.
+TAGS_SQL = [
+    'CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE COLLATE NOCASE)',
+    '''CREATE TABLE IF NOT EXISTS task_tags (
+        task_id INTEGER NOT NULL,
+        tag_id INTEGER NOT NULL,
+        PRIMARY KEY (task_id, tag_id)
+    ) WITHOUT ROWID''',
+    # The tasks carrying a tag, for archive queries filtering by tag
+    'CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags (tag_id, task_id)',
+]
+# Ids per tag lookup, well under SQLite's limit on bound parameters
+TAG_LOOKUP_CHUNK_SIZE = 500
+INSERT_TAG_SQL = 'INSERT OR IGNORE INTO tags (name) VALUES (?)'
+LINK_TAG_SQL = 'INSERT INTO task_tags (task_id, tag_id) SELECT ?, id FROM tags WHERE name = ?'
+
+# A description or notes can run to many kilobytes, so they live in
+# task_details, with a row only for tasks that have some text, and list reads
+# never touch them; tasks.has_notes, kept by triggers, is all the list needs.
+# Like task_tags, the rows outlive archiving. A change bumps the task's
+# revision, and the row's own rev says when its text last changed, so
+# get_changes_since() only hands out the text that moved.
+DETAIL_FIELDS = ("description", "notes")
+DETAILS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS task_details (
+        task_id INTEGER PRIMARY KEY,
+        description TEXT NOT NULL DEFAULT '',
+        notes TEXT NOT NULL DEFAULT '',
+        rev INTEGER NOT NULL DEFAULT 0
+    )
+'''
+_DETAILS_CHANGED_SQL = f'''
+        {NEXT_REVISION_SQL}
+        UPDATE task_details SET rev = {CURRENT_REVISION_SQL} WHERE task_id = NEW.task_id;
+        UPDATE tasks SET has_notes = NEW.notes != '', rev = {CURRENT_REVISION_SQL} WHERE id = NEW.task_id;
+        UPDATE archived_tasks SET has_notes = NEW.notes != '' WHERE id = NEW.task_id;
+'''
+DETAILS_SQL = [
+    'CREATE INDEX IF NOT EXISTS idx_task_details_rev ON task_details (rev)',
+    f'''CREATE TRIGGER IF NOT EXISTS task_details_insert AFTER INSERT ON task_details BEGIN
+        {_DETAILS_CHANGED_SQL}
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS task_details_update AFTER UPDATE OF description, notes ON task_details
+        WHEN NEW.description != OLD.description OR NEW.notes != OLD.notes BEGIN
+        {_DETAILS_CHANGED_SQL}
+    END''',
+]
+# Notes longer than this are read in pieces (get_notes_chunk)
+NOTES_CHUNK_CHARS = 16384
+
+# Without AUTOINCREMENT SQLite hands out the largest live id plus one, which may
+# belong to an archived task; new tasks take ids past both tables instead
+NEW_TASK_ID_SQL = '''(SELECT MAX(id) + 1 FROM (SELECT MAX(id) AS id FROM tasks UNION ALL
+                                          SELECT MAX(id) FROM archived_tasks))'''
+
+# Other windows, the CLI or the API server may hold the write lock. SQLite waits
+# this long for it before giving up, and statements that still find the
+# database busy are retried a few times with exponential backoff. A busy
+# statement fails before it changes anything, so retrying it is safe.
+BUSY_TIMEOUT_SECONDS = 2.0
+BUSY_RETRIES = 3
+BUSY_RETRY_DELAY = 0.05
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+def _retry_when_busy(execute, *args):
+    for attempt in range(BUSY_RETRIES + 1):
+        try:
+            return execute(*args)
+        except sqlite3.OperationalError as e:
+            if attempt == BUSY_RETRIES or not _is_busy(e):
+                raise
+            delay = BUSY_RETRY_DELAY * 2 ** attempt * random.uniform(1.0, 1.5)
+            logging.warning("Database busy, retrying in %.0f ms: %s", delay * 1000, e)
+            time.sleep(delay)
+
+class RetryingCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        return _retry_when_busy(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return _retry_when_busy(super().executemany, sql, seq_of_parameters)
+
+class RetryingConnection(sqlite3.Connection):
+    def cursor(self, factory=RetryingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def open_connection(db_name: str, **kwargs) -> sqlite3.Connection:
+    # Every connection to the task database goes through here
+    return sqlite3.connect(db_name, timeout=BUSY_TIMEOUT_SECONDS, factory=RetryingConnection, **kwargs)
+
+def order_keys_after_last(db, count: int) -> List[str]:
+    # Keys that append `count` tasks to the manual order, read through `db` (a
+    # connection or cursor). Called first thing in a write transaction (BEGIN
+    # IMMEDIATE), so that writers appending at the same time queue up rather
+    # than share keys.
+    last = db.execute(LAST_ORDER_KEY_SQL).fetchone()[0]
+    return keys_between(last if last and is_order_key(last) else None, None, count)
+
+def read_task_details(db, task_ids: List[int], notes_limit: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+    # {id: {'description', 'notes', 'notes_length'}} read through `db` (a
+    # connection or cursor), a chunk of ids per query. Tasks without any text
+    # get empty strings; with notes_limit, only that much of the notes is read.
+    details = {task_id: {'description': "", 'notes': "", 'notes_length': 0} for task_id in task_ids}
+    notes_sql = "notes" if notes_limit is None else "substr(notes, 1, ?)"
+    for start in range(0, len(task_ids), TAG_LOOKUP_CHUNK_SIZE):
+        chunk = task_ids[start:start + TAG_LOOKUP_CHUNK_SIZE]
+        rows = db.execute(f'''
+            SELECT task_id, description, {notes_sql}, length(notes) FROM task_details
+            WHERE task_id IN ({", ".join("?" * len(chunk))})
+        ''', ([] if notes_limit is None else [notes_limit]) + chunk).fetchall()
+        for task_id, description, notes, notes_length in rows:
+            details[task_id] = {'description': description, 'notes': notes, 'notes_length': notes_length}
+    return details
+
+@trace_methods("db")
 class DatabaseManager:
-    def __init__(self, db_name: str = "todo.db"):
+    def __init__(self, db_name: str = "todo.db", persistent: bool = False):
+        # A persistent manager keeps one connection open across calls instead of
+        # reconnecting every time; it may move between threads but must only be
+        # used by one at a time (see api.server's pools), and is closed by close()
         self.db_name = db_name
+        self.persistent = persistent
         self.conn = None
         self.cursor = None
+        self.enable_wal()
         self.create_tables()
         self.update_schema()
 
     def connect(self):
+        if self.persistent and self.conn is not None:
+            self.cursor = self.conn.cursor()
+            return
         try:
-            self.conn = sqlite3.connect(self.db_name)
+            self.conn = open_connection(self.db_name, check_same_thread=not self.persistent)
             self.cursor = self.conn.cursor()
         except sqlite3.Error as e:
             logging.error(f"Error connecting to database: {e}")
             raise
 
     def disconnect(self):
-        if self.conn:   
+        if self.conn and not self.persistent:
             self.conn.close()
 
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def enable_wal(self):
+        # Write-ahead logging lets readers carry on while another connection
+        # writes. The mode is stored in the database file, so this only does
+        # work the first time. A new file also gets incremental auto-vacuum
+        # (see database.maintenance), which only takes effect before the first
+        # table is created.
+        self.connect()
+        try:
+            self.cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self.cursor.execute("PRAGMA journal_mode=WAL")
+            mode = self.cursor.fetchone()[0]
+            if mode.lower() != "wal":
+                logging.warning("Database journal mode is %s, not WAL", mode)
+        except sqlite3.Error as e:
+            logging.error(f"Error enabling WAL: {e}")
+        finally:
+            self.disconnect()
+
+    def get_data_version(self) -> int:
+        # Changes whenever another connection commits. Only meaningful on a
+        # persistent manager, whose one connection sees every later commit.
+        self.connect()
+        try:
+            self.cursor.execute("PRAGMA data_version")
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logging.error(f"Error getting data version: {e}")
+            return 0
+        finally:
+            self.disconnect()
+
     def create_tables(self):
         self.connect()
         try:
+            self.cursor.execute(TASKS_TABLE_SQL.format(name="tasks"))
+            self.cursor.execute(TASKS_TABLE_SQL.format(name="archived_tasks"))
             self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    due_date TEXT,
-                    priority TEXT,
-                    completed INTEGER DEFAULT 0,
-                    category TEXT DEFAULT "Other",
-                    sub_category TEXT DEFAULT "",
-                    notes TEXT DEFAULT ""
-                )
+                CREATE INDEX IF NOT EXISTS idx_archived_tasks_completed_day
+                ON archived_tasks (completed_day DESC, id DESC)
             ''')
+            for statement in TAGS_SQL:
+                self.cursor.execute(statement)
+            self.cursor.execute(DETAILS_TABLE_SQL)
             self.cursor.execute('''
                 CREATE TABLE IF NOT EXISTS categories (
                     id INTEGER PRIMARY KEY,
@@ -56,6 +353,19 @@ class DatabaseManager:
                     value TEXT
                 )
             ''')
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS views (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE NOT NULL,
+                    filter_option TEXT NOT NULL DEFAULT "All",
+                    category TEXT NOT NULL DEFAULT "All Categories",
+                    sub_category TEXT NOT NULL DEFAULT "All Sub-Categories",
+                    sort_option TEXT NOT NULL DEFAULT "Due Date",
+                    descending INTEGER NOT NULL DEFAULT 0,
+                    search_text TEXT NOT NULL DEFAULT "",
+                    tag_query TEXT NOT NULL DEFAULT ""
+                )
+            ''')
             self.conn.commit()
         except sqlite3.Error as e:
             logging.error(f"Error creating tables: {e}")
@@ -67,29 +377,219 @@ class DatabaseManager:
         self.connect()
         try:
             self.cursor.execute("PRAGMA table_info(tasks)")
-            columns = [column[1] for column in self.cursor.fetchall()]
+            column_types = {column[1]: column[2].upper() for column in self.cursor.fetchall()}
+            columns = list(column_types)
             if "sub_category" not in columns:
                 self.cursor.execute("ALTER TABLE tasks ADD COLUMN sub_category TEXT DEFAULT ''")
                 self.conn.commit()
                 print("Added sub_category column to tasks table")
-            if "notes" not in columns:
+            if "description" in columns and "notes" not in columns:
                 self.cursor.execute("ALTER TABLE tasks ADD COLUMN notes TEXT DEFAULT ''")
                 self.conn.commit()
                 print("Added notes column to tasks table")
+            self.move_details_out("tasks")
+            if column_types.get("due_date") != "INTEGER":
+                self.migrate_to_typed_columns()
+            else:
+                if "rev" not in columns:
+                    self.cursor.execute("ALTER TABLE tasks ADD COLUMN rev INTEGER NOT NULL DEFAULT 0")
+                if "completed_day" not in columns:
+                    self.cursor.execute("ALTER TABLE tasks ADD COLUMN completed_day INTEGER")
+                if "recurrence" not in columns:
+                    self.cursor.execute("ALTER TABLE tasks ADD COLUMN recurrence TEXT NOT NULL DEFAULT ''")
+                    # Recreated below, so that a rule change bumps the revision too
+                    self.cursor.execute("DROP TRIGGER IF EXISTS tasks_revision_update")
+                if "deleted_at" not in columns:
+                    self.cursor.execute("ALTER TABLE tasks ADD COLUMN deleted_at INTEGER")
+                    # Recreated below as partial indexes, and a trigger that
+                    # leaves purged tombstones alone
+                    self.cursor.execute('''
+                        SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks' AND sql IS NOT NULL
+                    ''')
+                    for (name,) in self.cursor.fetchall():
+                        self.cursor.execute(f"DROP INDEX {name}")
+                    self.cursor.execute("DROP TRIGGER IF EXISTS tasks_revision_delete")
+                if "order_key" not in columns:
+                    self.cursor.execute("ALTER TABLE tasks ADD COLUMN order_key TEXT NOT NULL DEFAULT ''")
+                    # Recreated below, so that a move bumps the revision too
+                    self.cursor.execute("DROP TRIGGER IF EXISTS tasks_revision_update")
+            self.cursor.execute("PRAGMA table_info(archived_tasks)")
+            archived_columns = [column[1] for column in self.cursor.fetchall()]
+            if "recurrence" not in archived_columns:
+                self.cursor.execute("ALTER TABLE archived_tasks ADD COLUMN recurrence TEXT NOT NULL DEFAULT ''")
+            if "deleted_at" not in archived_columns:
+                self.cursor.execute("ALTER TABLE archived_tasks ADD COLUMN deleted_at INTEGER")
+            if "order_key" not in archived_columns:
+                self.cursor.execute("ALTER TABLE archived_tasks ADD COLUMN order_key TEXT NOT NULL DEFAULT ''")
+            self.move_details_out("archived_tasks")
+            self.cursor.execute("PRAGMA table_info(views)")
+            if "tag_query" not in [column[1] for column in self.cursor.fetchall()]:
+                self.cursor.execute("ALTER TABLE views ADD COLUMN tag_query TEXT NOT NULL DEFAULT ''")
+            if "completed_day" not in columns:
+                # Completion days were not recorded before: the due date stands in,
+                # or today for undated tasks and tasks due in the future
+                self.cursor.execute(f'''
+                    UPDATE tasks SET completed_day = MIN(COALESCE(due_date, {TODAY_SQL}), {TODAY_SQL})
+                    WHERE completed = 1
+                ''')
+            if "order_key" not in columns:
+                self.cursor.execute(f"UPDATE tasks SET order_key = {INITIAL_ORDER_KEY_SQL}")
+            if "order_key" not in archived_columns:
+                self.cursor.execute(f"UPDATE archived_tasks SET order_key = {INITIAL_ORDER_KEY_SQL}")
+            for statement in TASK_INDEXES_SQL + REVISION_SQL + COMPLETION_SQL + DETAILS_SQL + TOMBSTONE_SQL:
+                self.cursor.execute(statement)
+            self.conn.commit()
         except sqlite3.Error as e:
             logging.error(f"Error updating schema: {e}")
             self.conn.rollback()
         finally:
             self.disconnect()
 
-    def add_task(self, title: str, description: str = "", due_date: str = "", priority: str = "Med", category: str = "Other", sub_category: str = "", notes: str = "") -> int:
+    def move_details_out(self, table: str):
+        # Databases from before task_details kept description and notes inline.
+        # Copies them over and drops the columns; the revision trigger naming
+        # them goes too and is recreated by update_schema. One transaction.
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        columns = [column[1] for column in self.cursor.fetchall()]
+        if "description" not in columns:
+            return
+        logging.info("Moving %s descriptions and notes to task_details", table)
+        self.cursor.execute("BEGIN")
+        self.cursor.execute(f'''
+            INSERT OR REPLACE INTO task_details (task_id, description, notes)
+            SELECT id, COALESCE(description, ''), COALESCE(notes, '') FROM {table}
+            WHERE COALESCE(description, '') != '' OR COALESCE(notes, '') != ''
+        ''')
+        if "has_notes" not in columns:
+            self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN has_notes INTEGER NOT NULL DEFAULT 0")
+        self.cursor.execute(f"UPDATE {table} SET has_notes = COALESCE(notes, '') != ''")
+        if table == "tasks":
+            self.cursor.execute("DROP TRIGGER IF EXISTS tasks_revision_update")
+        for column in DETAIL_FIELDS:
+            self.cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+        self.conn.commit()
+
+    def migrate_to_typed_columns(self):
+        # SQLite cannot change column types in place, so copy into a typed table.
+        # Runs inside update_schema's connection as one transaction.
+        logging.info("Migrating tasks table to typed due_date/priority/completed columns")
+        self.cursor.execute("BEGIN")
+        self.cursor.execute(TASKS_TABLE_SQL.format(name="tasks_typed"))
+        self.cursor.execute('''
+            INSERT INTO tasks_typed (id, title, due_date, priority, completed, category, sub_category, has_notes)
+            SELECT id, title,
+                   CASE WHEN date(due_date) IS NOT NULL
+                        THEN CAST(julianday(due_date) - 1721424.5 AS INTEGER) END,
+                   CASE lower(trim(COALESCE(priority, '')))
+                        WHEN 'low' THEN 1 WHEN 'med' THEN 2 WHEN 'medium' THEN 2 WHEN 'high' THEN 3
+                        ELSE 0 END,
+                   CASE WHEN completed THEN 1 ELSE 0 END,
+                   category, sub_category, has_notes
+            FROM tasks
+        ''')
+        self.cursor.execute("DROP TABLE tasks")
+        self.cursor.execute("ALTER TABLE tasks_typed RENAME TO tasks")
+        self.conn.commit()
+
+    @staticmethod
+    def _task_from_row(task) -> Dict[str, Any]:
+        return {
+            'id': task[0],
+            'title': task[1],
+            'description': None,  # not loaded, see get_task_details()
+            'due_date': day_number_to_date(task[2]),
+            'priority': priority_label(task[3]),
+            'completed': bool(task[4]),
+            'category': task[5],
+            'sub_category': task[6],
+            'notes': None,
+            'recurrence': task[7] or "",
+            'has_notes': bool(task[8]),
+            'tags': [],
+            'order_key': task[9]
+        }
+
+    @staticmethod
+    def _attach_tags(db, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Fills in the tags of task dicts, reading through `db` (a connection
+        # or cursor), a chunk of ids per query
+        by_id = {task['id']: task for task in tasks}
+        ids = list(by_id)
+        if not ids or db.execute('SELECT 1 FROM task_tags LIMIT 1').fetchone() is None:
+            return tasks
+        for start in range(0, len(ids), TAG_LOOKUP_CHUNK_SIZE):
+            chunk = ids[start:start + TAG_LOOKUP_CHUNK_SIZE]
+            rows = db.execute(f'''
+                SELECT task_id, name FROM task_tags JOIN tags ON tags.id = task_tags.tag_id
+                WHERE task_id IN ({", ".join("?" * len(chunk))}) ORDER BY name COLLATE NOCASE
+            ''', chunk).fetchall()
+            for task_id, name in rows:
+                by_id[task_id]['tags'].append(name)
+        return tasks
+
+    @classmethod
+    def _tasks_from_rows(cls, db, rows) -> List[Dict[str, Any]]:
+        return cls._attach_tags(db, [cls._task_from_row(row) for row in rows])
+
+    @staticmethod
+    def _attach_details(db, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        details = read_task_details(db, [task['id'] for task in tasks])
+        for task in tasks:
+            task['description'] = details[task['id']]['description']
+            task['notes'] = details[task['id']]['notes']
+        return tasks
+
+    def _set_task_tags(self, task_id: int, tags: List[str]):
+        # Within the caller's transaction. A change bumps the task's revision,
+        # so other readers pick it up like any other edit.
+        tags = normalize_tags(tags)
+        self.cursor.execute('''
+            SELECT name FROM task_tags JOIN tags ON tags.id = task_tags.tag_id WHERE task_id = ?
+        ''', (task_id,))
+        if {name.lower() for (name,) in self.cursor.fetchall()} == {tag.lower() for tag in tags}:
+            return
+        self.cursor.execute('DELETE FROM task_tags WHERE task_id = ?', (task_id,))
+        for tag in tags:
+            self.cursor.execute(INSERT_TAG_SQL, (tag,))
+            self.cursor.execute(LINK_TAG_SQL, (task_id, tag))
+        self._drop_unused_tags()
+        self.cursor.execute(NEXT_REVISION_SQL)
+        self.cursor.execute(f'UPDATE tasks SET rev = {CURRENT_REVISION_SQL} WHERE id = ?', (task_id,))
+
+    def _drop_unused_tags(self):
+        self.cursor.execute('DELETE FROM tags WHERE id NOT IN (SELECT tag_id FROM task_tags)')
+
+    def _set_task_details(self, task_id: int, description: Optional[str] = None, notes: Optional[str] = None):
+        # Within the caller's transaction; None leaves a field as it is. The
+        # triggers keep has_notes and the revisions up to date.
+        if description is None and notes is None:
+            return
+        self.cursor.execute('''
+            UPDATE task_details SET description = COALESCE(?, description), notes = COALESCE(?, notes)
+            WHERE task_id = ?
+        ''', (description, notes, task_id))
+        if not self.cursor.rowcount and (description or notes):
+            self.cursor.execute('INSERT INTO task_details (task_id, description, notes) VALUES (?, ?, ?)',
+                                (task_id, description or "", notes or ""))
+
+    @staticmethod
+    def _day_or_null(due_date) -> Optional[int]:
+        day_number = date_to_day_number(due_date)
+        return None if day_number == NO_DUE_DATE else day_number
+
+    def add_task(self, title: str, description: str = "", due_date: str = "", priority: str = "Medium", category: str = "Other", sub_category: str = "", notes: str = "", tags: Optional[List[str]] = None) -> int:
         self.connect()
         try:
-            self.cursor.execute('''
-                INSERT INTO tasks (title, description, due_date, priority, category, sub_category, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (title, description, due_date, priority, category, sub_category, notes))
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self.cursor.execute(f'''
+                INSERT INTO tasks (id, title, due_date, priority, category, sub_category, order_key)
+                VALUES ({NEW_TASK_ID_SQL}, ?, ?, ?, ?, ?, ?)
+            ''', (title, self._day_or_null(due_date), int(priority_from_label(priority)), category, sub_category,
+                  order_keys_after_last(self.cursor, 1)[0]))
             task_id = self.cursor.lastrowid
+            self._set_task_details(task_id, description, notes)
+            if tags:
+                self._set_task_tags(task_id, tags)
             self.conn.commit()
             return task_id
         except sqlite3.Error as e:
@@ -100,22 +600,16 @@ class DatabaseManager:
             self.disconnect()
 
     def get_task(self, task_id: int) -> Optional[Dict[str, Any]]:
+        # The one read that includes description and notes
         self.connect()
         try:
-            self.cursor.execute('SELECT * FROM tasks WHERE id = ?', (task_id,))
+            self.cursor.execute(f'SELECT {TASK_COLUMNS} FROM tasks WHERE id = ? AND {LIVE_SQL}', (task_id,))
             task = self.cursor.fetchone()
+            if task is None:
+                self.cursor.execute(f'SELECT {TASK_COLUMNS} FROM archived_tasks WHERE id = ? AND {LIVE_SQL}', (task_id,))
+                task = self.cursor.fetchone()
             if task:
-                return {
-                    'id': task[0],
-                    'title': task[1],
-                    'description': task[2],
-                    'due_date': task[3],
-                    'priority': task[4],
-                    'completed': bool(task[5]),
-                    'category': task[6],
-                    'sub_category': task[7],
-                    'notes': task[8]
-                }
+                return self._attach_details(self.cursor, self._tasks_from_rows(self.cursor, [task]))[0]
             return None
         except sqlite3.Error as e:
             logging.error(f"Error getting task: {e}")
@@ -123,54 +617,622 @@ class DatabaseManager:
         finally:
             self.disconnect()
 
-    def update_task(self, task_id: int, title: str, completed: bool, due_date: str, priority: str, category: str, sub_category: str, description: str = "", notes: str = ""):
+    def get_tasks(self, task_ids: List[int]) -> List[Dict[str, Any]]:
+        # The live (not archived or deleted) tasks among `task_ids`, without
+        # their text, in id order
         self.connect()
         try:
-            self.cursor.execute('''
-                UPDATE tasks
-                SET title = ?, description = ?, due_date = ?, priority = ?, completed = ?, category = ?, sub_category = ?, notes = ?
-                WHERE id = ?
-            ''', (title, description, due_date, priority, int(completed), category, sub_category, notes, task_id))
+            rows = []
+            for start in range(0, len(task_ids), TAG_LOOKUP_CHUNK_SIZE):
+                chunk = list(task_ids[start:start + TAG_LOOKUP_CHUNK_SIZE])
+                self.cursor.execute(f'''
+                    SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({", ".join("?" * len(chunk))}) AND {LIVE_SQL}
+                ''', chunk)
+                rows.extend(self.cursor.fetchall())
+            return self._tasks_from_rows(self.cursor, sorted(rows))
+        except sqlite3.Error as e:
+            logging.error(f"Error getting tasks: {e}")
+            return []
+        finally:
+            self.disconnect()
+
+    def get_task_details(self, task_ids: List[int], notes_limit: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+        # See read_task_details(); get_notes_chunk() reads the rest of notes cut
+        # short by notes_limit
+        self.connect()
+        try:
+            return read_task_details(self.cursor, list(task_ids), notes_limit)
+        except sqlite3.Error as e:
+            logging.error(f"Error getting task details: {e}")
+            return {}
+        finally:
+            self.disconnect()
+
+    def get_notes_chunk(self, task_id: int, start: int, length: int = NOTES_CHUNK_CHARS) -> str:
+        # `length` characters of a task's notes from character `start` on
+        self.connect()
+        try:
+            self.cursor.execute('SELECT substr(notes, ?, ?) FROM task_details WHERE task_id = ?',
+                                (start + 1, length, task_id))
+            row = self.cursor.fetchone()
+            return row[0] if row else ""
+        except sqlite3.Error as e:
+            logging.error(f"Error getting notes of task {task_id}: {e}")
+            return ""
+        finally:
+            self.disconnect()
+
+    def update_task(self, task_id: int, title: str, completed: bool, due_date: str, priority: str, category: str, sub_category: str, description: Optional[str] = None, notes: Optional[str] = None, recurrence: str = "", tags: Optional[List[str]] = None) -> Optional[int]:
+        # Returns the id of the task created for the next occurrence when this
+        # completes a recurring task, otherwise None. The description, notes
+        # and tags are left alone when None (not loaded).
+        sql = f'''
+            UPDATE tasks
+            SET title = ?, due_date = ?, priority = ?, completed = ?, category = ?, sub_category = ?, recurrence = ?
+            WHERE id = ? AND {LIVE_SQL}
+        '''
+        params = (title, self._day_or_null(due_date), int(priority_from_label(priority)), int(completed),
+                  category, sub_category, recurrence, task_id)
+        self.connect()
+        try:
+            self.cursor.execute(sql, params)
+            if not self.cursor.rowcount and self._restore_archived(task_id):
+                self.cursor.execute(sql, params)
+            if self.cursor.rowcount:
+                self._set_task_details(task_id, description, notes)
+                if tags is not None:
+                    self._set_task_tags(task_id, tags)
+            next_id = self._start_next_occurrence(task_id) if completed and recurrence else None
             self.conn.commit()
+            return next_id
         except sqlite3.Error as e:
             logging.error(f"Error updating task: {e}")
             self.conn.rollback()
+            return None
         finally:
             self.disconnect()
 
     def delete_task(self, task_id: int):
+        self.delete_tasks([task_id])
+
+    def add_tasks(self, tasks: List[Dict[str, Any]]) -> List[int]:
+        # Batch add_task in one transaction; task categories and sub-categories
+        # are registered too. Returns the new ids in order, or [] on error.
+        self.connect()
+        try:
+            task_ids = []
+            self.cursor.execute("BEGIN IMMEDIATE")
+            order_keys = order_keys_after_last(self.cursor, len(tasks))
+            for task, order_key in zip(tasks, order_keys):
+                category = task.get("category") or "Other"
+                sub_category = task.get("sub_category") or ""
+                self.cursor.execute(f'''
+                    INSERT INTO tasks (id, title, due_date, priority, completed, category, sub_category, recurrence,
+                                       order_key)
+                    VALUES ({NEW_TASK_ID_SQL}, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (task["title"], self._day_or_null(task.get("due_date")),
+                      int(priority_from_label(task.get("priority", "Medium"))), int(bool(task.get("completed"))),
+                      category, sub_category, task.get("recurrence") or "", order_key))
+                task_ids.append(self.cursor.lastrowid)
+                self._set_task_details(task_ids[-1], task.get("description"), task.get("notes"))
+                if task.get("tags"):
+                    self._set_task_tags(task_ids[-1], task["tags"])
+                self.cursor.execute('INSERT OR IGNORE INTO categories (name) VALUES (?)', (category,))
+                if sub_category:
+                    self.cursor.execute('INSERT OR IGNORE INTO sub_categories (name) VALUES (?)', (sub_category,))
+            self.conn.commit()
+            return task_ids
+        except sqlite3.Error as e:
+            logging.error(f"Error adding tasks: {e}")
+            self.conn.rollback()
+            return []
+        finally:
+            self.disconnect()
+
+    def set_tasks_completed(self, task_ids: List[int], completed: bool = True) -> List[int]:
+        # One transaction for the batch; returns the ids that exist
+        return self._apply_to_tasks(f'UPDATE tasks SET completed = ? WHERE id = ? AND {LIVE_SQL}',
+                                    [(int(completed), task_id) for task_id in task_ids], "completing",
+                                    on_applied=self._start_next_occurrence if completed else None)
+
+    def set_order_keys(self, order_keys: Dict[int, str]) -> List[int]:
+        # {id: order key} in one transaction, a row per task: a move in the
+        # manual order writes just the moved task. Returns the ids that exist.
+        return self._apply_to_tasks(f'UPDATE tasks SET order_key = ? WHERE id = ? AND {LIVE_SQL}',
+                                    [(order_key, task_id) for task_id, order_key in order_keys.items()], "reordering")
+
+    def update_tasks(self, changes: List[Dict[str, Any]]) -> List[int]:
+        # Partial updates in one transaction: each dict holds an "id" plus the
+        # fields to change. Returns the ids that exist.
+        self.connect()
+        try:
+            applied = []
+            for change in changes:
+                values = {key: change[key] for key in UPDATABLE_TASK_FIELDS if key in change}
+                tags = values.pop("tags", None)
+                details = {key: values.pop(key) for key in DETAIL_FIELDS if key in values}
+                if "due_date" in values:
+                    values["due_date"] = self._day_or_null(values["due_date"])
+                if "priority" in values:
+                    values["priority"] = int(priority_from_label(values["priority"]))
+                if "completed" in values:
+                    values["completed"] = int(bool(values["completed"]))
+                if values:
+                    assignments = ", ".join(f"{key} = ?" for key in values)
+                    sql = f'UPDATE tasks SET {assignments} WHERE id = ? AND {LIVE_SQL}'
+                    params = (*values.values(), change["id"])
+                    self.cursor.execute(sql, params)
+                    if not self.cursor.rowcount and self._restore_archived(change["id"]):
+                        self.cursor.execute(sql, params)
+                    exists = self.cursor.rowcount > 0
+                    if exists and values.get("completed"):
+                        self._start_next_occurrence(change["id"])
+                else:
+                    self.cursor.execute(f'''
+                        SELECT 1 FROM tasks WHERE id = ? AND {LIVE_SQL} UNION ALL
+                        SELECT 1 FROM archived_tasks WHERE id = ? AND {LIVE_SQL}
+                    ''', (change["id"], change["id"]))
+                    exists = self.cursor.fetchone() is not None
+                if exists and (tags is not None or details):
+                    if not values:
+                        self._restore_archived(change["id"])  # like any other write
+                    self._set_task_details(change["id"], details.get("description"), details.get("notes"))
+                    if tags is not None:
+                        self._set_task_tags(change["id"], tags)
+                if exists:
+                    applied.append(change["id"])
+            self.conn.commit()
+            return applied
+        except sqlite3.Error as e:
+            logging.error(f"Error updating tasks: {e}")
+            self.conn.rollback()
+            return []
+        finally:
+            self.disconnect()
+
+    def delete_tasks(self, task_ids: List[int]) -> List[int]:
+        # Tombstones live and archived tasks, a batched UPDATE per chunk of ids
+        # in one transaction; returns the ids that were deleted
+        return self._set_tombstones(task_ids, int(time.time()), "deleting")
+
+    def restore_deleted_tasks(self, task_ids: List[int]) -> List[int]:
+        # Undoes delete_tasks() for the tasks not purged yet; returns their ids
+        return self._set_tombstones(task_ids, None, "restoring")
+
+    def _set_tombstones(self, task_ids: List[int], deleted_at: Optional[int], action: str) -> List[int]:
+        state = LIVE_SQL if deleted_at is not None else "deleted_at IS NOT NULL"
+        self.connect()
+        try:
+            changed = set()
+            for start in range(0, len(task_ids), TAG_LOOKUP_CHUNK_SIZE):
+                chunk = list(task_ids[start:start + TAG_LOOKUP_CHUNK_SIZE])
+                placeholders = ", ".join("?" * len(chunk))
+                for table in ("tasks", "archived_tasks"):
+                    self.cursor.execute(f'''
+                        UPDATE {table} SET deleted_at = ? WHERE id IN ({placeholders}) AND {state} RETURNING id
+                    ''', (deleted_at, *chunk))
+                    changed.update(row[0] for row in self.cursor.fetchall())
+            self.conn.commit()
+            return [task_id for task_id in task_ids if task_id in changed]
+        except sqlite3.Error as e:
+            logging.error(f"Error {action} tasks: {e}")
+            self.conn.rollback()
+            return []
+        finally:
+            self.disconnect()
+
+    def purge_deleted_tasks(self, deleted_before: int, limit: int) -> int:
+        # Removes up to `limit` tasks tombstoned before `deleted_before` (a Unix
+        # time) for good, with their tags and text, in one short transaction;
+        # returns how many
+        self.connect()
+        try:
+            purged = 0
+            for table in ("tasks", "archived_tasks"):
+                self.cursor.execute(f'SELECT id FROM {table} WHERE deleted_at < ? LIMIT ?',
+                                    (deleted_before, limit - purged))
+                task_ids = [row[0] for row in self.cursor.fetchall()]
+                if task_ids:
+                    placeholders = ", ".join("?" * len(task_ids))
+                    self.cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', task_ids)
+                    self.cursor.execute(f'DELETE FROM task_tags WHERE task_id IN ({placeholders})', task_ids)
+                    self.cursor.execute(f'DELETE FROM task_details WHERE task_id IN ({placeholders})', task_ids)
+                    purged += len(task_ids)
+                if purged >= limit:
+                    break
+            if purged:
+                self._drop_unused_tags()
+            self.conn.commit()
+            return purged
+        except sqlite3.Error as e:
+            logging.error(f"Error purging deleted tasks: {e}")
+            self.conn.rollback()
+            return 0
+        finally:
+            self.disconnect()
+
+    def _apply_to_tasks(self, sql, params, action, on_applied=None) -> List[int]:
+        # Ids that are not live are looked up in the archive: the task is
+        # restored and `sql` retried. `on_applied(task_id)` runs in the same
+        # transaction.
         self.connect()
         try:
-            self.cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+            applied = []
+            for row in params:
+                self.cursor.execute(sql, row)
+                if not self.cursor.rowcount and self._restore_archived(row[-1]):
+                    self.cursor.execute(sql, row)
+                if self.cursor.rowcount:
+                    applied.append(row[-1])
+                    if on_applied:
+                        on_applied(row[-1])
             self.conn.commit()
+            return applied
         except sqlite3.Error as e:
-            logging.error(f"Error deleting task: {e}")
+            logging.error(f"Error {action} tasks: {e}")
             self.conn.rollback()
+            return []
+        finally:
+            self.disconnect()
+
+    def _start_next_occurrence(self, task_id: int) -> Optional[int]:
+        # Within the caller's transaction, after `task_id` was marked completed:
+        # a recurring task hands its rule on to a new task for its next
+        # occurrence and keeps none itself, so only one instance of a series is
+        # ever pending, and the new task takes its place in the manual order.
+        # Returns the new task's id, or None (no rule, or the series has ended).
+        self.cursor.execute('SELECT due_date, recurrence FROM tasks WHERE id = ? AND completed = 1', (task_id,))
+        row = self.cursor.fetchone()
+        if row is None or not row[1]:
+            return None
+        try:
+            rule = parse_rule(row[1])
+        except ValueError as e:
+            logging.warning(f"Task {task_id} has an invalid recurrence rule: {e}")
+            return None
+        today = today_day_number()
+        next_day = rule.next_day(today if row[0] is None else row[0], today)
+        self.cursor.execute("UPDATE tasks SET recurrence = '' WHERE id = ?", (task_id,))
+        if next_day is None:
+            return None
+        self.cursor.execute(f'''
+            INSERT INTO tasks (id, title, due_date, priority, category, sub_category, recurrence, order_key)
+            SELECT {NEW_TASK_ID_SQL}, title, ?, priority, category, sub_category, ?, order_key
+            FROM tasks WHERE id = ?
+        ''', (next_day, row[1], task_id))
+        next_id = self.cursor.lastrowid
+        self.cursor.execute('INSERT INTO task_tags (task_id, tag_id) SELECT ?, tag_id FROM task_tags WHERE task_id = ?',
+                            (next_id, task_id))
+        self.cursor.execute('''
+            INSERT INTO task_details (task_id, description, notes) SELECT ?, description, notes FROM task_details
+            WHERE task_id = ?
+        ''', (next_id, task_id))
+        return next_id
+
+    def _restore_archived(self, task_id: int) -> bool:
+        # Moves an archived task back into tasks, within the caller's transaction.
+        # Any write brings a task back; if it is still completed long ago, the
+        # next archive_completed_tasks() moves it out again.
+        self.cursor.execute(f'''
+            INSERT INTO tasks ({ARCHIVE_COLUMNS}) SELECT {ARCHIVE_COLUMNS} FROM archived_tasks WHERE id = ? AND {LIVE_SQL}
+        ''', (task_id,))
+        if not self.cursor.rowcount:
+            return False
+        self.cursor.execute('DELETE FROM archived_tasks WHERE id = ?', (task_id,))
+        return True
+
+    def archive_completed_tasks(self, before_day: int, limit: int) -> List[int]:
+        # Moves up to `limit` tasks completed before day number `before_day` to
+        # archived_tasks, oldest first, in one short transaction; returns their ids.
+        # The deletions are logged like any other, so other readers drop them.
+        self.connect()
+        try:
+            self.cursor.execute(f'''
+                SELECT id FROM tasks INDEXED BY idx_tasks_completed_day
+                WHERE completed = 1 AND {LIVE_SQL} AND completed_day < ?
+                ORDER BY completed_day LIMIT ?
+            ''', (before_day, limit))
+            task_ids = [row[0] for row in self.cursor.fetchall()]
+            if task_ids:
+                placeholders = ", ".join("?" * len(task_ids))
+                self.cursor.execute(f'''
+                    INSERT OR REPLACE INTO archived_tasks ({ARCHIVE_COLUMNS})
+                    SELECT {ARCHIVE_COLUMNS} FROM tasks WHERE id IN ({placeholders})
+                ''', task_ids)
+                self.cursor.execute(f'DELETE FROM tasks WHERE id IN ({placeholders})', task_ids)
+            self.conn.commit()
+            return task_ids
+        except sqlite3.Error as e:
+            logging.error(f"Error archiving tasks: {e}")
+            self.conn.rollback()
+            return []
         finally:
             self.disconnect()
 
+    def get_archived_tasks(self, limit: int, after: Optional[tuple] = None, category: Optional[str] = None,
+                           sub_category: Optional[str] = None, search_text: str = "",
+                           tag_query: str = "") -> Tuple[List[Dict[str, Any]], Optional[tuple]]:
+        # One page of archived tasks, most recently completed first, and the
+        # cursor for the next page (None after the last). search_text is expected
+        # in lower case and matched like models.task_filter does, tag_query is
+        # parsed like there. Uses a connection of its own, like iter_task_chunks().
+        conditions, params = [LIVE_SQL], []
+        if after:
+            conditions.append("(completed_day, id) < (?, ?)")
+            params.extend(after)
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if sub_category is not None:
+            conditions.append("sub_category = ?")
+            params.append(sub_category)
+        if search_text:
+            conditions.append("instr(lower_text(title), ?) > 0")
+            params.append(search_text)
+        query = parse_tag_query(tag_query)
+        for negated, names in [(False, group) for group in query.groups] + [(True, query.excluded)]:
+            if names:
+                conditions.append(f"""id {"NOT IN" if negated else "IN"} (
+                    SELECT task_id FROM task_tags JOIN tags ON tags.id = task_tags.tag_id
+                    WHERE tags.name IN ({", ".join("?" * len(names))}))""")
+                params.extend(sorted(names))
+        params.append(limit)
+        where = f"WHERE {' AND '.join(conditions)}"
+        try:
+            conn = open_connection(self.db_name)
+        except sqlite3.Error as e:
+            logging.error("Error connecting to database: %s", e)
+            return [], None
+        try:
+            # SQLite's lower() only folds ASCII
+            conn.create_function("lower_text", 1, lambda text: (text or "").lower(), deterministic=True)
+            rows = conn.execute(f'''
+                SELECT {ARCHIVE_COLUMNS} FROM archived_tasks {where}
+                ORDER BY completed_day DESC, id DESC LIMIT ?
+            ''', params).fetchall()
+            tasks = self._tasks_from_rows(conn, rows)
+        except sqlite3.Error as e:
+            logging.error("Error getting archived tasks: %s", e)
+            return [], None
+        finally:
+            conn.close()
+        next_page = (rows[-1][-1], rows[-1][0]) if len(rows) == limit else None
+        return tasks, next_page
+
     def get_all_tasks(self) -> List[Dict[str, Any]]:
         self.connect()
         try:
-            self.cursor.execute('SELECT * FROM tasks')
-            tasks = self.cursor.fetchall()
-            return [{
-                'id': task[0],
-                'title': task[1],
-                'description': task[2] if len(task) > 2 else "",
-                'due_date': task[3] if len(task) > 3 else "",
-                'priority': task[4] if len(task) > 4 else "Med",
-                'completed': bool(task[5]) if len(task) > 5 else False,
-                'category': task[6] if len(task) > 6 else "Other",
-                'sub_category': task[7] if len(task) > 7 else "",
-                'notes': task[8] if len(task) > 8 else ""
-            } for task in tasks]
+            self.cursor.execute(f'SELECT {TASK_COLUMNS} FROM tasks WHERE {LIVE_SQL}')
+            return self._tasks_from_rows(self.cursor, self.cursor.fetchall())
         except sqlite3.Error as e:
             logging.error(f"Error getting all tasks: {e}")
             return []
         finally:
             self.disconnect()
 
+    def iter_task_chunks(self, chunk_size: int = TASK_CHUNK_SIZE):
+        # Yields lists of task dicts in the default display order: open tasks
+        # first, then by due date with undated tasks last, ties by id. Every chunk
+        # is a short keyset query on its own connection, so a worker thread can
+        # drive this without sharing self.conn or holding a read lock between
+        # chunks while the GUI thread writes.
+        for completed in (0, 1):
+            for dated in (True, False):
+                after = None
+                while True:
+                    chunk = self._fetch_task_chunk(completed, dated, after, chunk_size)
+                    if chunk is None:
+                        return
+                    rows, tasks = chunk
+                    if tasks:
+                        yield tasks
+                    if len(rows) < chunk_size:
+                        break
+                    after = (rows[-1][2], rows[-1][0])
+
+    def _fetch_task_chunk(self, completed, dated, after, limit):
+        params = [completed]
+        if dated:
+            where, order_by = "due_date IS NOT NULL", "due_date, id"
+            if after:
+                where += " AND (due_date, id) > (?, ?)"
+                params.extend(after)
+        else:
+            where, order_by = "due_date IS NULL", "id"
+            if after:
+                where += " AND id > ?"
+                params.append(after[1])
+        params.append(limit)
+        try:
+            conn = open_connection(self.db_name)
+        except sqlite3.Error as e:
+            logging.error("Error connecting to database: %s", e)
+            return None
+        try:
+            rows = conn.execute(f'''
+                SELECT {TASK_COLUMNS} FROM tasks
+                WHERE completed = ? AND {LIVE_SQL} AND {where}
+                ORDER BY {order_by} LIMIT ?
+            ''', params).fetchall()
+            return rows, self._tasks_from_rows(conn, rows)
+        except sqlite3.Error as e:
+            logging.error("Error loading tasks: %s", e)
+            return None
+        finally:
+            conn.close()
+
+    def get_open_task_counts(self, start_day: int, end_day: int) -> Dict[int, int]:
+        # Open tasks per due day in the inclusive day-number range, for the
+        # calendar heatmap: one grouped walk of idx_tasks_completed_due
+        self.connect()
+        try:
+            self.cursor.execute(f'''
+                SELECT due_date, COUNT(*) FROM tasks INDEXED BY idx_tasks_completed_due
+                WHERE completed = 0 AND {LIVE_SQL} AND due_date BETWEEN ? AND ? GROUP BY due_date
+            ''', (start_day, end_day))
+            return dict(self.cursor.fetchall())
+        except sqlite3.Error as e:
+            logging.error(f"Error counting open tasks between {start_day} and {end_day}: {e}")
+            return {}
+        finally:
+            self.disconnect()
+
+    def get_task_columns(self) -> List[tuple]:
+        # Narrow rows for columnar snapshots: no text bodies, no dict per row.
+        # Archived tasks are included, so statistics cover the whole history.
+        self.connect()
+        try:
+            self.cursor.execute(f'''
+                SELECT id, due_date, completed, category, sub_category FROM tasks WHERE {LIVE_SQL} UNION ALL
+                SELECT id, due_date, completed, category, sub_category FROM archived_tasks WHERE {LIVE_SQL}
+            ''')
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Error getting task columns: {e}")
+            return []
+        finally:
+            self.disconnect()
+
+    def get_tasks_due_between(self, start_day: int, end_day: int, open_only: bool = True,
+                              occurrences: bool = False) -> List[Dict[str, Any]]:
+        # Inclusive day-number range, most important first. With `occurrences`,
+        # the not yet created instances of recurring tasks that fall in the range
+        # are included too, as dicts with no id and "occurrence_of" set to the
+        # task they repeat; only series due before end_day are read.
+        self.connect()
+        try:
+            self.cursor.execute(f'''
+                SELECT {TASK_COLUMNS} FROM tasks
+                WHERE due_date BETWEEN ? AND ? AND {LIVE_SQL} {"AND completed = 0" if open_only else ""}
+                ORDER BY priority DESC, due_date
+            ''', (start_day, end_day))
+            tasks = self._tasks_from_rows(self.cursor, self.cursor.fetchall())
+            if not occurrences:
+                return tasks
+            self.cursor.execute(f'''
+                SELECT {TASK_COLUMNS} FROM tasks INDEXED BY idx_tasks_recurring_due
+                WHERE completed = 0 AND recurrence != '' AND {LIVE_SQL} AND due_date < ?
+            ''', (end_day,))
+            series = [Task.from_dict(task) for task in self._tasks_from_rows(self.cursor, self.cursor.fetchall())]
+            for occurrence in expand_occurrences(series, start_day, end_day):
+                record = occurrence.to_dict()
+                record["occurrence_of"] = occurrence.occurrence_of
+                tasks.append(record)
+            tasks.sort(key=lambda task: (-priority_from_label(task["priority"]), task["due_date"]))
+            return tasks
+        except sqlite3.Error as e:
+            logging.error(f"Error getting tasks due between {start_day} and {end_day}: {e}")
+            return []
+        finally:
+            self.disconnect()
+
+    def get_next_up_tasks(self, limit: int = NEXT_UP_LIMIT) -> List[Dict[str, Any]]:
+        # Urgency only falls as the due date moves out, so the top `limit` tasks are
+        # among the `limit` earliest-due (plus `limit` undated) open tasks of each
+        # priority level. Each probe is a short walk of idx_tasks_open_priority_due.
+        self.connect()
+        try:
+            candidates = []
+            for priority in Priority:
+                for due_filter in ("due_date IS NOT NULL ORDER BY due_date", "due_date IS NULL"):
+                    self.cursor.execute(f'''
+                        SELECT {TASK_COLUMNS} FROM tasks INDEXED BY idx_tasks_open_priority_due
+                        WHERE completed = 0 AND {LIVE_SQL} AND priority = ? AND {due_filter} LIMIT ?
+                    ''', (int(priority), limit))
+                    candidates.extend(self.cursor.fetchall())
+            # Tags don't affect the choice, so only the chosen tasks' are read
+            task_dicts = {row[0]: self._task_from_row(row) for row in candidates}
+            selected = select_next_up((Task.from_dict(data) for data in task_dicts.values()), limit, today_day_number())
+            return self._attach_tags(self.cursor, [task_dicts[task.id] for task in selected])
+        except sqlite3.Error as e:
+            logging.error(f"Error getting next up tasks: {e}")
+            return []
+        finally:
+            self.disconnect()
+
+    def get_revision(self) -> int:
+        self.connect()
+        try:
+            self.cursor.execute(f"SELECT {CURRENT_REVISION_SQL}")
+            return self.cursor.fetchone()[0] or 0
+        except sqlite3.Error as e:
+            logging.error(f"Error getting revision: {e}")
+            return 0
+        finally:
+            self.disconnect()
+
+    def get_changes_since(self, revision: int) -> Tuple[int, List[Dict[str, Any]], List[int]]:
+        # (current revision, tasks written after `revision`, ids deleted after it),
+        # read in one transaction so the three agree. A changed task carries its
+        # description and notes only if they changed too, otherwise None.
+        self.connect()
+        try:
+            self.cursor.execute("BEGIN")
+            self.cursor.execute(f"SELECT {CURRENT_REVISION_SQL}")
+            current = self.cursor.fetchone()[0] or 0
+            self.cursor.execute(f'SELECT {TASK_COLUMNS} FROM tasks WHERE rev > ? AND {LIVE_SQL} ORDER BY rev',
+                                (revision,))
+            changed = self._tasks_from_rows(self.cursor, self.cursor.fetchall())
+            by_id = {task['id']: task for task in changed}
+            self.cursor.execute('SELECT task_id, description, notes FROM task_details WHERE rev > ?', (revision,))
+            for task_id, description, notes in self.cursor.fetchall():
+                if task_id in by_id:
+                    by_id[task_id]['description'], by_id[task_id]['notes'] = description, notes
+            self.cursor.execute('SELECT id FROM task_deletions WHERE rev > ?', (revision,))
+            deleted = [row[0] for row in self.cursor.fetchall()]
+            self.conn.commit()
+            return current, changed, deleted
+        except sqlite3.Error as e:
+            logging.error(f"Error getting changes since revision {revision}: {e}")
+            self.conn.rollback()
+            return revision, [], []
+        finally:
+            self.disconnect()
+
+    def advance_revision_after_restore(self, previous_db_path: str):
+        # A restore can move the revision backwards. Bump it past the pre-restore
+        # value, mark every task changed and log tasks that only existed before,
+        # so get_changes_since() readers converge on the restored state.
+        self.connect()
+        try:
+            self.cursor.execute("ATTACH DATABASE ? AS previous", (previous_db_path,))
+            self.cursor.execute("BEGIN")
+            self.cursor.execute('''
+                SELECT MAX(value) FROM (SELECT value FROM main.db_revision UNION ALL
+                                        SELECT value FROM previous.db_revision)
+            ''')
+            revision = (self.cursor.fetchone()[0] or 0) + 1
+            self.cursor.execute("UPDATE main.db_revision SET value = ? WHERE id = 1", (revision,))
+            self.cursor.execute("UPDATE main.tasks SET rev = ?", (revision,))
+            self.cursor.execute("UPDATE main.task_details SET rev = ?", (revision,))
+            self.cursor.execute(f'''
+                INSERT OR REPLACE INTO main.task_deletions (id, rev)
+                SELECT id, ? FROM previous.tasks WHERE id NOT IN (SELECT id FROM main.tasks WHERE {LIVE_SQL})
+            ''', (revision,))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error advancing revision after restore: {e}")
+            self.conn.rollback()
+        finally:
+            self.disconnect()
+
+    def get_tag_counts(self) -> List[Tuple[str, int]]:
+        # (tag, number of tasks carrying it, archived ones included), by name
+        self.connect()
+        try:
+            self.cursor.execute('''
+                SELECT name, COUNT(*) FROM tags JOIN task_tags ON task_tags.tag_id = tags.id
+                WHERE task_id NOT IN (SELECT id FROM tasks WHERE deleted_at IS NOT NULL UNION ALL
+                                      SELECT id FROM archived_tasks WHERE deleted_at IS NOT NULL)
+                GROUP BY tags.id ORDER BY name COLLATE NOCASE
+            ''')
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Error getting tags: {e}")
+            return []
+        finally:
+            self.disconnect()
+
     def add_category(self, name: str):
         self.connect()
         try:
@@ -199,6 +1261,7 @@ class DatabaseManager:
         try:
             self.cursor.execute('DELETE FROM categories WHERE name = ?', (name,))
             self.cursor.execute('UPDATE tasks SET category = "Other" WHERE category = ?', (name,))
+            self.cursor.execute('UPDATE archived_tasks SET category = "Other" WHERE category = ?', (name,))
             self.conn.commit()
         except sqlite3.Error as e:
             logging.error(f"Error deleting category: {e}")
@@ -234,6 +1297,7 @@ class DatabaseManager:
         try:
             self.cursor.execute('DELETE FROM sub_categories WHERE name = ?', (name,))
             self.cursor.execute('UPDATE tasks SET sub_category = "" WHERE sub_category = ?', (name,))
+            self.cursor.execute('UPDATE archived_tasks SET sub_category = "" WHERE sub_category = ?', (name,))
             self.conn.commit()
         except sqlite3.Error as e:
             logging.error(f"Error deleting sub-category: {e}")
@@ -267,6 +1331,66 @@ class DatabaseManager:
         finally:
             self.disconnect()
 
+    def save_view(self, view: Dict[str, Any]) -> int:
+        self.connect()
+        try:
+            self.cursor.execute('''
+                INSERT INTO views (name, filter_option, category, sub_category, sort_option, descending, search_text,
+                                   tag_query)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    filter_option = excluded.filter_option, category = excluded.category,
+                    sub_category = excluded.sub_category, sort_option = excluded.sort_option,
+                    descending = excluded.descending, search_text = excluded.search_text,
+                    tag_query = excluded.tag_query
+            ''', (view['name'], view['filter_option'], view['category'], view['sub_category'],
+                  view['sort_option'], int(view['descending']), view['search_text'], view.get('tag_query', '')))
+            self.cursor.execute('SELECT id FROM views WHERE name = ?', (view['name'],))
+            view_id = self.cursor.fetchone()[0]
+            self.conn.commit()
+            return view_id
+        except sqlite3.Error as e:
+            logging.error(f"Error saving view: {e}")
+            self.conn.rollback()
+            return -1
+        finally:
+            self.disconnect()
+
+    def get_all_views(self) -> List[Dict[str, Any]]:
+        self.connect()
+        try:
+            self.cursor.execute('''
+                SELECT id, name, filter_option, category, sub_category, sort_option, descending, search_text, tag_query
+                FROM views ORDER BY name
+            ''')
+            return [{
+                'id': row[0],
+                'name': row[1],
+                'filter_option': row[2],
+                'category': row[3],
+                'sub_category': row[4],
+                'sort_option': row[5],
+                'descending': bool(row[6]),
+                'search_text': row[7],
+                'tag_query': row[8]
+            } for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            logging.error(f"Error getting views: {e}")
+            return []
+        finally:
+            self.disconnect()
+
+    def delete_view(self, name: str):
+        self.connect()
+        try:
+            self.cursor.execute('DELETE FROM views WHERE name = ?', (name,))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error deleting view: {e}")
+            self.conn.rollback()
+        finally:
+            self.disconnect()
+
     def get_date_format(self) -> str:
         return self.get_setting("date_format", "%Y-%m-%d")
 
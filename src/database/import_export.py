@@ -0,0 +1,258 @@
+import io
+import os
+import csv
+import json
+import sqlite3
+import logging
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .db_manager import (INSERT_TAG_SQL, LINK_TAG_SQL, LIVE_SQL, NEW_TASK_ID_SQL, open_connection,
+                         order_keys_after_last, read_task_details)
+from models.task import NO_DUE_DATE, date_to_day_number, priority_from_label
+from models.recurrence import parse_rule
+from models.tag_index import normalize_tags, parse_tags
+from diagnostics.tracing import traced
+
+# Streaming import and export of tasks as JSON Lines or CSV. Both sides hold
+# one chunk of rows at a time, so memory stays flat however big the file is.
+# They open their own connection and can run on a worker thread; progress is
+# reported as progress(rows_done, percent) and is_cancelled() is polled
+# between chunks.
+
+FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+FILE_FILTER = "JSON Lines (*.jsonl *.ndjson);;CSV Files (*.csv)"
+FIELDS = ["id", "title", "description", "due_date", "priority", "completed", "category", "sub_category", "notes",
+          "recurrence", "tags"]
+IMPORT_CHUNK_SIZE = 5000
+EXPORT_CHUNK_SIZE = 1000
+# Imports that grow past this many rows drop the secondary indexes on tasks and
+# rebuild them once at the end, instead of updating them row by row
+BULK_IMPORT_ROWS = 50000
+MAX_LOGGED_REJECTS = 10
+TRUE_STRINGS = {"1", "true", "yes", "y", "x", "done", "completed"}
+
+INSERT_TASK_SQL = f'''
+    INSERT INTO tasks (id, title, due_date, priority, completed, category, sub_category, recurrence, order_key)
+    VALUES ({NEW_TASK_ID_SQL}, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+INSERT_DETAILS_SQL = 'INSERT INTO task_details (task_id, description, notes) VALUES (?, ?, ?)'
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected: int = 0
+    cancelled: bool = False
+    categories: Set[str] = field(default_factory=set)
+    sub_categories: Set[str] = field(default_factory=set)
+
+def format_for_path(path: str) -> str:
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported file type: {path} (expected .jsonl, .ndjson or .csv)")
+    return fmt
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_STRINGS
+    return bool(value)
+
+def _text(value) -> str:
+    return "" if value is None else str(value)
+
+def task_row_from_record(record: Dict) -> tuple:
+    # Raises ValueError for records that cannot become a task
+    title = _text(record.get("title")).strip()
+    if not title:
+        raise ValueError("missing title")
+    priority = record.get("priority")
+    if isinstance(priority, str) and priority.strip().isdigit():
+        priority = int(priority)
+    due_day = date_to_day_number(_text(record.get("due_date")).strip()[:10])
+    rule = parse_rule(_text(record.get("recurrence")).strip())
+    return (title, None if due_day == NO_DUE_DATE else due_day,
+            int(priority_from_label(priority if priority is not None else "")), int(_parse_bool(record.get("completed"))),
+            _text(record.get("category") or "Other"), _text(record.get("sub_category")), rule.to_rule() if rule else "")
+
+def details_from_record(record: Dict) -> Tuple[str, str]:
+    return _text(record.get("description")), _text(record.get("notes"))
+
+def tags_from_record(record: Dict) -> List[str]:
+    # A list in JSON Lines, comma-separated text in CSV
+    tags = record.get("tags") or []
+    if isinstance(tags, str):
+        return parse_tags(tags)
+    return normalize_tags(_text(tag) for tag in tags) if isinstance(tags, list) else []
+
+def read_records(f: io.TextIOBase, fmt: str) -> Iterator[Dict]:
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+        return
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            logging.warning("Skipping line %d: %s", line_number, e)
+            yield {}
+            continue
+        yield record if isinstance(record, dict) else {}
+
+def _percent(done, total):
+    return min(100, int(done * 100 / total)) if total else 100
+
+@traced("transfer.import_tasks")
+def import_tasks(db_manager, path: str, fmt: Optional[str] = None, chunk_size: int = IMPORT_CHUNK_SIZE,
+                 progress: Optional[Callable[[int, int], None]] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None) -> ImportResult:
+    fmt = fmt or format_for_path(path)
+    result = ImportResult()
+    total_bytes = os.path.getsize(path)
+    conn = open_connection(db_manager.db_name, isolation_level=None)
+    dropped_indexes = []
+    try:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            records = read_records(f, fmt)
+            while True:
+                if is_cancelled and is_cancelled():
+                    result.cancelled = True
+                    break
+                records_chunk = list(islice(records, chunk_size))
+                if not records_chunk:
+                    break
+                rows, tag_lists, details = [], [], []
+                for record in records_chunk:
+                    try:
+                        rows.append(task_row_from_record(record))
+                        tag_lists.append(tags_from_record(record))
+                        details.append(details_from_record(record))
+                    except ValueError as e:
+                        result.rejected += 1
+                        if result.rejected <= MAX_LOGGED_REJECTS:
+                            logging.warning("Rejected import record %r: %s", record, e)
+                if not dropped_indexes and result.imported + len(rows) > BULK_IMPORT_ROWS:
+                    dropped_indexes = _drop_secondary_indexes(conn)
+                if rows:
+                    # One transaction per chunk: a failure or cancel keeps earlier chunks
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        # The new ids run on from the current largest one
+                        first_id = conn.execute(f"SELECT COALESCE({NEW_TASK_ID_SQL}, 1)").fetchone()[0]
+                        # Appended to the manual order, in file order
+                        order_keys = order_keys_after_last(conn, len(rows))
+                        conn.executemany(INSERT_TASK_SQL, [row + (order_key,)
+                                                           for row, order_key in zip(rows, order_keys)])
+                        _insert_tags(conn, first_id, tag_lists)
+                        conn.executemany(INSERT_DETAILS_SQL, [(first_id + offset, description, notes)
+                                                              for offset, (description, notes) in enumerate(details)
+                                                              if description or notes])
+                        conn.execute("COMMIT")
+                    except sqlite3.Error:
+                        conn.execute("ROLLBACK")
+                        raise
+                    result.imported += len(rows)
+                    result.categories.update(row[4] for row in rows)
+                    result.sub_categories.update(row[5] for row in rows if row[5])
+                if progress:
+                    progress(result.imported, _percent(f.buffer.tell(), total_bytes))
+    finally:
+        if dropped_indexes:
+            _rebuild_indexes(conn, dropped_indexes)
+        conn.close()
+    if result.rejected > MAX_LOGGED_REJECTS:
+        logging.warning("%d import records rejected in total", result.rejected)
+    logging.info("Imported %d tasks from %s (%d rejected%s)", result.imported, path, result.rejected,
+                 ", cancelled" if result.cancelled else "")
+    return result
+
+def _insert_tags(conn, first_id: int, tag_lists: List[List[str]]):
+    for offset, tags in enumerate(tag_lists):
+        for tag in tags:
+            conn.execute(INSERT_TAG_SQL, (tag,))
+            conn.execute(LINK_TAG_SQL, (first_id + offset, tag))
+
+def _drop_secondary_indexes(conn) -> list:
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks' AND sql IS NOT NULL"
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    logging.info("Dropped %d task indexes for a bulk import", len(indexes))
+    return indexes
+
+def _rebuild_indexes(conn, indexes):
+    for _, sql in indexes:
+        conn.execute(sql)
+    conn.execute("ANALYZE tasks")
+    logging.info("Rebuilt %d task indexes", len(indexes))
+
+def _record_from_task(task: Dict) -> Dict:
+    record = {key: task[key] for key in FIELDS}
+    record["due_date"] = task["due_date"] or ""
+    return record
+
+def _task_chunks(db_manager, chunk_size: int):
+    # Live tasks in display order, then the archive, most recently completed first
+    yield from db_manager.iter_task_chunks(chunk_size)
+    after = None
+    while True:
+        tasks, after = db_manager.get_archived_tasks(chunk_size, after)
+        if tasks:
+            yield tasks
+        if after is None:
+            return
+
+@traced("transfer.export_tasks")
+def export_tasks(db_manager, path: str, fmt: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE,
+                 progress: Optional[Callable[[int, int], None]] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    # Returns the number of tasks written, or -1 when cancelled. The file is
+    # written beside the target and renamed, so a cancelled export leaves no file.
+    fmt = fmt or format_for_path(path)
+    conn = open_connection(db_manager.db_name)
+    try:
+        total = conn.execute(f"SELECT (SELECT COUNT(*) FROM tasks WHERE {LIVE_SQL}) + "
+                             f"(SELECT COUNT(*) FROM archived_tasks WHERE {LIVE_SQL})").fetchone()[0]
+    finally:
+        conn.close()
+
+    temp_path = path + ".part"
+    written = 0
+    # Chunks come without their text, which is read here a chunk at a time
+    details_conn = open_connection(db_manager.db_name)
+    try:
+        with open(temp_path, "w", encoding="utf-8", newline="") as f:
+            writer = None
+            if fmt == "csv":
+                writer = csv.DictWriter(f, fieldnames=FIELDS)
+                writer.writeheader()
+            for tasks in _task_chunks(db_manager, chunk_size):
+                if is_cancelled and is_cancelled():
+                    break
+                details = read_task_details(details_conn, [task["id"] for task in tasks])
+                for task in tasks:
+                    task.update(description=details[task["id"]]["description"], notes=details[task["id"]]["notes"])
+                    record = _record_from_task(task)
+                    if writer:
+                        record["completed"] = int(record["completed"])
+                        record["tags"] = ", ".join(record["tags"])
+                        writer.writerow(record)
+                    else:
+                        f.write(json.dumps(record, ensure_ascii=False))
+                        f.write("\n")
+                written += len(tasks)
+                if progress:
+                    progress(written, _percent(written, total))
+            else:
+                os.replace(temp_path, path)
+                logging.info("Exported %d tasks to %s", written, path)
+                return written
+    finally:
+        details_conn.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    logging.info("Export to %s cancelled after %d tasks", path, written)
+    return -1
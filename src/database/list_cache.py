@@ -0,0 +1,112 @@
+import os
+import zlib
+import struct
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from models.task import Task, date_to_day_number, day_number_to_date, priority_from_label, priority_label
+
+# Warm-start cache of the first rows of the task list, written on close and
+# painted on the next launch before the database is read. The header carries
+# the database revision the rows were taken at, so the reader can fetch only
+# what changed since (DatabaseManager.get_changes_since).
+#
+# Layout: header "<4sHQI" (magic, format version, revision, payload length),
+# then a zlib-compressed payload of the view's filter strings followed by one
+# "<qiBBB" record (id, due day, priority, completed, has notes) plus six
+# length-prefixed UTF-8 strings per task: title, category, sub-category,
+# recurrence, its tags joined by "|" (which tags never contain) and its order
+# key. Descriptions and notes are left to the database, like the list itself
+# leaves them.
+
+MAGIC = b"TDLC"
+FORMAT_VERSION = 5
+HEADER = struct.Struct("<4sHQI")
+ROW = struct.Struct("<qiBBB")
+STRING_LENGTH = struct.Struct("<I")
+CACHE_SUFFIX = ".listcache"
+CACHED_ROWS = 30  # about one screenful of rows
+VIEW_KEYS = ("filter_option", "category", "sub_category")
+
+@dataclass
+class ListCache:
+    revision: int
+    view: Dict[str, str]
+    tasks: List[Task] = field(default_factory=list)
+
+def cache_path_for(db_name: str) -> str:
+    return db_name + CACHE_SUFFIX
+
+def _pack_string(value: str) -> bytes:
+    data = (value or "").encode("utf-8")
+    return STRING_LENGTH.pack(len(data)) + data
+
+def _unpack_string(payload: bytes, offset: int):
+    (length,) = STRING_LENGTH.unpack_from(payload, offset)
+    offset += STRING_LENGTH.size
+    return payload[offset:offset + length].decode("utf-8"), offset + length
+
+def write_list_cache(path: str, revision: int, view: Dict[str, str], tasks: List[Task]):
+    parts = [_pack_string(view[key]) for key in VIEW_KEYS]
+    parts.append(STRING_LENGTH.pack(len(tasks)))
+    for task in tasks:
+        parts.append(ROW.pack(task.id, date_to_day_number(task.due_date), int(priority_from_label(task.priority)),
+                              int(task.completed), int(task.has_notes)))
+        parts.extend(_pack_string(value) for value in
+                     (task.title, task.category, task.sub_category, task.recurrence, "|".join(task.tags),
+                      task.order_key))
+    payload = zlib.compress(b"".join(parts))
+    # Written beside the target and renamed, so a crash never leaves half a file
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, revision, len(payload)))
+            f.write(payload)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logging.warning("Could not write list cache %s: %s", path, e)
+
+def read_list_cache(path: str) -> Optional[ListCache]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        magic, version, revision, length = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+        payload = zlib.decompress(data[HEADER.size:HEADER.size + length])
+        offset = 0
+        view = {}
+        for key in VIEW_KEYS:
+            view[key], offset = _unpack_string(payload, offset)
+        (count,) = STRING_LENGTH.unpack_from(payload, offset)
+        offset += STRING_LENGTH.size
+        tasks = []
+        for _ in range(count):
+            task_id, due_day, priority, completed, has_notes = ROW.unpack_from(payload, offset)
+            offset += ROW.size
+            title, offset = _unpack_string(payload, offset)
+            category, offset = _unpack_string(payload, offset)
+            sub_category, offset = _unpack_string(payload, offset)
+            recurrence, offset = _unpack_string(payload, offset)
+            tags, offset = _unpack_string(payload, offset)
+            order_key, offset = _unpack_string(payload, offset)
+            tasks.append(Task(id=task_id, title=title, description=None, due_date=day_number_to_date(due_day),
+                              priority=priority_label(priority), completed=bool(completed), category=category,
+                              sub_category=sub_category, notes=None, has_notes=bool(has_notes),
+                              recurrence=recurrence, tags=tags.split("|") if tags else [], order_key=order_key))
+        return ListCache(revision, view, tasks)
+    except (struct.error, zlib.error, UnicodeDecodeError, ValueError) as e:
+        logging.warning("Ignoring unreadable list cache %s: %s", path, e)
+        return None
+
+def remove_list_cache(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.warning("Could not remove list cache %s: %s", path, e)
@@ -0,0 +1,147 @@
+import os
+import time
+import sqlite3
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from diagnostics.tracing import traced
+from .db_manager import open_connection
+
+# Upkeep of the database file that nothing else does: query planner statistics
+# (ANALYZE once, then PRAGMA optimize), handing free pages back to the file
+# system (incremental vacuum), WAL checkpoints and an integrity check. The
+# window runs one step at a time on a worker thread while the user is idle.
+# Each step opens a connection of its own that gives up quickly on locks and
+# is interrupted once over its time budget, so the app's writes never wait
+# long behind it, and logs what it did.
+
+MAINTENANCE_STEPS = ("optimize", "vacuum", "checkpoint", "integrity_check")
+STEP_BUDGET_SECONDS = 0.5
+# Reading every page takes longer, but under WAL it does not hold up writers
+CHECK_BUDGET_SECONDS = 5.0
+LOCK_TIMEOUT_MS = 100
+# The progress handler checks the budget every this many VM instructions
+PROGRESS_INTERVAL = 1000
+# Rows ANALYZE samples per index (PRAGMA analysis_limit)
+ANALYSIS_LIMIT = 400
+VACUUM_PAGES_PER_STEP = 2048
+# A file created before auto_vacuum=INCREMENTAL is rebuilt with it (a full
+# VACUUM, within the step budget) once at least this share of it is free pages
+REBUILD_FREE_RATIO = 0.25
+INTEGRITY_CHECK_INTERVAL_SECONDS = 24 * 60 * 60
+INTEGRITY_CHECKED_SETTING = "integrity_checked_at"
+MAX_REPORTED_PROBLEMS = 20
+INCREMENTAL = 2  # PRAGMA auto_vacuum value
+
+@dataclass
+class StepResult:
+    step: str
+    more: bool = False  # the same step has more to do
+    reclaimed_bytes: int = 0
+    problems: List[str] = field(default_factory=list)  # integrity check findings
+
+def maintenance_plan(db_manager, now: Optional[float] = None) -> List[str]:
+    # The steps of one pass; the integrity check only runs once a day
+    now = time.time() if now is None else now
+    checked_at = float(db_manager.get_setting(INTEGRITY_CHECKED_SETTING, "0") or 0)
+    return [step for step in MAINTENANCE_STEPS
+            if step != "integrity_check" or now - checked_at >= INTEGRITY_CHECK_INTERVAL_SECONDS]
+
+def _format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB" if size >= 1024 * 1024 else f"{size / 1024:.0f} KB"
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _pages(conn) -> tuple:
+    return tuple(conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("page_count", "freelist_count", "page_size"))
+
+def _optimize(conn, db_name: str) -> StepResult:
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None:
+        conn.execute("ANALYZE")
+        logging.info("Maintenance: gathered query planner statistics")
+    else:
+        conn.execute("PRAGMA optimize")
+    return StepResult("optimize")
+
+def _vacuum(conn, db_name: str) -> StepResult:
+    page_count, free_pages, page_size = _pages(conn)
+    if not free_pages:
+        return StepResult("vacuum")
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != INCREMENTAL:
+        if free_pages < page_count * REBUILD_FREE_RATIO:
+            return StepResult("vacuum")
+        conn.execute(f"PRAGMA auto_vacuum = {INCREMENTAL}")
+        conn.execute("VACUUM")
+        reclaimed = (page_count - _pages(conn)[0]) * page_size
+        logging.info("Maintenance: rebuilt the database file for incremental vacuum, freeing %s",
+                     _format_size(reclaimed))
+        return StepResult("vacuum", reclaimed_bytes=reclaimed)
+    # Stepped through by executescript(); execute() would free a single page
+    conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP})")
+    remaining_pages, remaining_free, _ = _pages(conn)
+    reclaimed = (page_count - remaining_pages) * page_size
+    logging.info("Maintenance: freed %s, %d free pages left", _format_size(reclaimed), remaining_free)
+    return StepResult("vacuum", more=bool(remaining_free and reclaimed), reclaimed_bytes=reclaimed)
+
+def _checkpoint(conn, db_name: str) -> StepResult:
+    wal_path = db_name + "-wal"
+    before = _file_size(wal_path)
+    _, frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    if frames < 0:
+        return StepResult("checkpoint")  # not in WAL mode
+    if checkpointed == frames:
+        # Everything is back in the database file, so the log can start over empty
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    reclaimed = max(0, before - _file_size(wal_path))
+    logging.info("Maintenance: checkpointed %d of %d WAL frames, WAL file shrank by %s",
+                 checkpointed, frames, _format_size(reclaimed))
+    return StepResult("checkpoint", reclaimed_bytes=reclaimed)
+
+def _integrity_check(conn, db_name: str) -> StepResult:
+    started = time.perf_counter()
+    rows = [row[0] for row in conn.execute(f"PRAGMA quick_check({MAX_REPORTED_PROBLEMS})")]
+    problems = [] if rows == ["ok"] else rows
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                 (INTEGRITY_CHECKED_SETTING, str(int(time.time()))))
+    conn.commit()
+    if problems:
+        logging.error("Maintenance: integrity check of %s found problems: %s", db_name, "; ".join(problems))
+    else:
+        logging.info("Maintenance: integrity check passed in %.1f s", time.perf_counter() - started)
+    return StepResult("integrity_check", problems=problems)
+
+_STEPS = {"optimize": _optimize, "vacuum": _vacuum, "checkpoint": _checkpoint, "integrity_check": _integrity_check}
+
+@traced("maintenance.run_maintenance_step")
+def run_maintenance_step(db_name: str, step: str, progress: Optional[Callable[[int, int], None]] = None,
+                         is_cancelled: Optional[Callable[[], bool]] = None) -> StepResult:
+    # Runs one step of MAINTENANCE_STEPS. A step that runs out of time, finds
+    # the database locked or fails is logged and skipped; the next pass tries
+    # again. Takes progress= like the other background jobs, and ignores it.
+    budget = CHECK_BUDGET_SECONDS if step == "integrity_check" else STEP_BUDGET_SECONDS
+    deadline = time.perf_counter() + budget
+    conn = open_connection(db_name)
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {LOCK_TIMEOUT_MS}")
+        conn.set_progress_handler(
+            lambda: time.perf_counter() > deadline or bool(is_cancelled and is_cancelled()), PROGRESS_INTERVAL)
+        return _STEPS[step](conn, db_name)
+    except sqlite3.OperationalError as e:
+        if is_cancelled and is_cancelled():
+            logging.info("Maintenance: %s cancelled", step)
+        elif "interrupt" in str(e).lower():
+            logging.info("Maintenance: %s did not finish within %.1f s, skipped", step, budget)
+        else:
+            logging.warning("Maintenance: %s skipped: %s", step, e)
+        return StepResult(step)
+    except sqlite3.Error as e:
+        logging.error("Maintenance: %s failed: %s", step, e)
+        return StepResult(step)
+    finally:
+        conn.close()
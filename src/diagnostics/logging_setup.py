@@ -0,0 +1,70 @@
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Records are put on a queue by the calling thread (usually the GUI thread) and
+# written by a QueueListener thread, so file I/O never blocks the event loop.
+
+LOG_FILE = "todo_app.log"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEFAULT_LOG_LEVEL = "INFO"
+LOG_LEVEL_ENV = "TODO_LOG_LEVEL"
+LOG_LEVEL_SETTING = "log_level"
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+_listener = None
+
+def _parse_level(name):
+    name = (name or "").strip().upper()
+    return name if name in LOG_LEVELS else None
+
+def configure_logging(log_file: str = LOG_FILE):
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                       encoding="utf-8", delay=True)
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    # The environment wins until the stored setting can be read from the database
+    root.setLevel(_parse_level(os.environ.get(LOG_LEVEL_ENV)) or DEFAULT_LOG_LEVEL)
+
+def apply_level_setting(db_manager):
+    # TODO_LOG_LEVEL overrides the level saved under Settings > Log Level
+    level = (_parse_level(os.environ.get(LOG_LEVEL_ENV)) or
+             _parse_level(db_manager.get_setting(LOG_LEVEL_SETTING, DEFAULT_LOG_LEVEL)) or
+             DEFAULT_LOG_LEVEL)
+    logging.getLogger().setLevel(level)
+    return level
+
+def set_log_level(db_manager, level: str):
+    level = _parse_level(level) or DEFAULT_LOG_LEVEL
+    db_manager.set_setting(LOG_LEVEL_SETTING, level)
+    logging.getLogger().setLevel(level)
+
+def current_log_level() -> str:
+    return logging.getLevelName(logging.getLogger().level)
+
+def shutdown_logging():
+    global _listener
+    if _listener is not None:
+        # Drains the queue before the writer thread exits
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import inspect
+import logging
+import threading
+import functools
+from collections import deque
+from typing import Dict, List, Optional
+
+# Lightweight in-process tracing. While disabled, a traced call costs one
+# global flag check and span() hands back a shared no-op context manager.
+# While enabled, every span updates a counter and a log2 latency histogram,
+# and optionally appends a Chrome trace event ("ph": "X").
+
+MAX_TRACE_EVENTS = 500_000
+HISTOGRAM_BUCKETS = 32  # bucket i holds durations below 2**i microseconds
+
+_enabled = False
+_record_events = False
+_lock = threading.Lock()
+_stats: Dict[str, "SpanStats"] = {}
+_counters: Dict[str, int] = {}
+_events = deque(maxlen=MAX_TRACE_EVENTS)
+_origin_ns = time.perf_counter_ns()
+
+class SpanStats:
+    __slots__ = ("count", "total_us", "max_us", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, duration_us):
+        self.count += 1
+        self.total_us += duration_us
+        if duration_us > self.max_us:
+            self.max_us = duration_us
+        self.buckets[min(int(duration_us).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        # Upper bound of the histogram bucket holding the requested rank
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(float(2 ** index), self.max_us)
+        return self.max_us
+
+def enable(record_events: bool = False):
+    global _enabled, _record_events
+    _record_events = record_events
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def is_recording_events() -> bool:
+    return _enabled and _record_events
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _counters.clear()
+        _events.clear()
+
+def increment(name: str, value: int = 1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def _record(name, start_ns, end_ns):
+    duration_us = (end_ns - start_ns) / 1000
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = SpanStats()
+        stats.add(duration_us)
+        if _record_events:
+            _events.append((name, (start_ns - _origin_ns) / 1000, duration_us, threading.get_ident()))
+
+class _Span:
+    __slots__ = ("name", "start_ns")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _record(self.name, self.start_ns, time.perf_counter_ns())
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(name: str):
+    return _Span(name) if _enabled else _NOOP_SPAN
+
+def traced(name: Optional[str] = None):
+    # Not for Qt slots: PySide passes signal arguments to a *args wrapper, so
+    # slots use `with span(...)` in their body instead
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start_ns = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(span_name, start_ns, time.perf_counter_ns())
+        return wrapper
+    return decorator
+
+def trace_methods(prefix: str):
+    # Class decorator: traces every public method defined on the class itself
+    def decorator(cls):
+        for attr_name, attr in list(vars(cls).items()):
+            if attr_name.startswith("_") or not inspect.isfunction(attr):
+                continue
+            setattr(cls, attr_name, traced(f"{prefix}.{attr_name}")(attr))
+        return cls
+    return decorator
+
+def get_stats() -> List[Dict[str, float]]:
+    with _lock:
+        items = [(name, stats.count, stats.total_us, stats.max_us, stats.percentile(0.5), stats.percentile(0.95))
+                 for name, stats in _stats.items()]
+    return [{
+        "name": name,
+        "count": count,
+        "total_ms": total_us / 1000,
+        "mean_ms": total_us / count / 1000 if count else 0.0,
+        "p50_ms": p50 / 1000,
+        "p95_ms": p95 / 1000,
+        "max_ms": max_us / 1000,
+    } for name, count, total_us, max_us, p50, p95 in sorted(items, key=lambda item: -item[2])]
+
+def get_counters() -> Dict[str, int]:
+    with _lock:
+        return dict(_counters)
+
+def write_chrome_trace(path: str) -> int:
+    # Loadable in chrome://tracing or https://ui.perfetto.dev
+    with _lock:
+        events = list(_events)
+        counters = dict(_counters)
+    pid = os.getpid()
+    trace_events = [{"name": name, "ph": "X", "ts": ts, "dur": dur, "pid": pid, "tid": tid}
+                    for name, ts, dur, tid in events]
+    if counters:
+        now_us = (time.perf_counter_ns() - _origin_ns) / 1000
+        trace_events.extend({"name": name, "ph": "C", "ts": now_us, "pid": pid, "args": {"value": value}}
+                            for name, value in counters.items())
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+    logging.info("Wrote %d trace events to %s", len(trace_events), path)
+    return len(trace_events)
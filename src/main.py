@@ -1,69 +1,76 @@
 import sys
 import os
+import time
 import logging
+import argparse
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG, 
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.FileHandler("todo_app.log"),
-                        logging.StreamHandler()
-                    ])
+# Taken before any heavy import so the first-paint measurement covers them
+STARTUP_STARTED = time.perf_counter()
+# Time from process start to the first painted window that we commit to
+STARTUP_BUDGET_MS = 1000
+
+from diagnostics.logging_setup import configure_logging, apply_level_setting
+
+# Set up logging: records are written to a rotating log file by a background
+# thread; the level comes from TODO_LOG_LEVEL or the saved setting
+configure_logging()
 
 # Add the parent directory (project root) to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-logging.debug("Python path: %s", sys.path)
-logging.debug("Current working directory: %s", os.getcwd())
+if logging.getLogger().isEnabledFor(logging.DEBUG):
+    logging.debug("Python path: %s", sys.path)
+    logging.debug("Current working directory: %s", os.getcwd())
 
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QIcon
+from PySide6.QtCore import QTimer
 from ui.main_window import MainWindow
 from database.db_manager import DatabaseManager
+from diagnostics import tracing
 
 try:
     import resources_rc
     logging.debug("resources_rc imported successfully")
     resources_rc.qInitResources()
 except ImportError as e:
-    logging.error(f"Failed to import resources_rc: {e}")
-    logging.error(f"Looked in these locations: {sys.path}")
+    logging.error("Failed to import resources_rc: %s", e)
+    logging.error("Looked in these locations: %s", sys.path)
 
-def load_stylesheets():
-    base_stylesheet = ""
-    user_stylesheet = ""
-    
-    base_path = os.path.join(os.path.dirname(__file__), "ui", "styles.qss")
-    if os.path.exists(base_path):
-        with open(base_path, "r") as f:
-            base_stylesheet = f.read()
-        logging.debug("Base stylesheet loaded")
-    else:
-        logging.warning("Base stylesheet not found")
-    
-    user_path = os.path.join(os.path.dirname(__file__), "ui", "user_colors.qss")
-    if os.path.exists(user_path):
-        with open(user_path, "r") as f:
-            user_stylesheet = f.read()
-        logging.debug("User stylesheet loaded")
+def report_first_paint():
+    elapsed_ms = (time.perf_counter() - STARTUP_STARTED) * 1000
+    if elapsed_ms > STARTUP_BUDGET_MS:
+        logging.warning("Time to first paint %.0f ms exceeds the %d ms budget", elapsed_ms, STARTUP_BUDGET_MS)
     else:
-        logging.debug("User stylesheet not found")
-    
-    return base_stylesheet + "\n" + user_stylesheet
+        logging.info("Time to first paint: %.0f ms", elapsed_ms)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Todo2 task manager")
+    parser.add_argument("--trace", action="store_true",
+                        help="collect tracing stats from startup (also enabled by TODO_TRACE=1)")
+    parser.add_argument("--trace-file", metavar="PATH",
+                        help="record trace events and write them as Chrome-trace JSON to PATH on exit")
+    # Anything else (e.g. -platform) is left for QApplication
+    return parser.parse_known_args()
 
 def main():
+    args, qt_args = parse_arguments()
+    if args.trace_file:
+        tracing.enable(record_events=True)
+    elif args.trace or os.environ.get("TODO_TRACE") == "1":
+        tracing.enable()
+
     logging.info("Starting the application...")
     
     logging.info("Initializing database...")
+    # The constructor creates and migrates the schema; get_date_format() falls
+    # back to the default format, so nothing else needs initialising here
     db_manager = DatabaseManager()
-    db_manager.create_tables()
+    apply_level_setting(db_manager)
 
-    # Initialize date format if it doesn't exist
-    if not db_manager.get_date_format():
-        logging.info("Initializing default date format...")
-        db_manager.set_date_format("%Y-%m-%d")
-
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
+    if args.trace_file:
+        app.aboutToQuit.connect(lambda: tracing.write_chrome_trace(args.trace_file))
     logging.info("QApplication created")
 
     logging.info("Setting application style to Fusion")
@@ -74,15 +81,14 @@ def main():
     app_icon = QIcon(icon_path)
     app.setWindowIcon(app_icon)
 
-    logging.info("Loading stylesheets")
-    stylesheet = load_stylesheets()
-
+    # MainWindow loads and applies the stylesheets itself
     logging.info("Creating main window")
     window = MainWindow(db_manager)
-    window.setStyleSheet(stylesheet)
 
     logging.info("Showing main window")
     window.show()
+    # Runs once the queued expose/paint events of the first show are handled
+    QTimer.singleShot(0, report_first_paint)
 
     logging.info("Entering main event loop")
     sys.exit(app.exec())
@@ -0,0 +1,73 @@
+import calendar
+from datetime import date
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .task import NO_DUE_DATE, date_to_day_number
+
+# Open tasks per due day, for shading calendar pickers. Counts come from the
+# database a month at a time (fetch(first_day, last_day) -> {day: count}) and
+# are kept per month; edits then adjust the cached months in place, so showing
+# a picker again costs nothing. The open due day of every task seen is kept
+# to know what an edit moved a task away from.
+class DueDayCounts:
+    def __init__(self, fetch: Callable[[int, int], Dict[int, int]]):
+        self._fetch = fetch
+        self._months: Dict[Tuple[int, int], Dict[int, int]] = {}
+        self._open_days: Dict[int, Optional[int]] = {}  # task id -> due day while open, else None
+
+    def clear(self):
+        self._months.clear()
+        self._open_days.clear()
+
+    def month(self, year: int, month: int) -> Dict[int, int]:
+        counts = self._months.get((year, month))
+        if counts is None:
+            first_day = date(year, month, 1).toordinal()
+            counts = dict(self._fetch(first_day, first_day + calendar.monthrange(year, month)[1] - 1))
+            self._months[(year, month)] = counts
+        return counts
+
+    def track(self, tasks: Iterable):
+        # Tasks read from the database, which the counts already include
+        for task in tasks:
+            self._open_days[task.id] = self._open_day(task)
+
+    def add(self, task):
+        self._open_days[task.id] = None
+        self.update(task)
+
+    def update(self, task):
+        if task.id not in self._open_days:
+            # Nothing known about where it was counted before
+            self._months.clear()
+            self.track([task])
+            return
+        old_day, new_day = self._open_days[task.id], self._open_day(task)
+        if old_day != new_day:
+            self._open_days[task.id] = new_day
+            self._adjust(old_day, -1)
+            self._adjust(new_day, 1)
+
+    def remove(self, task_ids: Iterable[int]):
+        for task_id in task_ids:
+            self._adjust(self._open_days.pop(task_id, None), -1)
+
+    @staticmethod
+    def _open_day(task) -> Optional[int]:
+        if task.completed:
+            return None
+        day = date_to_day_number(task.due_date)
+        return None if day == NO_DUE_DATE else day
+
+    def _adjust(self, day: Optional[int], delta: int):
+        if day is None:
+            return
+        when = date.fromordinal(day)
+        counts = self._months.get((when.year, when.month))
+        if counts is None:
+            return
+        count = counts.get(day, 0) + delta
+        if count > 0:
+            counts[day] = count
+        else:
+            counts.pop(day, None)
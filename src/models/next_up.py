@@ -0,0 +1,92 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .task import NO_DUE_DATE, date_to_day_number, priority_from_label, today_day_number
+
+NEXT_UP_LIMIT = 20
+
+# Score weights: one priority level is worth PRIORITY_WEIGHT, a task due within
+# DUE_HORIZON_DAYS gains DUE_WEIGHT per day closer, and overdue tasks get a
+# flat bonus plus one point per day late (capped).
+PRIORITY_WEIGHT = 10
+DUE_HORIZON_DAYS = 14
+DUE_WEIGHT = 1
+OVERDUE_BONUS = 30
+OVERDUE_DAYS_CAP = 30
+
+# Within one priority level the score never increases with a later due date and
+# undated tasks score lowest. get_next_up_tasks relies on this to read only the
+# earliest-due rows of each priority level from the index.
+def urgency_score(priority: int, due_day: int, today: int) -> int:
+    score = PRIORITY_WEIGHT * int(priority)
+    if due_day is None or due_day == NO_DUE_DATE:
+        return score
+    days_left = due_day - today
+    if days_left < 0:
+        return score + OVERDUE_BONUS + min(-days_left, OVERDUE_DAYS_CAP)
+    return score + DUE_WEIGHT * max(0, DUE_HORIZON_DAYS - days_left)
+
+def _sort_key(score: int, due_day: int, task_id: int) -> Tuple[int, int, int]:
+    # Highest score first, then earliest due date, then oldest task
+    return (-score, due_day if due_day != NO_DUE_DATE else float("inf"), task_id)
+
+def task_sort_key(task, today: int):
+    due_day = date_to_day_number(task.due_date)
+    return _sort_key(urgency_score(priority_from_label(task.priority), due_day, today), due_day, task.id or 0)
+
+def select_next_up(tasks: Iterable, limit: int = NEXT_UP_LIMIT, today: Optional[int] = None) -> List:
+    today = today_day_number() if today is None else today
+    return heapq.nsmallest(limit, (task for task in tasks if not task.completed),
+                           key=lambda task: task_sort_key(task, today))
+
+# Keeps the urgency key of every open task so that a single edit only costs a
+# comparison against the current top-K cutoff; the heap selection is re-run
+# lazily, and only when the change could alter the top-K.
+class NextUpIndex:
+    def __init__(self, limit: int = NEXT_UP_LIMIT):
+        self.limit = limit
+        self._tasks: Dict[int, object] = {}
+        self._keys: Dict[int, tuple] = {}
+        self._top: List[int] = []
+        self._dirty = True
+        self._today = today_day_number()
+
+    def rebuild(self, tasks: Iterable):
+        self._today = today_day_number()
+        self._tasks = {}
+        self._keys = {}
+        for task in tasks:
+            if not task.completed:
+                self._tasks[task.id] = task
+                self._keys[task.id] = task_sort_key(task, self._today)
+        self._dirty = True
+
+    def update(self, task):
+        if self._today != today_day_number():
+            self.rebuild(list(self._tasks.values()) + [task])
+            return
+        if task.completed:
+            self.remove([task.id])
+            return
+        key = task_sort_key(task, self._today)
+        self._tasks[task.id] = task
+        self._keys[task.id] = key
+        if self._dirty:
+            return
+        if task.id in self._top or len(self._top) < self.limit or key < self._keys[self._top[-1]]:
+            self._dirty = True
+
+    def remove(self, task_ids: Iterable[int]):
+        for task_id in task_ids:
+            self._tasks.pop(task_id, None)
+            self._keys.pop(task_id, None)
+            if task_id in self._top:
+                self._dirty = True
+
+    def top(self) -> List:
+        if self._today != today_day_number():
+            self.rebuild(list(self._tasks.values()))
+        if self._dirty:
+            self._top = heapq.nsmallest(self.limit, self._keys, key=self._keys.__getitem__)
+            self._dirty = False
+        return [self._tasks[task_id] for task_id in self._top]
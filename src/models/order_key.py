@@ -0,0 +1,157 @@
+from typing import List, Optional, Sequence, Tuple
+
+# Order keys for the "Manual" sort: strings that sort in list order under a
+# plain byte comparison (Python's and SQLite's alike), so moving a task only
+# rewrites its own key, to one between its new neighbours'. A key is an integer
+# part, whose first character gives its length ("a0".."az", then "b00".."bzz",
+# and "Z", "Y".. below "a0"), followed by an optional base-62 fraction without
+# trailing zeros. Appending increments the integer part and keys stay short;
+# repeated inserts into one gap lengthen the fraction, which respace() undoes.
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_SMALLEST_INTEGER = "A" + DIGITS[0] * 26
+
+def _integer_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"invalid order key head {head!r}")
+
+def _split(key: str) -> Tuple[str, str]:
+    integer = key[:_integer_length(key[0])] if key else ""
+    if not key or len(integer) < _integer_length(key[0]) or key == _SMALLEST_INTEGER:
+        raise ValueError(f"invalid order key {key!r}")
+    fraction = key[len(integer):]
+    if fraction.endswith(DIGITS[0]):
+        raise ValueError(f"invalid order key {key!r}")
+    return integer, fraction
+
+def is_order_key(key: str) -> bool:
+    try:
+        _split(key)
+        return all(char in DIGITS for char in key)
+    except (ValueError, IndexError):
+        return False
+
+def _midpoint(lower: str, upper: Optional[str]) -> str:
+    # A fraction strictly between two fractions, "" standing for 0 and None for 1
+    if upper is not None:
+        common = 0
+        while common < len(upper) and (lower[common] if common < len(lower) else DIGITS[0]) == upper[common]:
+            common += 1
+        if common:
+            return upper[:common] + _midpoint(lower[common:], upper[common:])
+    lower_digit = DIGITS.index(lower[0]) if lower else 0
+    upper_digit = DIGITS.index(upper[0]) if upper is not None else len(DIGITS)
+    if upper_digit - lower_digit > 1:
+        return DIGITS[(lower_digit + upper_digit + 1) // 2]
+    if upper is not None and len(upper) > 1:
+        return upper[:1]
+    return DIGITS[lower_digit] + _midpoint(lower[1:], None)
+
+def _increment(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        value = DIGITS.index(digits[i]) + 1
+        if value < len(DIGITS):
+            digits[i] = DIGITS[value]
+            return head + "".join(digits)
+        digits[i] = DIGITS[0]
+    if head == "Z":
+        return "a" + DIGITS[0]
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def _decrement(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        value = DIGITS.index(digits[i]) - 1
+        if value >= 0:
+            digits[i] = DIGITS[value]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def key_between(lower: Optional[str], upper: Optional[str]) -> str:
+    # A key sorting strictly between two keys; None is the start or the end
+    # of the list
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError(f"order key {lower!r} is not below {upper!r}")
+    if lower is None and upper is None:
+        return "a" + DIGITS[0]
+    if lower is None:
+        integer, fraction = _split(upper)
+        if integer == _SMALLEST_INTEGER:
+            return integer + _midpoint("", fraction)
+        if fraction:
+            return integer
+        below = _decrement(integer)
+        if below is None:
+            raise ValueError("no order key below " + upper)
+        return below
+    lower_integer, lower_fraction = _split(lower)
+    if upper is None:
+        above = _increment(lower_integer)
+        return lower_integer + _midpoint(lower_fraction, None) if above is None else above
+    upper_integer, upper_fraction = _split(upper)
+    if lower_integer == upper_integer:
+        return lower_integer + _midpoint(lower_fraction, upper_fraction)
+    above = _increment(lower_integer)
+    if above is not None and above < upper:
+        return above
+    return lower_integer + _midpoint(lower_fraction, None)
+
+def keys_between(lower: Optional[str], upper: Optional[str], count: int) -> List[str]:
+    # `count` ascending keys between two keys, spread out by bisection so that
+    # none is much longer than the rest
+    if count <= 0:
+        return []
+    if upper is None or lower is None:
+        keys, key = [], lower if upper is None else upper
+        for _ in range(count):
+            key = key_between(key, None) if upper is None else key_between(None, key)
+            keys.append(key)
+        return keys if upper is None else keys[::-1]
+    middle = key_between(lower, upper)
+    half = count // 2
+    return keys_between(lower, middle, half) + [middle] + keys_between(middle, upper, count - half - 1)
+
+# Keys longer than this are respaced while the app is idle, to at most
+# RESPACED_KEY_LENGTH characters where the list allows
+LONG_KEY_LENGTH = 12
+RESPACED_KEY_LENGTH = 8
+RESPACE_MIN_RUN = 8
+
+def respace(keys: Sequence[str], index: int, max_length: int = RESPACED_KEY_LENGTH) -> Tuple[int, List[str]]:
+    # New keys for a run of the sorted `keys` around keys[index], evenly spread
+    # between the keys just outside it: (start of the run, its new keys). The
+    # run doubles until its keys fit in max_length or it covers every key, so
+    # the fewest rows are rewritten. Keys that are not valid order keys (rows
+    # written without one) get one too.
+    run = RESPACE_MIN_RUN
+    while True:
+        start, end = max(0, index - run), min(len(keys), index + run + 1)
+        lower = keys[start - 1] if start > 0 else None
+        upper = keys[end] if end < len(keys) else None
+        whole = start == 0 and end == len(keys)
+        if whole or (all(key is None or is_order_key(key) for key in (lower, upper)) and
+                     (lower is None or upper is None or lower < upper)):
+            new_keys = keys_between(None if whole else lower, None if whole else upper, end - start)
+            if whole or max(map(len, new_keys)) <= max_length:
+                return start, new_keys
+        run *= 2
@@ -0,0 +1,170 @@
+import heapq
+import calendar
+from dataclasses import dataclass, replace
+from datetime import date
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .task_filter import SORT_KEYS
+from .task import NO_DUE_DATE, date_to_day_number, day_number_to_date, today_day_number
+
+# A recurring task is one row holding its current (pending) instance plus a rule
+# in a small subset of RFC 5545 RRULE syntax, e.g. "FREQ=WEEKLY;INTERVAL=2" or
+# "FREQ=MONTHLY;BYMONTHDAY=31;UNTIL=2025-12-31". Completing it creates the row
+# for the next instance; later instances are only ever computed, lazily and for
+# a bounded window of days, so a series without an end costs nothing to keep.
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+_UNITS = {"DAILY": "day", "WEEKLY": "week", "MONTHLY": "month", "YEARLY": "year"}
+
+@dataclass(frozen=True)
+class Recurrence:
+    freq: str
+    interval: int = 1
+    # Monthly and yearly rules come back to this day of the month (clamped to
+    # the month's length), so a series started on the 31st does not drift to the 28th
+    month_day: Optional[int] = None
+    until: Optional[int] = None  # day number of the last day an instance may fall on
+
+    def to_rule(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.month_day is not None:
+            parts.append(f"BYMONTHDAY={self.month_day}")
+        if self.until is not None:
+            parts.append(f"UNTIL={day_number_to_date(self.until)}")
+        return ";".join(parts)
+
+    def label(self) -> str:
+        unit = _UNITS[self.freq]
+        text = f"Every {unit}" if self.interval == 1 else f"Every {self.interval} {unit}s"
+        if self.until is not None:
+            text += f" until {day_number_to_date(self.until)}"
+        return text
+
+    def _months(self) -> int:
+        return self.interval * (12 if self.freq == "YEARLY" else 1)
+
+    def _month_instance(self, anchor: date, month_day: int, n: int) -> int:
+        # Day number of the n-th instance after `anchor` of a monthly/yearly rule
+        month_index = anchor.year * 12 + anchor.month - 1 + n * self._months()
+        year, month = divmod(month_index, 12)
+        last_day = calendar.monthrange(year, month + 1)[1]
+        return date(year, month + 1, min(month_day, last_day)).toordinal()
+
+    def days(self, anchor_day: int, start_day: int, end_day: Optional[int] = None) -> Iterator[int]:
+        # Instances after the one on `anchor_day` that fall in [start_day,
+        # end_day] (unbounded when end_day is None), in order. The first one is
+        # found arithmetically, so a window far from the anchor costs the same
+        # as one next to it.
+        last_day = self.until if end_day is None else min(end_day, self.until or end_day)
+        start_day = max(start_day, anchor_day + 1)
+        if self.freq in ("DAILY", "WEEKLY"):
+            step = self.interval * (7 if self.freq == "WEEKLY" else 1)
+            day = anchor_day + -(-(start_day - anchor_day) // step) * step
+            while last_day is None or day <= last_day:
+                yield day
+                day += step
+            return
+        anchor = date.fromordinal(anchor_day)
+        month_day = self.month_day or anchor.day
+        start = date.fromordinal(start_day)
+        months_ahead = (start.year - anchor.year) * 12 + start.month - anchor.month
+        # Begin at the last instance in or before start's month; it is skipped
+        # below if it falls before start_day
+        n = max(1, months_ahead // self._months())
+        while True:
+            day = self._month_instance(anchor, month_day, n)
+            if last_day is not None and day > last_day:
+                return
+            if day >= start_day:
+                yield day
+            n += 1
+
+    def next_day(self, due_day: int, today: Optional[int] = None) -> Optional[int]:
+        # When the instance due on `due_day` is done: the first later instance
+        # that isn't already in the past, so finishing a daily task a week late
+        # does not leave six overdue copies behind. None once the series has ended.
+        today = today_day_number() if today is None else today
+        return next(self.days(due_day, today), None)
+
+@lru_cache(maxsize=256)
+def parse_rule(text: str) -> Optional[Recurrence]:
+    # None for an empty rule; ValueError for anything outside the supported subset
+    if not text:
+        return None
+    fields = {}
+    for part in text.upper().split(";"):
+        key, sep, value = part.strip().partition("=")
+        if not sep or not value:
+            raise ValueError(f"invalid recurrence rule part: {part!r}")
+        fields[key] = value
+    freq = fields.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"recurrence FREQ must be one of {', '.join(FREQUENCIES)}")
+    try:
+        interval = int(fields.pop("INTERVAL", 1))
+        month_day = int(fields.pop("BYMONTHDAY")) if "BYMONTHDAY" in fields else None
+    except ValueError:
+        raise ValueError("recurrence INTERVAL and BYMONTHDAY must be whole numbers")
+    if interval < 1 or (month_day is not None and not 1 <= month_day <= 31):
+        raise ValueError("recurrence INTERVAL must be at least 1 and BYMONTHDAY between 1 and 31")
+    if month_day is not None and freq not in ("MONTHLY", "YEARLY"):
+        raise ValueError("BYMONTHDAY only applies to MONTHLY and YEARLY rules")
+    until = None
+    if "UNTIL" in fields:
+        until = date_to_day_number(fields.pop("UNTIL"))
+        if until == NO_DUE_DATE:
+            raise ValueError("recurrence UNTIL must be YYYY-MM-DD")
+    if fields:
+        raise ValueError(f"unsupported recurrence rule parts: {', '.join(sorted(fields))}")
+    return Recurrence(freq, interval, month_day, until)
+
+def make_rule(freq: str, interval: int = 1, due_date: Optional[str] = None) -> str:
+    # The rule the edit dialog stores; monthly and yearly rules remember the
+    # due date's day of the month
+    month_day = None
+    if freq in ("MONTHLY", "YEARLY") and date_to_day_number(due_date) != NO_DUE_DATE:
+        month_day = date.fromordinal(date_to_day_number(due_date)).day
+    return Recurrence(freq, interval, month_day).to_rule()
+
+def recurrence_label(text: str) -> str:
+    try:
+        rule = parse_rule(text)
+    except ValueError:
+        return "Repeats (invalid rule)"
+    return rule.label() if rule else ""
+
+def _series(task, rule: Recurrence, anchor_day: int, start_day: int, end_day: int) -> Iterator[Tuple[int, int, object]]:
+    for day in rule.days(anchor_day, start_day, end_day):
+        yield day, task.id or 0, task
+
+def expand_occurrences(tasks: Iterable, start_day: int, end_day: int) -> Iterator:
+    # Virtual instances of the open recurring tasks among `tasks` that fall in
+    # [start_day, end_day], in date order. Each is a copy of its series' current
+    # task with the instance's due date, no id of its own and occurrence_of set
+    # to the series' task id. The window bounds every series, so unbounded ones
+    # stay cheap; the per-series generators are merged without being expanded.
+    series = []
+    for task in tasks:
+        if not task.recurrence or task.completed:
+            continue
+        anchor_day = date_to_day_number(task.due_date)
+        if anchor_day == NO_DUE_DATE or anchor_day >= end_day:
+            continue
+        try:
+            rule = parse_rule(task.recurrence)
+        except ValueError:
+            continue
+        series.append(_series(task, rule, anchor_day, start_day, end_day))
+    for day, _, task in heapq.merge(*series, key=lambda item: item[:2]):
+        yield replace(task, id=None, due_date=day_number_to_date(day), completed=False, tags=list(task.tags),
+                      occurrence_of=task.id)
+
+def merge_occurrences(tasks: List, occurrences: Iterable, descending: bool = False) -> List:
+    # Slots occurrences in among the open tasks of a due-date ordered display
+    # list (filter_and_sort_tasks); on the same day the real tasks come first
+    open_count = next((index for index, task in enumerate(tasks) if task.completed), len(tasks))
+    occurrences = sorted(occurrences, key=SORT_KEYS["Due Date"], reverse=descending)
+    return list(heapq.merge(tasks[:open_count], occurrences, key=SORT_KEYS["Due Date"],
+                            reverse=descending)) + tasks[open_count:]
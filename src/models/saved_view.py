@@ -0,0 +1,134 @@
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional
+
+from .task import today_day_number
+from .tag_index import parse_tag_query
+from .task_filter import (ALL_CATEGORIES, ALL_SUB_CATEGORIES, NEXT_UP, FILTER_FIELDS, SORT_FIELDS,
+                          filter_and_sort_tasks, matches_filters)
+
+# Every field a view can read; a change to any other field never invalidates a view
+TRACKED_FIELDS = ("title", "completed", "due_date", "priority", "category", "sub_category", "tags", "order_key")
+
+@dataclass
+class SavedView:
+    name: str
+    filter_option: str = "All"
+    category: str = ALL_CATEGORIES
+    sub_category: str = ALL_SUB_CATEGORIES
+    sort_option: str = "Due Date"
+    descending: bool = False
+    search_text: str = ""
+    tag_query: str = ""
+    id: Optional[int] = None
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{key: data[key] for key in cls.__dataclass_fields__ if key in data})
+
+    def referenced_fields(self) -> frozenset:
+        # Display order always puts active tasks before completed ones
+        fields = {"completed"} | FILTER_FIELDS[self.filter_option]
+        if self.filter_option != NEXT_UP:
+            fields |= SORT_FIELDS[self.sort_option]
+        if self.category != ALL_CATEGORIES:
+            fields.add("category")
+        if self.sub_category != ALL_SUB_CATEGORIES:
+            fields.add("sub_category")
+        if self.search_text:
+            fields.add("title")
+        if self.tag_query:
+            fields.add("tags")
+        return frozenset(fields)
+
+    def matches(self, task) -> bool:
+        return matches_filters(task, self.filter_option, self.category, self.sub_category, self.search_text.lower(),
+                               parse_tag_query(self.tag_query))
+
+    def evaluate(self, tasks: Iterable) -> List:
+        return filter_and_sort_tasks(tasks, self.filter_option, self.category, self.sub_category,
+                                     self.sort_option, self.descending, self.search_text.lower(), self.tag_query)
+
+def _tracked_values(task):
+    # Tags are copied, since a list edited in place would compare equal to itself
+    return tuple(tuple(value) if isinstance(value, list) else value
+                 for value in (getattr(task, field) for field in TRACKED_FIELDS))
+
+# Ordered task-id results per saved view. Task edits are diffed against the
+# values seen last time, and only views whose predicates or sort read one of
+# the changed fields are dropped; everything else keeps its cached order.
+class SavedViewCache:
+    def __init__(self):
+        self.views: Dict[str, SavedView] = {}
+        self._tasks = {}
+        self._values = {}
+        self._results: Dict[str, List[int]] = {}
+        self._evaluated_on: Dict[str, int] = {}
+
+    def set_views(self, views: Iterable[SavedView]):
+        self.views = {view.name: view for view in views}
+        self._results.clear()
+
+    def add_view(self, view: SavedView):
+        self.views[view.name] = view
+        self._results.pop(view.name, None)
+
+    def remove_view(self, name: str):
+        self.views.pop(name, None)
+        self._results.pop(name, None)
+
+    def set_tasks(self, tasks: Iterable):
+        self._tasks = {task.id: task for task in tasks}
+        self._values = {task_id: _tracked_values(task) for task_id, task in self._tasks.items()}
+        self._results.clear()
+
+    def results(self, name: str) -> List:
+        view = self.views[name]
+        # Next Up scores depend on today's date, so they expire at rollover
+        if view.filter_option == NEXT_UP and self._evaluated_on.get(name) != today_day_number():
+            self._results.pop(name, None)
+        if name not in self._results:
+            self._results[name] = [task.id for task in view.evaluate(self._tasks.values())]
+            self._evaluated_on[name] = today_day_number()
+        return [self._tasks[task_id] for task_id in self._results[name]]
+
+    def is_cached(self, name: str) -> bool:
+        return name in self._results
+
+    def task_added(self, task):
+        self._tasks[task.id] = task
+        self._values[task.id] = _tracked_values(task)
+        for name, view in self.views.items():
+            if name in self._results and view.matches(task):
+                del self._results[name]
+
+    def task_updated(self, task):
+        old_values = self._values.get(task.id)
+        if old_values is None:
+            self.task_added(task)
+            return
+        new_values = _tracked_values(task)
+        self._tasks[task.id] = task
+        self._values[task.id] = new_values
+        changed = {field for field, old, new in zip(TRACKED_FIELDS, old_values, new_values) if old != new}
+        if not changed:
+            return
+        for name, view in self.views.items():
+            if name in self._results and changed & view.referenced_fields():
+                del self._results[name]
+
+    def tasks_removed(self, task_ids: Iterable[int]):
+        removed = set(task_ids)
+        for task_id in removed:
+            self._tasks.pop(task_id, None)
+            self._values.pop(task_id, None)
+        for name, result in list(self._results.items()):
+            if not removed.intersection(result):
+                continue
+            if self.views[name].filter_option == NEXT_UP:
+                # The next most urgent task has to move up into the top-K
+                del self._results[name]
+            else:
+                self._results[name] = [task_id for task_id in result if task_id not in removed]
@@ -0,0 +1,122 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+# Tags are free-form labels compared case-insensitively; the first spelling
+# seen is the one shown. They never contain whitespace, commas or "|" and
+# never start with "-" or "#", so a list of them can be typed as "a, b c" and
+# a filter as a query (TagQuery).
+_TAG_SPLIT = re.compile(r"[\s,]+")
+
+def normalize_tags(names: Iterable[str]) -> List[str]:
+    tags, seen = [], set()
+    for name in names:
+        tag = _TAG_SPLIT.sub("-", (name or "").replace("|", "").strip()).lstrip("#-")
+        if tag and tag.lower() not in seen:
+            seen.add(tag.lower())
+            tags.append(tag)
+    return tags
+
+def parse_tags(text: str) -> List[str]:
+    return normalize_tags(_TAG_SPLIT.split(text or ""))
+
+@dataclass(frozen=True)
+class TagQuery:
+    # "work|home urgent -someday": every whitespace-separated term must hold.
+    # A term holds for a task having any of its "|"-separated tags; a term
+    # starting with "-" holds for tasks having none of them.
+    groups: Tuple[FrozenSet[str], ...] = ()
+    excluded: FrozenSet[str] = frozenset()
+
+    def __bool__(self):
+        return bool(self.groups or self.excluded)
+
+    def matches(self, tags: Iterable[str]) -> bool:
+        keys = {tag.lower() for tag in tags}
+        return all(keys & group for group in self.groups) and not keys & self.excluded
+
+@lru_cache(maxsize=64)
+def parse_tag_query(text: str) -> TagQuery:
+    groups, excluded = [], set()
+    for term in (text or "").lower().split():
+        negated = term.startswith("-")
+        alternatives = frozenset(tag.lower() for tag in normalize_tags(term.lstrip("-").split("|")))
+        if not alternatives:
+            continue
+        if negated:
+            excluded |= alternatives
+        else:
+            groups.append(alternatives)
+    return TagQuery(tuple(groups), frozenset(excluded))
+
+# The ids of the tasks carrying each tag, kept up to date edit by edit like
+# NextUpIndex, so a tag query is a few set unions, intersections and
+# differences instead of a pass over every task.
+class TagIndex:
+    def __init__(self):
+        self._tasks: Dict[int, object] = {}
+        self._tags_of: Dict[int, FrozenSet[str]] = {}
+        self._ids_by_tag: Dict[str, Set[int]] = {}
+        self._names: Dict[str, str] = {}
+
+    def rebuild(self, tasks: Iterable):
+        self._tasks.clear()
+        self._tags_of.clear()
+        self._ids_by_tag.clear()
+        self._names.clear()
+        for task in tasks:
+            self.update(task)
+
+    def update(self, task):
+        keys = frozenset(tag.lower() for tag in task.tags)
+        old_keys = self._tags_of.get(task.id, frozenset())
+        self._tasks[task.id] = task
+        if keys == old_keys:
+            return
+        self._tags_of[task.id] = keys
+        for key in old_keys - keys:
+            self._discard(key, task.id)
+        for tag in task.tags:
+            key = tag.lower()
+            self._names.setdefault(key, tag)
+            self._ids_by_tag.setdefault(key, set()).add(task.id)
+
+    def remove(self, task_ids: Iterable[int]):
+        for task_id in task_ids:
+            self._tasks.pop(task_id, None)
+            for key in self._tags_of.pop(task_id, ()):
+                self._discard(key, task_id)
+
+    def _discard(self, key: str, task_id: int):
+        ids = self._ids_by_tag.get(key)
+        if ids is not None:
+            ids.discard(task_id)
+            if not ids:
+                del self._ids_by_tag[key]
+                del self._names[key]
+
+    def tag_names(self) -> List[str]:
+        return sorted(self._names.values(), key=str.lower)
+
+    def count(self, tag: str) -> int:
+        return len(self._ids_by_tag.get(tag.lower(), ()))
+
+    def select(self, query: TagQuery) -> Set[int]:
+        # Smallest term first, so the running intersection only ever shrinks
+        # from the smallest candidate set
+        terms = sorted((set().union(*(self._ids_by_tag.get(key, ()) for key in group)) for group in query.groups),
+                       key=len)
+        if terms:
+            ids = terms[0]
+            for term in terms[1:]:
+                ids &= term
+        else:
+            ids = set(self._tasks)
+        for key in query.excluded:
+            ids -= self._ids_by_tag.get(key, set())
+        return ids
+
+    def tasks(self, query: TagQuery) -> List:
+        # In id order, so tasks a later sort finds equal keep a stable order
+        return [self._tasks[task_id] for task_id in sorted(self.select(query))]
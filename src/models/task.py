@@ -1,23 +1,89 @@
 from dataclasses import dataclass, field
+from enum import IntEnum
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
+
+# Due dates are handled as "YYYY-MM-DD" strings in the UI; aggregations and
+# range queries work on proleptic Gregorian day numbers (date.toordinal()).
+NO_DUE_DATE = -1
+
+def date_to_day_number(date_str: Optional[str]) -> int:
+    if not date_str:
+        return NO_DUE_DATE
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").toordinal()
+    except ValueError:
+        return NO_DUE_DATE
+
+def day_number_to_date(day_number: int) -> Optional[str]:
+    if day_number is None or day_number == NO_DUE_DATE:
+        return None
+    return date.fromordinal(day_number).strftime("%Y-%m-%d")
+
+def today_day_number() -> int:
+    return date.today().toordinal()
+
+# Stored as a small integer so the database can sort and index priorities;
+# the UI keeps working with the labels below.
+class Priority(IntEnum):
+    NONE = 0
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+PRIORITY_LABELS = {
+    Priority.NONE: "",
+    Priority.LOW: "Low",
+    Priority.MEDIUM: "Medium",
+    Priority.HIGH: "High",
+}
+
+# Legacy spellings written by older versions ("Med" was the add_task default)
+_PRIORITY_SPELLINGS = {
+    "": Priority.NONE,
+    "low": Priority.LOW,
+    "med": Priority.MEDIUM,
+    "medium": Priority.MEDIUM,
+    "high": Priority.HIGH,
+}
+
+def priority_from_label(label) -> Priority:
+    if isinstance(label, int):
+        try:
+            return Priority(label)
+        except ValueError:
+            return Priority.NONE
+    return _PRIORITY_SPELLINGS.get((label or "").strip().lower(), Priority.NONE)
+
+def priority_label(value) -> str:
+    return PRIORITY_LABELS[priority_from_label(value)]
 
 @dataclass
 class Task:
     id: Optional[int] = None
     title: str = ""
-    description: str = ""
+    # description and notes are None when not loaded: list reads leave them in
+    # the database (DatabaseManager.get_task_details) and carry has_notes instead
+    description: Optional[str] = ""
     due_date: Optional[str] = None
     priority: str = "Medium"
     completed: bool = False
     category: str = "Other"
     sub_category: str = ""
-    notes: str = ""
+    notes: Optional[str] = ""
+    has_notes: bool = False
     tags: List[str] = field(default_factory=list)
+    recurrence: str = ""  # rule text, see models/recurrence.py
+    order_key: str = ""  # place in the "Manual" sort, see models/order_key.py
+    # Set only on the virtual, not yet stored instances of a recurring task:
+    # the id of the task whose series they belong to
+    occurrence_of: Optional[int] = None
 
     def __post_init__(self):
         if isinstance(self.due_date, datetime):
             self.due_date = self.due_date.strftime("%Y-%m-%d")
+        if self.notes is not None:
+            self.has_notes = bool(self.notes)
 
     def to_dict(self):
         return {
@@ -30,7 +96,10 @@ class Task:
             "category": self.category,
             "sub_category": self.sub_category,
             "notes": self.notes,
-            "tags": self.tags
+            "has_notes": self.has_notes,
+            "tags": self.tags,
+            "recurrence": self.recurrence,
+            "order_key": self.order_key
         }
 
     @classmethod
@@ -45,7 +114,10 @@ class Task:
             category=data.get("category", "Other"),
             sub_category=data.get("sub_category", ""),
             notes=data.get("notes", ""),
-            tags=data.get("tags", [])
+            has_notes=data.get("has_notes", False),
+            tags=data.get("tags", []),
+            recurrence=data.get("recurrence") or "",
+            order_key=data.get("order_key") or ""
         )
 
     def __str__(self):
@@ -53,7 +125,7 @@ class Task:
         due_date_str = f", Due: {self.due_date}" if self.due_date else ""
         tags_str = f", Tags: {', '.join(self.tags)}" if self.tags else ""
         sub_category_str = f" - {self.sub_category}" if self.sub_category else ""
-        notes_indicator = " 📝" if self.notes else ""  # Add notes indicator
+        notes_indicator = " 📝" if self.has_notes else ""  # Add notes indicator
         return f"[{self.priority}] {self.title}{notes_indicator} ({status}{due_date_str}) - {self.category}{sub_category_str}{tags_str}"
 
     def is_overdue(self):
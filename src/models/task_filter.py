@@ -0,0 +1,73 @@
+from typing import Iterable, List, Optional
+
+from .next_up import select_next_up
+from .tag_index import TagIndex, TagQuery, parse_tag_query
+from .task import priority_from_label
+
+ALL_CATEGORIES = "All Categories"
+ALL_SUB_CATEGORIES = "All Sub-Categories"
+NEXT_UP = "Next Up"
+MANUAL_SORT = "Manual"
+FILTER_OPTIONS = ["All", "Active", "Completed", NEXT_UP]
+SORT_OPTIONS = ["Due Date", "Priority", "Category", "Sub-Category", MANUAL_SORT]
+
+SORT_KEYS = {
+    "Due Date": lambda x: x.due_date or "9999-99-99",
+    "Priority": lambda x: -priority_from_label(x.priority),
+    "Category": lambda x: (x.category.lower(), x.sub_category.lower()),
+    "Sub-Category": lambda x: (x.sub_category.lower(), x.category.lower()),
+    # Ties, which only concurrent writers produce, by id
+    MANUAL_SORT: lambda x: (x.order_key, x.id)
+}
+
+# Task fields read by each filter and sort option, used to work out which
+# cached results a task edit can affect
+FILTER_FIELDS = {
+    "All": frozenset(),
+    "Active": frozenset({"completed"}),
+    "Completed": frozenset({"completed"}),
+    NEXT_UP: frozenset({"completed", "priority", "due_date"}),
+}
+SORT_FIELDS = {
+    "Due Date": frozenset({"due_date"}),
+    "Priority": frozenset({"priority"}),
+    "Category": frozenset({"category", "sub_category"}),
+    "Sub-Category": frozenset({"category", "sub_category"}),
+    MANUAL_SORT: frozenset({"order_key"}),
+}
+
+def load_order_key(task):
+    # Open tasks first, then by due date with undated tasks last, ties by id: the
+    # order DatabaseManager.iter_task_chunks() yields and the default view shows
+    return (task.completed, not task.due_date, task.due_date or "", task.id)
+
+def matches_filters(task, filter_option="All", category_filter=ALL_CATEGORIES,
+                    sub_category_filter=ALL_SUB_CATEGORIES, search_text="",
+                    tag_query: Optional[TagQuery] = None) -> bool:
+    # search_text is expected in lower case
+    return ((filter_option == "All" or
+             (filter_option in ("Active", NEXT_UP) and not task.completed) or
+             (filter_option == "Completed" and task.completed)) and
+            (category_filter == ALL_CATEGORIES or task.category == category_filter) and
+            (sub_category_filter == ALL_SUB_CATEGORIES or task.sub_category == sub_category_filter) and
+            (not search_text or search_text in task.title.lower()) and
+            (not tag_query or tag_query.matches(task.tags)))
+
+def filter_and_sort_tasks(tasks: Iterable, filter_option="All", category_filter=ALL_CATEGORIES,
+                          sub_category_filter=ALL_SUB_CATEGORIES, sort_option="Due Date", descending=False,
+                          search_text="", tag_query="", tag_index: Optional[TagIndex] = None) -> List:
+    # Returns tasks in display order: active tasks first, then completed ones.
+    # "Next Up" ignores the sort option and orders by urgency instead. With a
+    # tag_index holding the same tasks, a tag query narrows them down by set
+    # operations first instead of being checked task by task.
+    query = parse_tag_query(tag_query)
+    if query and tag_index is not None:
+        tasks, query = tag_index.tasks(query), None
+    filtered = (task for task in tasks
+                if matches_filters(task, filter_option, category_filter, sub_category_filter, search_text, query))
+    if filter_option == NEXT_UP:
+        return select_next_up(filtered)
+
+    filtered = list(filtered)
+    filtered.sort(key=SORT_KEYS[sort_option], reverse=descending)
+    return [task for task in filtered if not task.completed] + [task for task in filtered if task.completed]
@@ -0,0 +1,151 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .task import NO_DUE_DATE, date_to_day_number
+
+INITIAL_CAPACITY = 1024
+
+# Columnar copy of the task table used for vectorized statistics. Rows live in
+# parallel NumPy arrays and _rows maps task ids to row positions, so a single
+# task change is an O(1) update instead of a rebuild.
+class TaskSnapshot:
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self.categories: List[str] = []
+        self.sub_categories: List[str] = []
+        self._category_codes: Dict[str, int] = {}
+        self._sub_category_codes: Dict[str, int] = {}
+        self._allocate(max(capacity, 1))
+
+    def _allocate(self, capacity):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.due_days = np.full(capacity, NO_DUE_DATE, dtype=np.int32)
+        self.completed = np.zeros(capacity, dtype=np.bool_)
+        self.category_codes = np.zeros(capacity, dtype=np.int32)
+        self.sub_category_codes = np.zeros(capacity, dtype=np.int32)
+
+    @classmethod
+    def from_database(cls, db_manager) -> "TaskSnapshot":
+        return cls.from_rows(db_manager.get_task_columns())
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "TaskSnapshot":
+        snapshot = cls(capacity=len(rows))
+        count = len(rows)
+        if count:
+            ids, due_dates, completed, categories, sub_categories = zip(*rows)
+            snapshot.ids[:count] = ids
+            # The database stores due dates as day numbers already
+            snapshot.due_days[:count] = [NO_DUE_DATE if d is None else d for d in due_dates]
+            snapshot.completed[:count] = [bool(c) for c in completed]
+            snapshot.category_codes[:count] = [snapshot._code(snapshot._category_codes, snapshot.categories, c)
+                                               for c in categories]
+            snapshot.sub_category_codes[:count] = [snapshot._code(snapshot._sub_category_codes, snapshot.sub_categories, s)
+                                                   for s in sub_categories]
+            snapshot._rows = {task_id: row for row, task_id in enumerate(ids)}
+            snapshot._size = count
+        return snapshot
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _code(codes, names, name):
+        name = name or ""
+        code = codes.get(name)
+        if code is None:
+            code = len(names)
+            codes[name] = code
+            names.append(name)
+        return code
+
+    def _grow(self):
+        old = (self.ids, self.due_days, self.completed, self.category_codes, self.sub_category_codes)
+        self._allocate(len(self.ids) * 2)
+        for new_array, old_array in zip((self.ids, self.due_days, self.completed,
+                                         self.category_codes, self.sub_category_codes), old):
+            new_array[:self._size] = old_array[:self._size]
+
+    # Incremental maintenance
+
+    def upsert(self, task):
+        row = self._rows.get(task.id)
+        if row is None:
+            if self._size == len(self.ids):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[task.id] = row
+            self.ids[row] = task.id
+        self.due_days[row] = date_to_day_number(task.due_date)
+        self.completed[row] = bool(task.completed)
+        self.category_codes[row] = self._code(self._category_codes, self.categories, task.category)
+        self.sub_category_codes[row] = self._code(self._sub_category_codes, self.sub_categories, task.sub_category)
+
+    def remove(self, task_ids: Iterable[int]):
+        for task_id in task_ids:
+            row = self._rows.pop(task_id, None)
+            if row is None:
+                continue
+            last = self._size - 1
+            if row != last:
+                # Move the last row into the hole so the arrays stay dense
+                for array in (self.ids, self.due_days, self.completed, self.category_codes, self.sub_category_codes):
+                    array[row] = array[last]
+                self._rows[int(self.ids[row])] = row
+            self._size = last
+
+    # Vectorized aggregations
+
+    def _view(self):
+        n = self._size
+        return self.due_days[:n], self.completed[:n], self.category_codes[:n], self.sub_category_codes[:n]
+
+    def _overdue_mask(self, today: int):
+        due_days, completed, _, _ = self._view()
+        return (~completed) & (due_days != NO_DUE_DATE) & (due_days < today)
+
+    def category_counts(self, sub_categories: bool = False) -> Dict[str, Tuple[int, int]]:
+        _, completed, category_codes, sub_category_codes = self._view()
+        codes = sub_category_codes if sub_categories else category_codes
+        names = self.sub_categories if sub_categories else self.categories
+        totals = np.bincount(codes, minlength=len(names))
+        done = np.bincount(codes, weights=completed, minlength=len(names)).astype(np.int64)
+        return {name: (int(totals[code]), int(done[code])) for code, name in enumerate(names) if totals[code]}
+
+    def overdue_count(self, today: int) -> int:
+        return int(np.count_nonzero(self._overdue_mask(today)))
+
+    def overdue_by_category(self, today: int) -> Dict[str, int]:
+        _, _, category_codes, _ = self._view()
+        counts = np.bincount(category_codes[self._overdue_mask(today)], minlength=len(self.categories))
+        return {name: int(counts[code]) for code, name in enumerate(self.categories) if counts[code]}
+
+    def completion_rate_by_week(self, start_day: int, weeks: int) -> List[Tuple[int, int, int]]:
+        # Buckets are Monday-based weeks of the due date (ordinal day 1 is a Monday)
+        due_days, completed, _, _ = self._view()
+        first_week = (start_day - 1) // 7
+        week = (due_days - 1) // 7 - first_week
+        mask = (due_days != NO_DUE_DATE) & (week >= 0) & (week < weeks)
+        totals = np.bincount(week[mask], minlength=weeks)
+        done = np.bincount(week[mask], weights=completed[mask], minlength=weeks).astype(np.int64)
+        return [((first_week + i) * 7 + 1, int(totals[i]), int(done[i])) for i in range(weeks)]
+
+    def due_histogram(self, start_day: int, days: int, open_only: bool = True) -> np.ndarray:
+        due_days, completed, _, _ = self._view()
+        offset = due_days - start_day
+        mask = (due_days != NO_DUE_DATE) & (offset >= 0) & (offset < days)
+        if open_only:
+            mask &= ~completed
+        return np.bincount(offset[mask], minlength=days)
+
+    def summary(self, today: int) -> Dict[str, Optional[int]]:
+        due_days, completed, _, _ = self._view()
+        return {
+            "total": self._size,
+            "completed": int(np.count_nonzero(completed)),
+            "open": int(self._size - np.count_nonzero(completed)),
+            "overdue": self.overdue_count(today),
+            "no_due_date": int(np.count_nonzero(due_days == NO_DUE_DATE)),
+        }
@@ -0,0 +1,30 @@
+import sqlite3
+import logging
+from PySide6.QtCore import QThread, Signal
+
+# Runs a long database or file operation on a worker thread. The function is
+# called with progress= and is_cancelled= keyword arguments, as the streaming
+# import/export functions expect; cancel() asks it to stop between chunks.
+class BackgroundJob(QThread):
+    progress = Signal(int, int)  # items done, percent
+    succeeded = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, function, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            result = self.function(*self.args, progress=self.progress.emit,
+                                   is_cancelled=self.isInterruptionRequested, **self.kwargs)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            logging.error("Background job %s failed: %s", self.function.__name__, e)
+            self.failed.emit(str(e))
+            return
+        self.succeeded.emit(result)
+
+    def cancel(self):
+        self.requestInterruption()
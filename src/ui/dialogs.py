@@ -1,15 +1,23 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTextEdit,
                                QComboBox, QLabel, QDialogButtonBox,
                                QListWidget, QPushButton, QInputDialog, QMessageBox,
-                               QCalendarWidget, QLineEdit)
+                               QLineEdit)
 from PySide6.QtCore import QDate, Qt, QTimer, QSize
 from PySide6.QtGui import QTextOption
 from datetime import datetime
+from models.recurrence import make_rule, parse_rule, recurrence_label
+from models.tag_index import parse_tags
+from .heatmap_calendar import HeatmapCalendar
+
+# Choices of the edit dialog's Repeat box: label, frequency, interval
+REPEAT_OPTIONS = [("Does not repeat", None, 1), ("Every day", "DAILY", 1), ("Every week", "WEEKLY", 1),
+                  ("Every 2 weeks", "WEEKLY", 2), ("Every month", "MONTHLY", 1), ("Every year", "YEARLY", 1)]
 
 class TaskEditDialog(QDialog):
-    def __init__(self, task, categories, sub_categories, parent=None, date_format="%Y-%m-%d"):
+    def __init__(self, task, categories, sub_categories, parent=None, date_format="%Y-%m-%d", day_counts=None):
         super().__init__(parent)
         self.task = task
+        self.day_counts = day_counts
         self.categories = categories
         self.sub_categories = sub_categories
         self.date_format = date_format
@@ -58,8 +66,7 @@ class TaskEditDialog(QDialog):
         layout.addWidget(QLabel("Due Date:"))
         layout.addWidget(self.due_date_button)
 
-        self.calendar_widget = QCalendarWidget(self)
-        self.calendar_widget.setWindowFlags(Qt.Popup)
+        self.calendar_widget = HeatmapCalendar(self.day_counts, self)
         self.calendar_widget.activated.connect(self.on_date_selected)
         self.calendar_widget.hide()
 
@@ -68,6 +75,23 @@ class TaskEditDialog(QDialog):
         else:
             self.set_date(QDate.currentDate())
 
+        self.repeat_combo = QComboBox()
+        self.repeat_combo.addItems([label for label, _, _ in REPEAT_OPTIONS])
+        self.initial_repeat_index = self.find_repeat_option()
+        if self.initial_repeat_index is None:
+            # A rule the presets can't express (an end date, another interval) is
+            # offered as is
+            self.repeat_combo.addItem(recurrence_label(self.task.recurrence))
+            self.initial_repeat_index = len(REPEAT_OPTIONS)
+        self.repeat_combo.setCurrentIndex(self.initial_repeat_index)
+        layout.addWidget(QLabel("Repeat:"))
+        layout.addWidget(self.repeat_combo)
+
+        self.tags_input = QLineEdit(", ".join(self.task.tags))
+        self.tags_input.setPlaceholderText("Separate tags with spaces or commas")
+        layout.addWidget(QLabel("Tags:"))
+        layout.addWidget(self.tags_input)
+
         # Add notes field
         layout.addWidget(QLabel("Notes:"))
         self.notes_input = QTextEdit(self.task.notes)
@@ -83,6 +107,18 @@ class TaskEditDialog(QDialog):
 
         self.adjust_size()
 
+    def find_repeat_option(self):
+        try:
+            rule = parse_rule(self.task.recurrence)
+        except ValueError:
+            return None
+        if rule is None:
+            return 0
+        if rule.until is not None:
+            return None
+        return next((index for index, (_, freq, interval) in enumerate(REPEAT_OPTIONS)
+                     if (freq, interval) == (rule.freq, rule.interval)), None)
+
     def show_calendar(self):
         button_pos = self.due_date_button.mapToGlobal(self.due_date_button.rect().bottomLeft())
         self.calendar_widget.move(button_pos)
@@ -104,6 +140,8 @@ class TaskEditDialog(QDialog):
         self.task.category = self.category_combo.currentText()
         self.task.sub_category = self.sub_category_combo.currentText()
         self.task.notes = self.notes_input.toPlainText()  # Get notes content
+        self.task.has_notes = bool(self.task.notes)
+        self.task.tags = parse_tags(self.tags_input.text())
         # Convert the displayed date back to yyyy-MM-dd format for storage
         displayed_date = self.due_date_button.text()
         try:
@@ -112,6 +150,12 @@ class TaskEditDialog(QDialog):
         except ValueError:
             # If parsing fails, keep the original date
             pass
+        repeat_index = self.repeat_combo.currentIndex()
+        if repeat_index != self.initial_repeat_index:
+            # An unchanged choice keeps the stored rule, whose day of the month
+            # may differ from a clamped due date
+            _, freq, interval = REPEAT_OPTIONS[repeat_index]
+            self.task.recurrence = make_rule(freq, interval, self.task.due_date) if freq else ""
         return self.task
 
     def on_text_changed(self):
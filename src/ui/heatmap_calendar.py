@@ -0,0 +1,42 @@
+from PySide6.QtCore import QDate, Qt
+from PySide6.QtGui import QColor, QTextCharFormat
+from PySide6.QtWidgets import QCalendarWidget
+
+# Days with this many open tasks get the full highlight colour
+FULL_HEAT_COUNT = 5
+MAX_HEAT_ALPHA = 0.6
+# Day numbers (date.toordinal()) start at 0001-01-01, which is QDate's Julian day 1721426
+JULIAN_DAY_OFFSET = 1721425
+
+def heat_color(base: QColor, highlight: QColor, count: int) -> QColor:
+    # Blends from the calendar's base colour towards its highlight colour
+    weight = MAX_HEAT_ALPHA * min(count, FULL_HEAT_COUNT) / FULL_HEAT_COUNT
+    return QColor(round(base.red() + (highlight.red() - base.red()) * weight),
+                  round(base.green() + (highlight.green() - base.green()) * weight),
+                  round(base.blue() + (highlight.blue() - base.blue()) * weight))
+
+# A date picker popup whose days are shaded by how many open tasks are already
+# due on them. The shown month's counts come from a models.due_day_counts
+# DueDayCounts, which caches them, so paging and reopening stay cheap.
+class HeatmapCalendar(QCalendarWidget):
+    def __init__(self, day_counts=None, parent=None):
+        super().__init__(parent)
+        self.day_counts = day_counts
+        self.setWindowFlags(Qt.Popup)
+        self.currentPageChanged.connect(self.shade_month)
+
+    def showEvent(self, event):
+        # Counts may have changed while the popup was hidden
+        self.shade_month(self.yearShown(), self.monthShown())
+        super().showEvent(event)
+
+    def shade_month(self, year, month):
+        self.setDateTextFormat(QDate(), QTextCharFormat())  # a null date clears every day
+        if self.day_counts is None:
+            return
+        base, highlight = self.palette().base().color(), self.palette().highlight().color()
+        for day, count in self.day_counts.month(year, month).items():
+            text_format = QTextCharFormat()
+            text_format.setBackground(heat_color(base, highlight, count))
+            text_format.setToolTip(f"{count} open task{'s' if count != 1 else ''} due")
+            self.setDateTextFormat(QDate.fromJulianDay(day + JULIAN_DAY_OFFSET), text_format)
@@ -1,22 +1,41 @@
 from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor
 from PySide6.QtCore import Qt
-from PySide6.QtSvg import QSvgRenderer
+from diagnostics.tracing import traced, increment
 
+# Each task row asks for the same three icons, so rendered icons are cached by
+# path and resolved colour, and the SVG renderer is only imported on first use.
+_icon_cache = {}
+_renderers = {}
+
+@traced("icons.create_colored_icon")
 def create_colored_icon(icon_path, base_color, background_color, icon_color=None):
-    renderer = QSvgRenderer(icon_path)
+    if icon_color is None:
+        icon_color = adjust_icon_color_for_theme(base_color, background_color)
+
+    key = (icon_path, icon_color.rgba())
+    icon = _icon_cache.get(key)
+    if icon is not None:
+        increment("icons.cache_hits")
+        return icon
+    increment("icons.cache_misses")
+
+    renderer = _renderers.get(icon_path)
+    if renderer is None:
+        from PySide6.QtSvg import QSvgRenderer
+        renderer = _renderers[icon_path] = QSvgRenderer(icon_path)
     pixmap = QPixmap(24, 24)
     pixmap.fill(Qt.transparent)
     painter = QPainter(pixmap)
     renderer.render(painter)
     
-    if icon_color is None:
-        icon_color = adjust_icon_color_for_theme(base_color, background_color)
-    
     painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
     painter.fillRect(pixmap.rect(), icon_color)
     painter.end()
     
-    return QIcon(pixmap)
+    icon = QIcon(pixmap)
+    if not icon.isNull():
+        _icon_cache[key] = icon
+    return icon
 
 def adjust_icon_color_for_theme(base_color, background_color):
     background_brightness = (background_color.red() * 299 + background_color.green() * 587 + background_color.blue() * 114) / 1000
@@ -0,0 +1,71 @@
+import logging
+from PySide6.QtCore import QEvent, QObject, QTimer, Signal
+from PySide6.QtWidgets import QApplication
+
+# Wait this long after the last key press, click or scroll before running a step
+IDLE_DELAY_MS = 2000
+INPUT_EVENTS = frozenset({QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.MouseButtonDblClick, QEvent.MouseMove,
+                          QEvent.Wheel, QEvent.TouchBegin, QEvent.TouchUpdate})
+
+# Runs deferrable housekeeping on the GUI thread while the user is idle. A job
+# is a step function doing one bounded batch and returning True while more work
+# remains; steps run one per event-loop pass, and any input pushes the next one
+# back by IDLE_DELAY_MS. The application-wide event filter that notices input
+# is only installed while work is queued.
+class IdleTaskRunner(QObject):
+    finished = Signal(str)  # job name
+
+    def __init__(self, parent=None, idle_delay_ms=IDLE_DELAY_MS):
+        super().__init__(parent)
+        self.idle_delay_ms = idle_delay_ms
+        self._jobs = {}  # name -> step, run in submission order
+        self._watching = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.run_step)
+
+    def submit(self, name, step):
+        # A job already queued under `name` keeps its place
+        self._jobs.setdefault(name, step)
+        if not self._watching:
+            QApplication.instance().installEventFilter(self)
+            self._watching = True
+        if not self.timer.isActive():
+            self.timer.start(self.idle_delay_ms)
+
+    def is_pending(self, name):
+        return name in self._jobs
+
+    def stop(self):
+        self._jobs.clear()
+        self._idle()
+
+    def eventFilter(self, obj, event):
+        if event.type() in INPUT_EVENTS:
+            self.timer.start(self.idle_delay_ms)
+        return False
+
+    def run_step(self):
+        if not self._jobs:
+            self._idle()
+            return
+        name, step = next(iter(self._jobs.items()))
+        try:
+            more = step()
+        except Exception:
+            logging.exception("Idle job %s failed", name)
+            more = False
+        if not more:
+            self._jobs.pop(name, None)
+            self.finished.emit(name)
+        if self._jobs:
+            # Back to the event loop between batches, so pending input is seen
+            self.timer.start(0)
+        else:
+            self._idle()
+
+    def _idle(self):
+        self.timer.stop()
+        if self._watching:
+            QApplication.instance().removeEventFilter(self)
+            self._watching = False
@@ -1,19 +1,58 @@
-import os, sys, logging
+import os, sys, time, bisect, logging
+from datetime import datetime
+from collections import deque
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QComboBox,
-                               QLabel, QMessageBox, QStyledItemDelegate, QStyle, QToolButton, QCalendarWidget, QInputDialog)
+                               QLabel, QMessageBox, QStyledItemDelegate, QStyle, QToolButton, QInputDialog,
+                               QFileDialog, QProgressDialog, QCheckBox)
 from PySide6.QtCore import Qt, QSize, Slot, QDate, QSettings, QEvent, QTimer
-from PySide6.QtGui import QIcon, QColor, QAction
-
-from models.task import Task
+from PySide6.QtGui import QIcon, QColor, QAction, QKeySequence, QUndoStack
+
+from models.task import Task, today_day_number
+from models.next_up import NextUpIndex
+from models.tag_index import TagIndex
+from models.due_day_counts import DueDayCounts
+from models.recurrence import expand_occurrences, merge_occurrences
+from models.saved_view import SavedView, SavedViewCache
+from models.task_filter import (ALL_CATEGORIES, ALL_SUB_CATEGORIES, FILTER_OPTIONS, MANUAL_SORT, NEXT_UP,
+                                SORT_KEYS, SORT_OPTIONS, filter_and_sort_tasks, load_order_key, matches_filters)
+from models.order_key import LONG_KEY_LENGTH, is_order_key, key_between, respace
+from database.db_manager import NOTES_CHUNK_CHARS, DatabaseManager
+from database.maintenance import maintenance_plan, run_maintenance_step
+from database.list_cache import (CACHED_ROWS, cache_path_for, read_list_cache, remove_list_cache,
+                                 write_list_cache)
 from .todo_list_widget import TodoListWidget
-from .dialogs import TaskEditDialog, CategoryManageDialog
-from .color_dialog import ColorCustomizationDialog
 from .icon_utils import create_colored_icon
-from .task_widget import TaskWidget
 from .icon_color_adjuster import adjust_icon_color_for_theme
+from .overdue_scheduler import OverdueScheduler
+from .task_loader import TaskLoader
+from .background_job import BackgroundJob
+from .idle_runner import IdleTaskRunner
+from .undo_commands import DeleteTasksCommand, MoveTaskCommand, UpdateTaskCommand
+from diagnostics.tracing import span, traced
 
 WINDOW_TITLE = "Todo App"
 INITIAL_WINDOW_SIZE = QSize(900, 700)
+CUSTOM_VIEW = "Custom"
+# Minimum time spent adding rows per event-loop pass while loading
+ROW_RENDER_BUDGET_MS = 30
+# How often to look for commits made by other windows, the CLI or the API
+EXTERNAL_CHANGE_POLL_MS = 1000
+BACKUP_INTERVAL_MS = 60 * 60 * 1000
+# First automatic backup check, once startup work has settled
+BACKUP_STARTUP_DELAY_MS = 60 * 1000
+# Completed tasks move to the archive table this many days after completion
+DEFAULT_ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_INTERVAL_MS = 60 * 60 * 1000
+# Tasks archived per idle-time step, and archived rows shown per page
+ARCHIVE_BATCH_SIZE = 200
+ARCHIVE_PAGE_SIZE = 100
+# Deleted tasks can be brought back (Edit > Undo) until they are purged, in
+# idle-time batches, this many days later
+DELETED_RETENTION_DAYS = 7
+PURGE_BATCH_SIZE = 200
+UNDO_LIMIT = 100
+# Coming instances of recurring tasks are shown this many days ahead
+RECURRENCE_PREVIEW_DAYS = 14
 
 class CustomComboBox(QComboBox):
     def __init__(self, parent=None):
@@ -52,19 +91,88 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.db_manager = db_manager
         self.all_tasks = []
+        self.task_snapshot = None
+        self.performance_dialog = None
+        self.next_up = NextUpIndex()
+        self.tag_index = TagIndex()
+        self.day_counts = DueDayCounts(self.db_manager.get_open_task_counts)
+        self.saved_views = SavedViewCache()
+        self.saved_views.set_views(SavedView.from_dict(view) for view in self.db_manager.get_all_views())
         self.categories = self.db_manager.get_all_categories()
         self.sub_categories = self.db_manager.get_all_sub_categories()
         self.date_format = self.db_manager.get_date_format()
         
+        self.overdue_scheduler = OverdueScheduler(self)
+        self.task_loader = None
+        self.background_job = None
+        self.api_server = None
+        self._pending_chunks = deque()
+        self._pending_rows = deque()
+        self._last_slice_end = 0.0
+        self._skip_ids = set()
+        self._prefilled_ids = set()
+        self._cached_revision = 0
+        self._refresh_after_load = False
+        # A connection of its own that stays open, so PRAGMA data_version tells
+        # when anyone else (including self.db_manager) has committed
+        self.change_monitor = DatabaseManager(self.db_manager.db_name, persistent=True)
+        self._data_version = 0
+        self._synced_revision = 0
+        self.archive_after_days = int(self.db_manager.get_setting("archive_after_days",
+                                                                  str(DEFAULT_ARCHIVE_AFTER_DAYS)))
+        self.idle_runner = IdleTaskRunner(self)
+        self._archived_in_pass = 0
+        self._refresh_after_archive = False
+        self._purged_in_pass = 0
+        self._maintenance_steps = deque()
+        self._reclaimed_in_pass = 0
+        # A slot of its own, so idle-time upkeep never holds up the user's jobs
+        self.maintenance_job = None
+        # Tasks whose order keys have grown long, respaced while idle
+        self._long_order_keys = set()
+        self.undo_stack = QUndoStack(self)
+        self.undo_stack.setUndoLimit(UNDO_LIMIT)
+        # Archived rows below the live ones, and what the next page is read with
+        self._archived_rows = {}
+        self._archive_query = None
+        self._archive_cursor = None
+        # Notes longer than a chunk, still loading: task id -> (task, chunks so
+        # far, full length), see load_task_details()
+        self._notes_loads = {}
+        self.notes_timer = QTimer(self)
+        self.notes_timer.setSingleShot(True)
+        self.notes_timer.timeout.connect(self.load_next_notes_chunk)
+        # Adds rows in short time slices so input and painting stay responsive
+        self.chunk_timer = QTimer(self)
+        self.chunk_timer.setInterval(0)
+        self.chunk_timer.timeout.connect(self.render_next_chunk)
+
         self.setup_ui()
         self.connect_signals()
         self.load_and_apply_stylesheet()
-        self.load_tasks()
+        self.paint_list_cache()
+        # Tasks stream in after the window has been shown and painted
+        QTimer.singleShot(0, self.load_tasks)
         self.resize(self.restore_window_size())
         self.installEventFilter(self)
 
         self.setWindowIcon(QIcon(os.path.join(os.path.dirname(__file__), "icons", "app_icon.ico")))
 
+        self.backup_timer = QTimer(self)
+        self.backup_timer.timeout.connect(self.run_scheduled_backup)
+        self.backup_timer.start(BACKUP_INTERVAL_MS)
+        QTimer.singleShot(BACKUP_STARTUP_DELAY_MS, self.run_scheduled_backup)
+        self.change_timer = QTimer(self)
+        self.change_timer.timeout.connect(self.check_external_changes)
+        self.change_timer.start(EXTERNAL_CHANGE_POLL_MS)
+        self.archive_timer = QTimer(self)
+        self.archive_timer.timeout.connect(self.schedule_archiving)
+        self.archive_timer.timeout.connect(self.schedule_purge)
+        self.archive_timer.timeout.connect(self.schedule_maintenance)
+        self.archive_timer.start(ARCHIVE_INTERVAL_MS)
+        if self.db_manager.get_setting("api_server_enabled") == "1":
+            self.api_server_action.setChecked(True)
+
         self.flash_timer = QTimer(self)
         self.flash_timer.timeout.connect(self.flash_add_button)
         self.flash_state = True
@@ -79,10 +187,57 @@ class MainWindow(QMainWindow):
         main_layout = QVBoxLayout(central_widget)
 
         menubar = self.menuBar()
+        file_menu = menubar.addMenu('File')
+        import_action = QAction('Import Tasks...', self)
+        import_action.triggered.connect(self.import_tasks_from_file)
+        file_menu.addAction(import_action)
+        export_action = QAction('Export Tasks...', self)
+        export_action.triggered.connect(self.export_tasks_to_file)
+        file_menu.addAction(export_action)
+        file_menu.addSeparator()
+        backup_action = QAction('Back Up Now', self)
+        backup_action.triggered.connect(self.back_up_now)
+        file_menu.addAction(backup_action)
+        restore_action = QAction('Restore Backup...', self)
+        restore_action.triggered.connect(self.restore_from_backup)
+        file_menu.addAction(restore_action)
+
+        edit_menu = menubar.addMenu('Edit')
+        undo_action = self.undo_stack.createUndoAction(self, 'Undo')
+        undo_action.setShortcut(QKeySequence.Undo)
+        edit_menu.addAction(undo_action)
+        redo_action = self.undo_stack.createRedoAction(self, 'Redo')
+        redo_action.setShortcut(QKeySequence.Redo)
+        edit_menu.addAction(redo_action)
+
         settings_menu = menubar.addMenu('Settings')
         date_format_action = QAction('Date Format', self)
         date_format_action.triggered.connect(self.open_date_format_settings)
         settings_menu.addAction(date_format_action)
+        log_level_action = QAction('Log Level', self)
+        log_level_action.triggered.connect(self.open_log_level_settings)
+        settings_menu.addAction(log_level_action)
+        archive_action = QAction('Archive Completed Tasks...', self)
+        archive_action.triggered.connect(self.open_archive_settings)
+        settings_menu.addAction(archive_action)
+        self.api_server_action = QAction('Local API Server', self, checkable=True)
+        self.api_server_action.toggled.connect(self.set_api_server_enabled)
+        settings_menu.addAction(self.api_server_action)
+        performance_action = QAction('Performance', self)
+        performance_action.triggered.connect(self.open_performance_panel)
+        settings_menu.addAction(performance_action)
+
+        view_menu = menubar.addMenu('View')
+        statistics_action = QAction('Statistics', self)
+        statistics_action.triggered.connect(self.open_statistics)
+        view_menu.addAction(statistics_action)
+        view_menu.addSeparator()
+        save_view_action = QAction('Save Current View...', self)
+        save_view_action.triggered.connect(self.save_current_view)
+        view_menu.addAction(save_view_action)
+        delete_view_action = QAction('Delete Current View', self)
+        delete_view_action.triggered.connect(self.delete_current_view)
+        view_menu.addAction(delete_view_action)
 
         input_layout = QHBoxLayout()
         self.task_input = QLineEdit()
@@ -112,10 +267,9 @@ class MainWindow(QMainWindow):
         for button in [self.due_date_button, self.add_button]:
             button.setStyleSheet("background-color: transparent; border: none;")
 
-        self.calendar_widget = QCalendarWidget(self)
-        self.calendar_widget.setWindowFlags(Qt.Popup)
-        self.calendar_widget.activated.connect(self.on_date_selected)
-        self.calendar_widget.hide()
+        # The calendar popup is created on first use, see get_calendar_widget()
+        self.calendar_widget = None
+        self.selected_due_date = None
 
         main_layout.addLayout(input_layout)
 
@@ -126,26 +280,37 @@ class MainWindow(QMainWindow):
         self.search_input.setPlaceholderText("Search tasks...")
         search_layout.addWidget(search_label)
         search_layout.addWidget(self.search_input)
+        self.tag_filter_input = QLineEdit()
+        self.tag_filter_input.setPlaceholderText("Tags: a b|c -d")
+        self.tag_filter_input.setToolTip("Tasks with every space-separated tag; 'a|b' means either, '-a' means not a")
+        self.tag_filter_input.setClearButtonEnabled(True)
+        search_layout.addWidget(self.tag_filter_input)
+        self.include_archived_checkbox = QCheckBox("Include archived")
+        self.include_archived_checkbox.setToolTip("Also search tasks moved to the archive")
+        search_layout.addWidget(self.include_archived_checkbox)
         main_layout.addLayout(search_layout)
 
+        self.view_combo = QComboBox()
+        self.view_combo.addItem(CUSTOM_VIEW)
+        self.view_combo.addItems(list(self.saved_views.views))
         self.filter_combo = QComboBox()
-        self.filter_combo.addItems(["All", "Active", "Completed"])
+        self.filter_combo.addItems(FILTER_OPTIONS)
         self.sort_combo = QComboBox()
-        self.sort_combo.addItems(["Due Date", "Priority", "Category", "Sub-Category"])
+        self.sort_combo.addItems(SORT_OPTIONS)
         self.sort_order_button = QToolButton()
         self.sort_order_button.setArrowType(Qt.UpArrow)
         self.sort_order_button.setToolTip("Ascending Order")
         self.sort_order_button.clicked.connect(self.toggle_sort_order)
         self.category_filter_combo = QComboBox()
-        self.category_filter_combo.addItem("All Categories")
+        self.category_filter_combo.addItem(ALL_CATEGORIES)
         self.category_filter_combo.addItems(self.categories)
         self.sub_category_filter_combo = QComboBox()
         self.sub_category_filter_combo.setObjectName("subCategoryCombo")
-        self.sub_category_filter_combo.addItem("All Sub-Categories")
+        self.sub_category_filter_combo.addItem(ALL_SUB_CATEGORIES)
         self.sub_category_filter_combo.addItems(self.sub_categories)
 
         filter_sort_layout = QHBoxLayout()
-        for label, widget in [("Filter:", self.filter_combo), ("Category:", self.category_filter_combo),
+        for label, widget in [("View:", self.view_combo), ("Filter:", self.filter_combo), ("Category:", self.category_filter_combo),
                               ("Sub-Category:", self.sub_category_filter_combo), ("Sort by:", self.sort_combo)]:
             layout = QHBoxLayout()
             layout.addWidget(QLabel(label))
@@ -161,7 +326,7 @@ class MainWindow(QMainWindow):
         self.multi_delete_button = QToolButton()
         self.set_button_icon(self.multi_delete_button, "delete")
         self.multi_delete_button.setVisible(False)
-        self.multi_delete_button.clicked.connect(lambda: self.delete_tasks([task.task.id for task in self.todo_list.findChildren(TaskWidget) if task.is_selected_for_deletion]))
+        self.multi_delete_button.clicked.connect(lambda: self.delete_tasks(sorted(self.todo_list.selected_tasks)))
         self.multi_delete_layout.addWidget(self.multi_delete_label)
         self.multi_delete_layout.addWidget(self.multi_delete_button)
         filter_sort_layout.addLayout(self.multi_delete_layout)
@@ -187,19 +352,31 @@ class MainWindow(QMainWindow):
         self.sub_category_combo.activated.connect(self.on_sub_category_combo_changed)
         for widget in [self.filter_combo, self.sort_combo, self.category_filter_combo, self.sub_category_filter_combo]:
             widget.currentTextChanged.connect(self.apply_filter_and_sort)
+        self.view_combo.textActivated.connect(self.apply_saved_view)
         self.task_input.returnPressed.connect(self.add_task)
-        self.sort_order_button.clicked.connect(self.apply_filter_and_sort)
         self.todo_list.taskDeleted.connect(self.delete_tasks)
+        self.todo_list.taskChanged.connect(self.update_task)
+        self.todo_list.taskEdited.connect(self.edit_task)
+        self.todo_list.detailsRequested.connect(self.load_task_details)
         self.todo_list.multipleTasksSelected.connect(self.update_multi_delete_visibility)
+        self.todo_list.scrolledToEnd.connect(self.load_archive_page)
+        self.todo_list.taskMoved.connect(self.on_task_moved)
         
         self.task_input.textChanged.connect(self.check_task_input)
         self.priority_combo.currentTextChanged.connect(self.check_dropdown)
         self.category_combo.currentTextChanged.connect(self.check_dropdown)
         self.sub_category_combo.currentTextChanged.connect(self.check_dropdown)
-        self.due_date_button.clicked.connect(self.show_date_picker)
         
         # Connect search input
         self.search_input.textChanged.connect(self.apply_filter_and_sort)
+        self.tag_filter_input.textChanged.connect(self.apply_filter_and_sort)
+        self.include_archived_checkbox.toggled.connect(self.apply_filter_and_sort)
+
+        self.overdue_scheduler.statusChanged.connect(self.on_due_status_changed)
+        self.overdue_scheduler.tasksBecameOverdue.connect(
+            lambda ids: self.statusBar().showMessage(f"{len(ids)} task(s) are now overdue", 10000))
+        self.overdue_scheduler.tasksBecameDueSoon.connect(
+            lambda ids: self.statusBar().showMessage(f"{len(ids)} task(s) are due soon", 10000))
 
     def set_button_icon(self, button, icon_name, icon_color=None):
         icon_path = f":icons/src/ui/icons/{icon_name}.svg"
@@ -210,7 +387,7 @@ class MainWindow(QMainWindow):
             button.setIcon(icon)
             button.setIconSize(QSize(32, 32))
         else:
-            logging.warning(f"Failed to set icon for button: {icon_name}")
+            logging.warning("Failed to set icon for button: %s", icon_name)
 
     def restore_window_size(self):
         settings = QSettings("TodoApp", "MainWindow")
@@ -225,25 +402,284 @@ class MainWindow(QMainWindow):
         super().resizeEvent(event)
 
     def closeEvent(self, event):
-        self.calendar_widget.hide()
+        if self.task_loader is not None:
+            self.task_loader.stop()
+        for job in (self.background_job, self.maintenance_job):
+            if job is not None:
+                job.cancel()
+                job.wait()
+        if self.api_server is not None:
+            self.api_server.stop()
+        self.change_timer.stop()
+        self.idle_runner.stop()
+        self.change_monitor.close()
+        self.save_list_cache()
+        if self.calendar_widget:
+            self.calendar_widget.hide()
         self.save_window_size()
         super().closeEvent(event)
 
     def load_tasks(self):
-        self.all_tasks = [Task.from_dict(task_data) for task_data in self.db_manager.get_all_tasks()]
-        self.apply_filter_and_sort()
+        if self.task_loader is not None:
+            self.task_loader.stop()
+            self.task_loader.deleteLater()
+            self.task_loader = None
+        self.chunk_timer.stop()
+        self._pending_chunks.clear()
+        self._pending_rows.clear()
+        self._skip_ids.clear()
+        self._refresh_after_load = False
+        # Everything committed after this point is picked up by the loader or,
+        # once loading has finished, by check_external_changes()
+        self._data_version = self.change_monitor.get_data_version()
+        self._synced_revision = self.db_manager.get_revision()
+        self.all_tasks = []
+        self.overdue_scheduler.set_tasks([])
+        self.next_up.rebuild([])
+        self.tag_index.rebuild([])
+        self.day_counts.clear()
+        self.saved_views.set_tasks([])
+        if self._prefilled_ids:
+            self.apply_list_cache_changes()
+        else:
+            self.refresh_task_list()
+        self.statusBar().showMessage("Loading tasks...")
+
+        self.task_loader = TaskLoader(self.db_manager, parent=self)
+        self.task_loader.chunkLoaded.connect(self.on_tasks_chunk_loaded)
+        self.task_loader.finished.connect(self.on_task_loader_finished)
+        self.task_loader.start()
+
+    def is_loading(self):
+        return self.task_loader is not None
+
+    @Slot(list)
+    def on_tasks_chunk_loaded(self, tasks):
+        if self.sender() is not self.task_loader:
+            return  # queued from a loader that load_tasks() replaced
+        self._pending_chunks.append(tasks)
+        if not self.chunk_timer.isActive():
+            self._last_slice_end = time.perf_counter()
+            self.chunk_timer.start()
+
+    @Slot()
+    def render_next_chunk(self):
+        # Every pass also relayouts the rows already shown, so the slice grows with
+        # the time spent outside it and at least half of the loading time adds rows
+        now = time.perf_counter()
+        deadline = now + max(ROW_RENDER_BUDGET_MS / 1000, now - self._last_slice_end)
+        with span("ui.render_loaded_rows"):
+            while time.perf_counter() < deadline:
+                if self._pending_rows:
+                    self.connect_task_widget(self.todo_list.add_task(self._pending_rows.popleft()))
+                elif self._pending_chunks:
+                    self.index_loaded_chunk(self._pending_chunks.popleft())
+                else:
+                    break
+        self._last_slice_end = time.perf_counter()
+        if self._pending_rows or self._pending_chunks:
+            self.statusBar().showMessage(f"Loading tasks... {len(self.all_tasks)}")
+            return
+        self.chunk_timer.stop()
+        if self.task_loader is not None and self.task_loader.isFinished():
+            self.finish_loading()
+
+    def index_loaded_chunk(self, tasks):
+        # Tasks added, edited or deleted meanwhile are already up to date in memory
+        tasks = [task for task in tasks if task.id not in self._skip_ids]
+        self.all_tasks.extend(tasks)
+        self.overdue_scheduler.add_tasks(tasks)
+        for task in tasks:
+            self.next_up.update(task)
+            self.tag_index.update(task)
+            self.saved_views.task_added(task)
+        self.day_counts.track(tasks)
+
+        if self.can_append_loaded_tasks():
+            # Chunks arrive in display order, so matching rows go at the end
+            filter_option = self.filter_combo.currentText()
+            category_filter = self.category_filter_combo.currentText()
+            sub_category_filter = self.sub_category_filter_combo.currentText()
+            self._pending_rows.extend(task for task in tasks if task.id not in self._prefilled_ids and
+                                      matches_filters(task, filter_option, category_filter, sub_category_filter))
+            if any(task.recurrence and not task.completed for task in tasks):
+                # Their coming instances belong among rows already shown
+                self._refresh_after_load = True
+        else:
+            self._refresh_after_load = True
+
+    @Slot()
+    def on_task_loader_finished(self):
+        if self.sender() is self.task_loader and not (self._pending_chunks or self._pending_rows):
+            self.finish_loading()
+
+    def finish_loading(self):
+        self.chunk_timer.stop()
+        self.task_loader.deleteLater()
+        self.task_loader = None
+        self._skip_ids.clear()
+        self._prefilled_ids.clear()
+        self.statusBar().showMessage(f"Loaded {len(self.all_tasks)} tasks", 3000)
+        if self._refresh_after_load:
+            self._refresh_after_load = False
+            self.refresh_task_list()
+        self.schedule_archiving()
+        self.schedule_purge()
+        self.schedule_maintenance()
+        self.schedule_respacing(task.id for task in self.all_tasks
+                                if not task.order_key or len(task.order_key) > LONG_KEY_LENGTH)
+
+    def can_append_loaded_tasks(self):
+        # True when the list shows the loader's own order: open tasks first, then
+        # ascending due date, without the grouped search or Next Up layouts. A tag
+        # filter is left out too, as the list cache does not record one.
+        return (self.view_combo.currentIndex() == 0 and
+                self.filter_combo.currentText() != NEXT_UP and
+                self.sort_combo.currentText() == "Due Date" and
+                self.sort_order_button.arrowType() == Qt.UpArrow and
+                not self.search_input.text() and
+                not self.tag_filter_input.text().strip())
+
+    def paint_list_cache(self):
+        # Shows the rows saved by the previous session before the database is
+        # read; load_tasks() then patches them up to the current revision
+        cache = read_list_cache(cache_path_for(self.db_manager.db_name))
+        if cache is None:
+            return
+        combos = [(self.filter_combo, cache.view["filter_option"]),
+                  (self.category_filter_combo, cache.view["category"]),
+                  (self.sub_category_filter_combo, cache.view["sub_category"])]
+        if any(combo.findText(text) < 0 for combo, text in combos):
+            return
+        for combo, text in combos:
+            combo.blockSignals(True)
+            combo.setCurrentText(text)
+            combo.blockSignals(False)
+        self.overdue_scheduler.add_tasks(cache.tasks)
+        self.render_tasks(cache.tasks)
+        self._cached_revision = cache.revision
+        self._prefilled_ids = {task.id for task in cache.tasks}
+
+    def apply_list_cache_changes(self):
+        revision, changed, deleted = self.db_manager.get_changes_since(self._cached_revision)
+        if revision < self._cached_revision or len(changed) + len(deleted) > CACHED_ROWS:
+            # Another or a restored database, or more churn than rows: start over
+            self._prefilled_ids.clear()
+            self.refresh_task_list()
+            return
+        shown = self.todo_list.tasks_in_order()
+        # The cached rows were every row up to the last one, so changed tasks that
+        # now sort before it are inserted; everything after it comes from the loader
+        last_key = load_order_key(shown[-1])
+        changed = [Task.from_dict(task_data) for task_data in changed]
+        for task_id in deleted + [task.id for task in changed]:
+            if task_id in self._prefilled_ids:
+                self.todo_list.remove_task(task_id)
+                self._prefilled_ids.discard(task_id)
+
+        filters = (self.filter_combo.currentText(), self.category_filter_combo.currentText(),
+                   self.sub_category_filter_combo.currentText())
+        keys = [load_order_key(task) for task in shown if task.id in self._prefilled_ids]
+        self.overdue_scheduler.add_tasks(changed)
+        for task in changed:
+            key = load_order_key(task)
+            if key < last_key and matches_filters(task, *filters):
+                position = bisect.bisect(keys, key)
+                keys.insert(position, key)
+                self.connect_task_widget(self.todo_list.add_task(task, position))
+                self._prefilled_ids.add(task.id)
+        logging.info("Painted %d cached rows, patched %d changed and %d deleted tasks",
+                     len(shown), len(changed), len(deleted))
+
+    def save_list_cache(self):
+        path = cache_path_for(self.db_manager.db_name)
+        if self._refresh_after_load or not self.can_append_loaded_tasks():
+            # Only rows in the loader's own order can be patched and extended
+            remove_list_cache(path)
+            return
+        view = {"filter_option": self.filter_combo.currentText(),
+                "category": self.category_filter_combo.currentText(),
+                "sub_category": self.sub_category_filter_combo.currentText()}
+        rows = [task for task in self.todo_list.tasks_in_order() if task.id not in self._archived_rows]
+        write_list_cache(path, self.db_manager.get_revision(), view, rows[:CACHED_ROWS])
+
+    def _skip_when_loaded(self, task_ids):
+        if self.is_loading():
+            self._skip_ids.update(task_ids)
+
+    @Slot()
+    def check_external_changes(self):
+        if self.is_loading() or self.background_job is not None:
+            return  # both end by reloading or re-checking
+        data_version = self.change_monitor.get_data_version()
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        with span("ui.apply_external_changes"):
+            revision, changed, deleted = self.db_manager.get_changes_since(self._synced_revision)
+            if revision < self._synced_revision:
+                # Restored from a backup by another instance
+                self.reload_from_database()
+                return
+            self._synced_revision = revision
+            self.apply_external_changes([Task.from_dict(task_data) for task_data in changed], deleted)
+
+    def apply_external_changes(self, changed, deleted):
+        # Our own writes come back here too; tasks that already match the copy in
+        # memory are skipped, so only other writers' changes touch the list
+        index_by_id = {task.id: index for index, task in enumerate(self.all_tasks)}
+        added, updated = [], []
+        for task in changed:
+            index = index_by_id.get(task.id)
+            if index is None:
+                index_by_id[task.id] = len(self.all_tasks)
+                self.all_tasks.append(task)
+                added.append(task)
+            else:
+                existing = self.all_tasks[index]
+                if task.notes is None:
+                    # Only text that changed comes along; keep what was loaded
+                    task.description, task.notes = existing.description, existing.notes
+                if existing != task:
+                    self.all_tasks[index] = task
+                    updated.append(task)
+        removed = [task_id for task_id in deleted if task_id in index_by_id]
+        if not (added or updated or removed):
+            return
+
+        if removed:
+            removed_ids = set(removed)
+            self.all_tasks = [task for task in self.all_tasks if task.id not in removed_ids]
+            self.overdue_scheduler.remove_tasks(removed)
+            self.next_up.remove(removed)
+            self.tag_index.remove(removed)
+            self.day_counts.remove(removed)
+            self.saved_views.tasks_removed(removed)
+            # Another window may have archived them, which statistics still count
+            self.task_snapshot = None
+        for task in added + updated:
+            self.overdue_scheduler.update_task(task)
+            self.next_up.update(task)
+            self.tag_index.update(task)
+            self.day_counts.update(task)
+            if self.task_snapshot is not None:
+                self.task_snapshot.upsert(task)
+            self.update_categories(task.category)
+            self.update_sub_categories(task.sub_category)
+        for task in added:
+            self.saved_views.task_added(task)
+        for task in updated:
+            self.saved_views.task_updated(task)
+        self.refresh_task_list()
+        count = len(added) + len(updated) + len(removed)
+        logging.info("Applied %d external task change(s)", count)
+        self.statusBar().showMessage(f"{count} task(s) changed outside this window", 5000)
 
     def check_filled(self, widget, condition):
         widget.setProperty("filled", condition)
         widget.style().unpolish(widget)
         widget.style().polish(widget)
 
-    def on_date_selected(self, date):
-        self.calendar_widget.hide()
-        self.due_date_button.setToolTip(f"Due: {date.toString(self.date_format)}")
-        self.check_filled(self.due_date_button, True)
-        self.update_add_button_icon()
-
     def set_button_icon(self, button, icon_name, icon_color=None):
         icon_path = f":icons/src/ui/icons/{icon_name}.svg"
         base_color = self.palette().text().color()
@@ -254,7 +690,7 @@ class MainWindow(QMainWindow):
         
         icon = create_colored_icon(icon_path, base_color, background_color, icon_color)
         if icon.isNull():
-            logging.warning(f"Failed to set icon for button: {icon_name}")
+            logging.warning("Failed to set icon for button: %s", icon_name)
         else:
             button.setIcon(icon)
             button.setIconSize(QSize(32, 32))
@@ -274,10 +710,6 @@ class MainWindow(QMainWindow):
         sender.style().polish(sender)
         self.update_add_button_icon()
 
-        self.priority_combo.currentTextChanged.connect(self.check_dropdown)
-        self.category_combo.currentTextChanged.connect(self.check_dropdown)
-        self.sub_category_combo.currentTextChanged.connect(self.check_dropdown)
-
     @Slot()
     def add_task(self):
         title = self.task_input.text().strip()
@@ -287,8 +719,8 @@ class MainWindow(QMainWindow):
                 category = "" if category == "Manage Categories" else category
                 sub_category = self.sub_category_combo.currentText()
                 sub_category = "" if sub_category == "Manage Sub-Categories" else sub_category
-                # Get selected date directly from calendar widget
-                due_date = self.calendar_widget.selectedDate() if self.due_date_button.toolTip() != "Set due date" else QDate.currentDate()
+                # Use the date picked in the calendar popup, if any
+                due_date = self.selected_due_date if self.selected_due_date and self.due_date_button.toolTip() != "Set due date" else QDate.currentDate()
                 task = Task(
                     id=self.db_manager.add_task(
                         title,
@@ -303,12 +735,13 @@ class MainWindow(QMainWindow):
                     due_date=due_date.toString("yyyy-MM-dd"),
                     sub_category=sub_category
                 )
-                self.all_tasks.append(task)
+                self.track_added_task(task)
                 self.task_input.clear()
+                self.selected_due_date = None
                 self.due_date_button.setToolTip("Set due date")
                 for combo in [self.category_combo, self.sub_category_combo, self.priority_combo]:
                     combo.setCurrentIndex(0)
-                self.apply_filter_and_sort()
+                self.refresh_task_list()
                 self.update_categories(task.category)
                 self.update_sub_categories(task.sub_category)
                 self.update_add_button_icon()
@@ -316,21 +749,68 @@ class MainWindow(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to add task: {str(e)}")
 
+    def track_added_task(self, task):
+        self.all_tasks.append(task)
+        self._skip_when_loaded([task.id])
+        if self.task_snapshot is not None:
+            self.task_snapshot.upsert(task)
+        self.overdue_scheduler.update_task(task)
+        self.next_up.update(task)
+        self.tag_index.update(task)
+        self.day_counts.add(task)
+        self.saved_views.task_added(task)
+
     @Slot(Task)
     def update_task(self, task):
+        # Edits, completions and notes changes are undoable; the stored task is
+        # what undo goes back to
+        before = self.db_manager.get_task(task.id)
+        if before is None:
+            self.write_task(task)
+            return
+        before = Task.from_dict(before)
+        if before.completed != task.completed:
+            text = f"{'Complete' if task.completed else 'Reopen'} '{task.title}'"
+        else:
+            text = f"Edit '{task.title}'"
+        self.undo_stack.push(UpdateTaskCommand(self, before, task, text))
+
+    def write_task(self, task):
+        # Returns the id of the next instance that completing a recurring task
+        # created, if any
         try:
-            self.db_manager.update_task(
-                task.id, task.title, task.completed, task.due_date, task.priority, task.category, task.sub_category, task.description, task.notes
+            next_id = self.db_manager.update_task(
+                task.id, task.title, task.completed, task.due_date, task.priority, task.category, task.sub_category,
+                task.description, task.notes, task.recurrence, task.tags
             )
+            if next_id is not None:
+                # Completing a recurring task created its next instance, which
+                # took the recurrence rule over
+                self.track_added_task(Task.from_dict(self.db_manager.get_task(next_id)))
+                task.recurrence = ""
             for i, t in enumerate(self.all_tasks):
                 if t.id == task.id:
                     self.all_tasks[i] = task
                     break
-            self.apply_filter_and_sort()
+            else:
+                # A cached row edited before the loader reached it, or an archived
+                # row, which the database has just moved back to the live tasks
+                self.all_tasks.append(task)
+            self._skip_when_loaded([task.id])
+            if self.task_snapshot is not None:
+                self.task_snapshot.upsert(task)
+            self.overdue_scheduler.update_task(task)
+            self.next_up.update(task)
+            self.tag_index.update(task)
+            self.day_counts.update(task)
+            self.saved_views.task_updated(task)
+            self.refresh_task_list()
             self.update_categories(task.category)
             self.update_sub_categories(task.sub_category)
+            return next_id
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to update task: {str(e)}")
+            return None
 
     @Slot(list)
     def delete_tasks(self, task_ids):
@@ -340,7 +820,7 @@ class MainWindow(QMainWindow):
             self.delete_multiple_tasks(task_ids)
 
     def delete_single_task(self, task_id):
-        task = next((task for task in self.all_tasks if task.id == task_id), None)
+        task = next((task for task in self.all_tasks if task.id == task_id), None) or self._archived_rows.get(task_id)
         if task and QMessageBox.question(self, "Confirm Deletion", f"Are you sure you want to delete the task '{task.title}'?",
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes:
             self.perform_delete([task_id])
@@ -351,62 +831,291 @@ class MainWindow(QMainWindow):
             self.perform_delete(task_ids)
 
     def perform_delete(self, task_ids):
+        if len(task_ids) == 1:
+            task = next((task for task in self.all_tasks if task.id == task_ids[0]), None) or \
+                self._archived_rows.get(task_ids[0])
+            text = f"Delete '{task.title}'" if task else "Delete task"
+        else:
+            text = f"Delete {len(task_ids)} tasks"
+        self.undo_stack.push(DeleteTasksCommand(self, task_ids, text))
+
+    def remove_tasks(self, task_ids):
         try:
-            for task_id in task_ids:
-                self.db_manager.delete_task(task_id)
-            self.all_tasks = [task for task in self.all_tasks if task.id not in task_ids]
-            self.apply_filter_and_sort()
+            self.db_manager.delete_tasks(task_ids)
+            removed_ids = set(task_ids)
+            self.all_tasks = [task for task in self.all_tasks if task.id not in removed_ids]
+            self._skip_when_loaded(task_ids)
+            if self.task_snapshot is not None:
+                self.task_snapshot.remove(task_ids)
+            self.overdue_scheduler.remove_tasks(task_ids)
+            self.next_up.remove(task_ids)
+            self.tag_index.remove(task_ids)
+            self.day_counts.remove(task_ids)
+            self.saved_views.tasks_removed(task_ids)
+            self.refresh_task_list()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to delete tasks: {str(e)}")
 
+    def restore_tasks(self, task_ids):
+        restored = self.db_manager.restore_deleted_tasks(task_ids)
+        live = [Task.from_dict(data) for data in self.db_manager.get_tasks(restored)]
+        known_ids = {task.id for task in self.all_tasks}
+        for task in live:
+            if task.id not in known_ids:
+                self.track_added_task(task)
+                self.update_categories(task.category)
+                self.update_sub_categories(task.sub_category)
+        if len(live) < len(restored):
+            # Archived ones, which statistics count too
+            self.task_snapshot = None
+        if len(restored) < len(task_ids):
+            self.statusBar().showMessage(f"{len(task_ids) - len(restored)} task(s) were already purged", 5000)
+        self.refresh_task_list()
+
+    @Slot(int, object, object)
+    def on_task_moved(self, task_id, above_id, below_id):
+        # A row was dropped between two others of the manual sort. Only rows of
+        # its own group (open or completed) place it; undo puts it back between
+        # the tasks it sat between in the full manual order.
+        tasks = {task.id: task for task in self.all_tasks}
+        task = tasks.get(task_id)
+        if self.is_loading() or task is None:
+            return
+        if (above_id, below_id) == self.todo_list.adjacent_task_ids(task_id):
+            return
+        above, below = (tasks.get(neighbour_id) for neighbour_id in (above_id, below_id))
+        above = above if above is not None and above.completed == task.completed else None
+        below = below if below is not None and below.completed == task.completed else None
+        if above is None and below is None:
+            return
+        if self.sort_order_button.arrowType() != Qt.UpArrow:
+            above, below = below, above
+        lower, upper = self._manual_neighbours(task, self.all_tasks)
+        before = (lower.id if lower else None, upper.id if upper else None)
+        after = (above.id if above else None, below.id if below else None)
+        self.undo_stack.push(MoveTaskCommand(self, task_id, before, after, f"Move '{task.title}'"))
+
+    def move_task(self, task_id, lower_id, upper_id):
+        # Gives a task an order key just after lower_id's in the manual order, or
+        # else just before upper_id's, writing that one row. Keys that leave no
+        # room (duplicates, or rows without a valid key) are respaced first.
+        tasks = {task.id: task for task in self.all_tasks}
+        task = tasks.get(task_id)
+        lower, upper = tasks.get(lower_id), tasks.get(upper_id)
+        if task is None or (lower is None and upper is None):
+            return
+        for _ in range(2):
+            gap = self._order_gap(task, lower, upper)
+            if gap is not None:
+                break
+            self.respace_order_keys((lower or upper).id)
+        else:
+            logging.warning("No room in the manual order to move task %d", task_id)
+            return
+        order_key = key_between(*gap)
+        try:
+            if not self.db_manager.set_order_keys({task_id: order_key}):
+                return  # deleted elsewhere; the change monitor removes it
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to move task: {str(e)}")
+            return
+        task.order_key = order_key
+        self.saved_views.task_updated(task)
+        self.place_task_row(task)
+        if len(order_key) > LONG_KEY_LENGTH:
+            self.schedule_respacing([task_id])
+
+    def _order_gap(self, task, lower, upper):
+        # The keys on either side of the gap after `lower` (or before `upper`)
+        # among the other tasks, or None when a new key cannot go between them
+        others = [other.order_key for other in self.all_tasks if other is not task and other is not (lower or upper)]
+        if lower is not None:
+            gap = (lower.order_key, min((key for key in others if key > lower.order_key), default=None))
+        else:
+            gap = (max((key for key in others if key < upper.order_key), default=None), upper.order_key)
+        if (any(key is not None and not is_order_key(key) for key in gap) or
+                (lower or upper).order_key in others):
+            return None
+        return gap
+
+    def place_task_row(self, task):
+        # Moves a task's row to its place in the manual sort, when that is shown
+        if not self.todo_list.reorderable or task.id not in self.todo_list.task_widgets:
+            return
+        lower, upper = self._manual_neighbours(task, (
+            widget.task for widget in self.todo_list.task_widgets.values()
+            if widget.task.completed == task.completed and widget.task.id not in self._archived_rows))
+        lower, upper = (lower.id if lower else None), (upper.id if upper else None)
+        if self.sort_order_button.arrowType() != Qt.UpArrow:
+            self.todo_list.move_task_widget(task.id, upper, lower)
+        else:
+            self.todo_list.move_task_widget(task.id, lower, upper)
+
+    def _manual_neighbours(self, task, tasks):
+        # The tasks just before and after `task` in the manual order, or None;
+        # a scan rather than a sort, as only the two are needed
+        key = SORT_KEYS[MANUAL_SORT]
+        position = key(task)
+        lower = upper = None
+        for other in tasks:
+            other_position = key(other)
+            if other_position < position and (lower is None or other_position > key(lower)):
+                lower = other
+            elif other_position > position and (upper is None or other_position < key(upper)):
+                upper = other
+        return lower, upper
+
+    def respace_order_keys(self, task_id):
+        # Spreads out the keys of a run of tasks around task_id's, without
+        # changing their order (models.order_key.respace())
+        ordered = sorted(self.all_tasks, key=SORT_KEYS[MANUAL_SORT])
+        index = next((i for i, task in enumerate(ordered) if task.id == task_id), None)
+        if index is None:
+            return
+        start, keys = respace([task.order_key for task in ordered], index)
+        run = ordered[start:start + len(keys)]
+        self._long_order_keys.difference_update(task.id for task in run)
+        changes = {task.id: key for task, key in zip(run, keys) if task.order_key != key}
+        if not changes:
+            return
+        written = set(self.db_manager.set_order_keys(changes))
+        for task in run:
+            if task.id in written:
+                task.order_key = changes[task.id]
+                self.saved_views.task_updated(task)
+        logging.info("Respaced the order keys of %d tasks", len(written))
+
+    @Slot(Task)
+    def load_task_details(self, task):
+        # A row was expanded. Its description and the start of its notes are
+        # read now, longer notes a chunk per event-loop pass after that.
+        widget = self.todo_list.task_widgets.get(task.id)
+        loading = self._notes_loads.get(task.id)
+        if loading is not None:
+            # Re-rendered while loading: the new row catches up
+            if widget is not None:
+                widget.append_notes("".join(loading[1]), False)
+            return
+        details = self.db_manager.get_task_details([task.id], notes_limit=NOTES_CHUNK_CHARS).get(task.id)
+        if details is None:
+            return
+        task.description = details["description"]
+        complete = len(details["notes"]) >= details["notes_length"]
+        if complete:
+            task.notes = details["notes"]
+        else:
+            self._notes_loads[task.id] = (task, [details["notes"]], details["notes_length"])
+            self.notes_timer.start(0)
+        if widget is not None:
+            widget.append_notes(details["notes"], complete)
+
+    def load_next_notes_chunk(self):
+        if not self._notes_loads:
+            return
+        task_id, (task, chunks, length) = next(iter(self._notes_loads.items()))
+        loaded = sum(map(len, chunks))
+        chunk = self.db_manager.get_notes_chunk(task_id, loaded)
+        chunks.append(chunk)
+        complete = not chunk or loaded + len(chunk) >= length
+        if complete:
+            del self._notes_loads[task_id]
+            task.notes = "".join(chunks)
+        widget = self.todo_list.task_widgets.get(task_id)
+        if widget is not None:
+            widget.append_notes(chunk, complete)
+        if self._notes_loads:
+            self.notes_timer.start(0)
+
+    def load_full_details(self, task):
+        # The edit dialog works on the whole text, so it is read in one go,
+        # taking over from a chunked load still under way
+        if task.notes is not None and task.id not in self._notes_loads:
+            return True
+        details = self.db_manager.get_task_details([task.id]).get(task.id)
+        if details is None:
+            return False
+        self._notes_loads.pop(task.id, None)
+        task.description, task.notes = details["description"], details["notes"]
+        widget = self.todo_list.task_widgets.get(task.id)
+        if widget is not None:
+            widget.set_notes(task.notes)
+        return True
+
     @Slot(Task)
     def edit_task(self, task):
-        dialog = TaskEditDialog(task, self.categories, self.sub_categories, self, date_format=self.date_format)
+        from .dialogs import TaskEditDialog
+        if not self.load_full_details(task):
+            QMessageBox.critical(self, "Error", "Failed to load the task's notes")
+            return
+        dialog = TaskEditDialog(task, self.categories, self.sub_categories, self, date_format=self.date_format,
+                                day_counts=self.day_counts)
         if dialog.exec_():
             self.update_task(dialog.get_updated_task())
 
     @Slot()
     def apply_filter_and_sort(self):
-        filter_option = self.filter_combo.currentText()
-        sort_option = self.sort_combo.currentText()
-        category_filter = self.category_filter_combo.currentText()
-        sub_category_filter = self.sub_category_filter_combo.currentText()
-        sort_order = Qt.AscendingOrder if self.sort_order_button.arrowType() == Qt.UpArrow else Qt.DescendingOrder
-        search_text = self.search_input.text().lower()
-
-        # First, apply completion status and category filters
-        filtered_tasks = [
-            task for task in self.all_tasks
-            if (filter_option == "All" or
-                (filter_option == "Active" and not task.completed) or
-                (filter_option == "Completed" and task.completed)) and
-               (category_filter == "All Categories" or task.category == category_filter) and
-               (sub_category_filter == "All Sub-Categories" or task.sub_category == sub_category_filter)
-        ]
-
-        # Then apply search filter if there's search text
-        if search_text:
-            filtered_tasks = [task for task in filtered_tasks if search_text in task.title.lower()]
-
-        # Sort the filtered tasks
-        sort_key = {
-            "Due Date": lambda x: x.due_date or "9999-99-99",
-            "Priority": lambda x: {"High": 0, "Medium": 1, "Med": 1, "Low": 2}.get(x.priority, 3),
-            "Category": lambda x: (x.category.lower(), x.sub_category.lower()),
-            "Sub-Category": lambda x: (x.sub_category.lower(), x.category.lower())
-        }[sort_option]
-
-        filtered_tasks.sort(key=sort_key, reverse=(sort_order == Qt.DescendingOrder))
-
-        # Separate tasks into active and completed
-        active_tasks = [task for task in filtered_tasks if not task.completed]
-        completed_tasks = [task for task in filtered_tasks if task.completed]
-
-        # Clear and add tasks to the list
+        # A slot, so traced with a span rather than the @traced decorator
+        with span("ui.apply_filter_and_sort"):
+            filter_option = self.filter_combo.currentText()
+            sort_option = self.sort_combo.currentText()
+            category_filter = self.category_filter_combo.currentText()
+            sub_category_filter = self.sub_category_filter_combo.currentText()
+            sort_order = Qt.AscendingOrder if self.sort_order_button.arrowType() == Qt.UpArrow else Qt.DescendingOrder
+            search_text = self.search_input.text().lower()
+            tag_query = self.tag_filter_input.text()
+
+            # Any manual change to the filters leaves the selected saved view
+            if self.view_combo.currentIndex() != 0:
+                self.view_combo.setCurrentIndex(0)
+
+            if (filter_option == NEXT_UP and category_filter == ALL_CATEGORIES and
+                    sub_category_filter == ALL_SUB_CATEGORIES and not search_text and not tag_query.strip()):
+                # The incrementally maintained top-K covers the unfiltered case
+                tasks = self.next_up.top()
+            else:
+                tasks = filter_and_sort_tasks(self.all_tasks, filter_option, category_filter, sub_category_filter,
+                                              sort_option, sort_order == Qt.DescendingOrder, search_text,
+                                              tag_query, self.tag_index)
+            tasks = self.with_occurrences(tasks, filter_option, sort_option, sort_order == Qt.DescendingOrder,
+                                          search_text)
+            self.render_tasks(tasks, search_text, filter_option == NEXT_UP)
+            self.show_archive(filter_option, category_filter, sub_category_filter, search_text, tag_query)
+
+    def with_occurrences(self, tasks, filter_option, sort_option, descending, search_text):
+        # The plain due-date list also shows the coming instances of recurring
+        # tasks, as of today and only RECURRENCE_PREVIEW_DAYS ahead, so a series
+        # without an end adds a handful of rows
+        if filter_option not in ("All", "Active") or sort_option != "Due Date" or search_text:
+            return tasks
+        today = today_day_number()
+        occurrences = list(expand_occurrences(tasks, today, today + RECURRENCE_PREVIEW_DAYS))
+        return merge_occurrences(tasks, occurrences, descending) if occurrences else tasks
+
+    def refresh_task_list(self):
+        if self.is_loading():
+            # Rows appended later may belong above an added or edited task
+            self._refresh_after_load = True
+        if self.view_combo.currentIndex() != 0:
+            self.apply_saved_view(self.view_combo.currentText())
+        else:
+            self.apply_filter_and_sort()
+
+    def render_tasks(self, tasks, search_text="", next_up=False):
+        # Clear and add tasks to the list; rows queued by the loader are in `tasks`
+        self._pending_rows.clear()
+        self._prefilled_ids.clear()
         self.todo_list.clear()
-        
+        self.todo_list.set_reorderable(self.sort_combo.currentText() == MANUAL_SORT and not next_up)
+
         # Add headers and tasks
-        if search_text:
+        if next_up:
+            if tasks:
+                self.todo_list.add_bold_separator(f"Next Up - {len(tasks)} most urgent")
+            for task in tasks:
+                self.todo_list.add_task(task)
+        elif search_text:
+            active_tasks = [task for task in tasks if not task.completed]
+            completed_tasks = [task for task in tasks if task.completed]
             if active_tasks:
                 self.todo_list.add_bold_separator("Active Tasks - Search Results")
                 for task in active_tasks:
@@ -419,18 +1128,143 @@ class MainWindow(QMainWindow):
                 for task in completed_tasks:
                     self.todo_list.add_task(task)
         else:
-            # If no search text, just add tasks normally
-            for task in active_tasks:
-                self.todo_list.add_task(task)
-            for task in completed_tasks:
-                self.todo_list.add_task(task)
+            # If no search text, tasks are already ordered active first
+            for task in tasks:
+                if task.occurrence_of is not None:
+                    self.todo_list.add_occurrence(task, self.date_format)
+                else:
+                    self.todo_list.add_task(task)
 
-        for task_widget in self.todo_list.findChildren(TaskWidget):
-            task_widget.taskChanged.connect(self.update_task)
-            task_widget.taskDeleted.connect(lambda id: self.delete_tasks([id]))
-            task_widget.taskEdited.connect(self.edit_task)
-            task_widget.taskSelectedForDeletion.connect(self.on_task_selected_for_deletion)
-            task_widget.set_date_format(self.date_format)
+        self.connect_task_widgets()
+
+    @Slot(str)
+    def apply_saved_view(self, name):
+        view = self.saved_views.views.get(name)
+        if view is None:
+            return
+        # Mirror the view in the filter controls without triggering a filter pass
+        controls = [self.filter_combo, self.sort_combo, self.category_filter_combo,
+                    self.sub_category_filter_combo, self.search_input, self.tag_filter_input]
+        for control in controls:
+            control.blockSignals(True)
+        self.filter_combo.setCurrentText(view.filter_option)
+        self.sort_combo.setCurrentText(view.sort_option)
+        self.category_filter_combo.setCurrentText(view.category)
+        self.sub_category_filter_combo.setCurrentText(view.sub_category)
+        self.search_input.setText(view.search_text)
+        self.tag_filter_input.setText(view.tag_query)
+        self.sort_order_button.setArrowType(Qt.DownArrow if view.descending else Qt.UpArrow)
+        self.sort_order_button.setToolTip("Descending Order" if view.descending else "Ascending Order")
+        for control in controls:
+            control.blockSignals(False)
+        self.view_combo.setCurrentText(name)
+
+        tasks = self.with_occurrences(self.saved_views.results(name), view.filter_option, view.sort_option,
+                                      view.descending, view.search_text.lower())
+        self.render_tasks(tasks, view.search_text.lower(), view.filter_option == NEXT_UP)
+        self.show_archive(view.filter_option, view.category, view.sub_category, view.search_text.lower(),
+                          view.tag_query)
+
+    def show_archive(self, filter_option, category_filter, sub_category_filter, search_text, tag_query=""):
+        # Archived tasks follow the live rows, a page at a time as the list is
+        # scrolled: always under "Completed", and in searches (by title or tag)
+        # when asked for
+        self._archived_rows.clear()
+        self._archive_query = None
+        self._archive_cursor = None
+        searching = search_text or tag_query.strip()
+        if not (filter_option == "Completed" or
+                (filter_option == "All" and searching and self.include_archived_checkbox.isChecked())):
+            return
+        if self.is_loading():
+            # Loaded rows are appended at the end of the list; page once they are in
+            self._refresh_after_load = True
+            return
+        self._archive_query = (None if category_filter == ALL_CATEGORIES else category_filter,
+                               None if sub_category_filter == ALL_SUB_CATEGORIES else sub_category_filter,
+                               search_text, tag_query)
+        self.load_archive_page()
+
+    @Slot()
+    def load_archive_page(self):
+        if self._archive_query is None:
+            return
+        category, sub_category, search_text, tag_query = self._archive_query
+        with span("ui.load_archive_page"):
+            tasks, self._archive_cursor = self.db_manager.get_archived_tasks(
+                ARCHIVE_PAGE_SIZE, self._archive_cursor, category, sub_category, search_text, tag_query)
+            if self._archive_cursor is None:
+                self._archive_query = None
+            for task in map(Task.from_dict, tasks):
+                if task.id in self.todo_list.task_widgets:
+                    continue  # archived by this window since the list was rendered
+                if not self._archived_rows:
+                    self.todo_list.add_bold_separator("Archived - Search Results" if search_text or tag_query.strip()
+                                                      else "Archived")
+                self._archived_rows[task.id] = task
+                task_widget = self.todo_list.add_task(task)
+                task_widget.set_draggable(False)
+                self.connect_task_widget(task_widget)
+
+    def current_view_settings(self, name):
+        return SavedView(
+            name=name,
+            filter_option=self.filter_combo.currentText(),
+            category=self.category_filter_combo.currentText(),
+            sub_category=self.sub_category_filter_combo.currentText(),
+            sort_option=self.sort_combo.currentText(),
+            descending=self.sort_order_button.arrowType() == Qt.DownArrow,
+            search_text=self.search_input.text(),
+            tag_query=self.tag_filter_input.text().strip()
+        )
+
+    def save_current_view(self):
+        name, ok = QInputDialog.getText(self, "Save View", "View name:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        if name == CUSTOM_VIEW:
+            QMessageBox.warning(self, "Warning", f"'{CUSTOM_VIEW}' is reserved.")
+            return
+        view = self.current_view_settings(name)
+        view.id = self.db_manager.save_view(view.to_dict())
+        self.saved_views.add_view(view)
+        if self.view_combo.findText(name) < 0:
+            self.view_combo.addItem(name)
+        self.view_combo.setCurrentText(name)
+
+    def delete_current_view(self):
+        name = self.view_combo.currentText()
+        if name == CUSTOM_VIEW:
+            QMessageBox.warning(self, "Warning", "Select a saved view to delete.")
+            return
+        if QMessageBox.question(self, "Confirm Deletion", f"Are you sure you want to delete the view '{name}'?",
+                                QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes:
+            self.db_manager.delete_view(name)
+            self.saved_views.remove_view(name)
+            self.view_combo.removeItem(self.view_combo.currentIndex())
+            self.view_combo.setCurrentIndex(0)
+
+    def connect_task_widgets(self):
+        # Only the rows just rendered: findChildren() would also return rows
+        # awaiting deleteLater() and connect them a second time
+        for task_widget in self.todo_list.task_widgets.values():
+            self.connect_task_widget(task_widget)
+
+    def connect_task_widget(self, task_widget):
+        # Changes, edits and deletes reach the window through the list's own
+        # signals, connected once in connect_signals()
+        task_widget.taskSelectedForDeletion.connect(self.on_task_selected_for_deletion)
+        task_widget.set_date_format(self.date_format)
+        task_widget.set_due_status(self.overdue_scheduler.status(task_widget.task.id))
+
+    @Slot(list)
+    def on_due_status_changed(self, task_ids):
+        # Restyle only the rows whose status flipped; the list is not rebuilt
+        for task_id in task_ids:
+            task_widget = self.todo_list.task_widgets.get(task_id)
+            if task_widget:
+                task_widget.set_due_status(self.overdue_scheduler.status(task_id))
 
     def update_categories(self, new_category):
         if new_category and new_category not in self.categories:
@@ -459,10 +1293,29 @@ class MainWindow(QMainWindow):
             self.sub_category_combo.setCurrentIndex(1 if self.sub_category_combo.count() > 1 else 0)
 
     def open_color_dialog(self):
+        from .color_dialog import ColorCustomizationDialog
         dialog = ColorCustomizationDialog(self)
         if dialog.exec_():
             self.load_and_apply_stylesheet()
 
+    def open_statistics(self):
+        # NumPy is only imported once statistics are first requested
+        from models.task_snapshot import TaskSnapshot
+        from .statistics_dialog import StatisticsDialog
+        # Built once from narrow columns, then kept current by add/update/delete
+        if self.task_snapshot is None:
+            self.task_snapshot = TaskSnapshot.from_database(self.db_manager)
+        StatisticsDialog(self.task_snapshot, self).exec_()
+
+    def open_performance_panel(self):
+        from .performance_dialog import PerformanceDialog
+        # Modeless, so the stats keep updating while the app is used
+        if self.performance_dialog is None:
+            self.performance_dialog = PerformanceDialog(self)
+        self.performance_dialog.show()
+        self.performance_dialog.raise_()
+
+    @traced("ui.apply_stylesheet")
     def load_and_apply_stylesheet(self):
         base_stylesheet = ""
         user_stylesheet = ""
@@ -478,11 +1331,10 @@ class MainWindow(QMainWindow):
                 user_stylesheet = f.read()
         
         combined_stylesheet = base_stylesheet + "\n" + user_stylesheet
+        # Children inherit it; setting it on every widget again gave each one a
+        # parsed copy of its own and made theme changes and rebuilds slower
         self.setStyleSheet(combined_stylesheet)
         
-        for widget in self.findChildren(QWidget):
-            widget.setStyleSheet(combined_stylesheet)
-        
         self.refresh_icons()
         self.update_customize_colors_button()
 
@@ -493,7 +1345,7 @@ class MainWindow(QMainWindow):
         for button, icon_name in [(self.due_date_button, "calendar"), (self.add_button, "add"), (self.multi_delete_button, "delete")]:
             self.set_button_icon(button, icon_name)
         
-        for task_widget in self.todo_list.findChildren(TaskWidget):
+        for task_widget in self.todo_list.task_widgets.values():
             for button, icon_name in [(task_widget.check_button, "check"), (task_widget.edit_button, "edit"), (task_widget.delete_button, "delete")]:
                 task_widget.set_button_icon(button, icon_name)
 
@@ -518,13 +1370,22 @@ class MainWindow(QMainWindow):
             }}
         """)
 
+    def get_calendar_widget(self):
+        if self.calendar_widget is None:
+            from .heatmap_calendar import HeatmapCalendar
+            self.calendar_widget = HeatmapCalendar(self.day_counts, self)
+            self.calendar_widget.activated.connect(self.on_date_selected)
+        return self.calendar_widget
+
     def show_date_picker(self):
+        calendar_widget = self.get_calendar_widget()
         button_pos = self.due_date_button.mapToGlobal(self.due_date_button.rect().bottomLeft())
-        self.calendar_widget.move(button_pos)
-        self.calendar_widget.show()
+        calendar_widget.move(button_pos)
+        calendar_widget.show()
 
     def on_date_selected(self, date):
         self.calendar_widget.hide()
+        self.selected_due_date = date
         formatted_date = date.toString(self.date_format)
         self.due_date_button.setToolTip(f"Due: {formatted_date}")
         self.update_add_button_icon()
@@ -546,7 +1407,7 @@ class MainWindow(QMainWindow):
         self.multi_delete_button.setVisible(visible)
         self.multi_delete_label.setVisible(not visible)
         if visible:
-            count = len([task for task in self.todo_list.findChildren(TaskWidget) if task.is_selected_for_deletion])
+            count = len(self.todo_list.selected_tasks)
             # Update the multi-delete button with counter
             self.multi_delete_button.setText(f"×{count}")  # Using multiplication symbol
             self.multi_delete_button.setStyleSheet("""
@@ -561,7 +1422,7 @@ class MainWindow(QMainWindow):
     @Slot(int, bool)
     def on_task_selected_for_deletion(self, task_id, selected):
         self.update_multi_delete_visibility(True)
-        count = len([task for task in self.todo_list.findChildren(TaskWidget) if task.is_selected_for_deletion])
+        count = len(self.todo_list.selected_tasks)
         if count > 0:
             self.multi_delete_button.setText(f"×{count}")  # Using multiplication symbol
         else:
@@ -592,23 +1453,304 @@ class MainWindow(QMainWindow):
         self._manage_category_or_subcategory(is_sub_category=True)
 
     def _manage_category_or_subcategory(self, is_sub_category):
+        from .dialogs import CategoryManageDialog
         dialog = CategoryManageDialog(self.db_manager, self, is_sub_category=is_sub_category)
-        if dialog.exec_():
-            category_list = self.sub_categories if is_sub_category else self.categories
-            combo = self.sub_category_combo if is_sub_category else self.category_combo
-            filter_combo = self.sub_category_filter_combo if is_sub_category else self.category_filter_combo
-            
-            category_list[:] = dialog.categories
-            current_index = combo.currentIndex()
-            combo.clear()
-            combo.addItems(["", "Manage Sub-Categories" if is_sub_category else "Manage Categories"] + category_list)
-            combo.setCurrentIndex(current_index)
-            
-            current_filter_index = filter_combo.currentIndex()
-            filter_combo.clear()
-            filter_combo.addItem("All Sub-Categories" if is_sub_category else "All Categories")
-            filter_combo.addItems(category_list)
-            filter_combo.setCurrentIndex(current_filter_index)
+        accepted = dialog.exec_()
+        # Removing a category re-files its tasks in the database, so drop the snapshot
+        self.task_snapshot = None
+        if accepted:
+            self._set_category_items(is_sub_category, dialog.categories)
+
+    def _set_category_items(self, is_sub_category, names):
+        category_list = self.sub_categories if is_sub_category else self.categories
+        combo = self.sub_category_combo if is_sub_category else self.category_combo
+        filter_combo = self.sub_category_filter_combo if is_sub_category else self.category_filter_combo
+
+        category_list[:] = names
+        current_index = combo.currentIndex()
+        combo.clear()
+        combo.addItems(["", "Manage Sub-Categories" if is_sub_category else "Manage Categories"] + category_list)
+        combo.setCurrentIndex(current_index)
+
+        current_filter_index = filter_combo.currentIndex()
+        filter_combo.clear()
+        filter_combo.addItem("All Sub-Categories" if is_sub_category else "All Categories")
+        filter_combo.addItems(category_list)
+        filter_combo.setCurrentIndex(current_filter_index)
+
+    def import_tasks_from_file(self):
+        from database.import_export import FILE_FILTER, import_tasks
+        path, _ = QFileDialog.getOpenFileName(self, "Import Tasks", "", FILE_FILTER)
+        if path:
+            self.run_background_job("Import Tasks", "Importing tasks...", self.on_import_finished,
+                                    import_tasks, self.db_manager, path)
+
+    def export_tasks_to_file(self):
+        from database.import_export import FILE_FILTER, export_tasks
+        path, _ = QFileDialog.getSaveFileName(self, "Export Tasks", "tasks.jsonl", FILE_FILTER)
+        if path:
+            self.run_background_job("Export Tasks", "Exporting tasks...", self.on_export_finished,
+                                    export_tasks, self.db_manager, path)
+
+    def run_background_job(self, title, label, on_success, function, *args, modal=False, show_progress=True):
+        # Runs on a worker thread; the window stays usable unless `modal`, and the
+        # progress dialog can cancel. Only one such job runs at a time.
+        if self.background_job is not None:
+            if show_progress:
+                QMessageBox.warning(self, "Warning", "Another import, export or backup is still running.")
+            return False
+        if self.maintenance_job is not None:
+            # Gives up within its progress handler's next check; a restore must
+            # not overlap it
+            self.maintenance_job.cancel()
+            self.maintenance_job.wait()
+        self.background_job = BackgroundJob(function, *args, parent=self)
+        progress_dialog = None
+        if show_progress:
+            progress_dialog = QProgressDialog(label, "Cancel", 0, 100, self)
+            progress_dialog.setWindowTitle(title)
+            progress_dialog.setMinimumDuration(0 if modal else 500)
+            progress_dialog.setAutoClose(False)
+            if modal:
+                progress_dialog.setWindowModality(Qt.WindowModal)
+            self.background_job.progress.connect(
+                lambda done, percent: (progress_dialog.setValue(percent), progress_dialog.setLabelText(f"{label} {done}")))
+            progress_dialog.canceled.connect(self.background_job.cancel)
+        self.background_job.succeeded.connect(on_success)
+        self.background_job.failed.connect(
+            lambda message: QMessageBox.critical(self, "Error", f"{title} failed: {message}"))
+        self.background_job.finished.connect(lambda: self.on_background_job_finished(progress_dialog))
+        self.background_job.start()
+        return True
+
+    def on_background_job_finished(self, progress_dialog):
+        if progress_dialog is not None:
+            progress_dialog.canceled.disconnect()
+            progress_dialog.close()
+            progress_dialog.deleteLater()
+        self.background_job.deleteLater()
+        self.background_job = None
+
+    def on_import_finished(self, result):
+        for category in sorted(result.categories):
+            self.update_categories(category)
+        for sub_category in sorted(result.sub_categories):
+            self.update_sub_categories(sub_category)
+        if result.imported:
+            self.task_snapshot = None
+            self.load_tasks()
+        message = f"Imported {result.imported} tasks."
+        if result.rejected:
+            message += f" {result.rejected} records could not be read and were skipped."
+        if result.cancelled:
+            message += " The import was cancelled; tasks imported before that were kept."
+        QMessageBox.information(self, "Import Tasks", message)
+
+    def on_export_finished(self, count):
+        self.statusBar().showMessage("Export cancelled" if count < 0 else f"Exported {count} tasks", 5000)
+
+    def back_up_now(self):
+        from database.backup import create_backup
+        self.run_background_job("Back Up", "Backing up...", self.on_backup_finished, create_backup,
+                                self.db_manager.db_name)
+
+    @Slot()
+    def run_scheduled_backup(self):
+        from database.backup import create_backup, list_backups
+        snapshots = list_backups(self.db_manager.db_name)
+        if snapshots and (datetime.now() - snapshots[0].created).total_seconds() * 1000 < BACKUP_INTERVAL_MS:
+            return
+        # Silent, and skipped if another job holds the slot; the timer tries again
+        self.run_background_job("Back Up", "Backing up...", self.on_backup_finished, create_backup,
+                                self.db_manager.db_name, show_progress=False)
+
+    def on_backup_finished(self, path):
+        if path:
+            self.statusBar().showMessage(f"Backed up to {os.path.basename(path)}", 5000)
+
+    def restore_from_backup(self):
+        from database.backup import list_backups, restore_backup
+        snapshots = list_backups(self.db_manager.db_name)
+        if not snapshots:
+            QMessageBox.information(self, "Restore Backup", "There are no backups yet.")
+            return
+        label, ok = QInputDialog.getItem(self, "Restore Backup", "Restore the tasks saved at:",
+                                         [snapshot.label() for snapshot in snapshots], 0, False)
+        if not ok:
+            return
+        snapshot = next(snapshot for snapshot in snapshots if snapshot.label() == label)
+        if QMessageBox.question(self, "Confirm Restore",
+                                f"Replace all current tasks with the backup from {label}? "
+                                "The current tasks are backed up first.",
+                                QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes:
+            self.run_background_job("Restore Backup", "Restoring backup...", self.on_restore_finished,
+                                    restore_backup, self.db_manager.db_name, snapshot.path, modal=True)
+
+    def on_restore_finished(self, safety_path):
+        if safety_path is None:
+            self.statusBar().showMessage("Restore cancelled", 5000)
+            return
+        self.reload_from_database()
+        self.statusBar().showMessage(f"Restored; the previous tasks were saved to {os.path.basename(safety_path)}",
+                                     10000)
+
+    def reload_from_database(self):
+        self._set_category_items(False, self.db_manager.get_all_categories())
+        self._set_category_items(True, self.db_manager.get_all_sub_categories())
+        self.saved_views.set_views(SavedView.from_dict(view) for view in self.db_manager.get_all_views())
+        self.view_combo.blockSignals(True)
+        self.view_combo.clear()
+        self.view_combo.addItem(CUSTOM_VIEW)
+        self.view_combo.addItems(list(self.saved_views.views))
+        self.view_combo.blockSignals(False)
+        self.task_snapshot = None
+        self.undo_stack.clear()
+        self.load_tasks()
+
+    def set_api_server_enabled(self, enabled):
+        from api.server import DEFAULT_PORT, LOCALHOST, ServerThread
+        if enabled and self.api_server is None:
+            port = int(self.db_manager.get_setting("api_server_port", str(DEFAULT_PORT)))
+            server = ServerThread(self.db_manager.db_name, port)
+            server.start()
+            if server.error:
+                QMessageBox.warning(self, "Local API Server", f"Could not listen on port {port}: {server.error}")
+                self.api_server_action.setChecked(False)
+                return
+            self.api_server = server
+            self.statusBar().showMessage(f"Local API listening on http://{LOCALHOST}:{server.server.port}", 5000)
+        elif not enabled and self.api_server is not None:
+            self.api_server.stop()
+            self.api_server = None
+        self.db_manager.set_setting("api_server_enabled", "1" if enabled else "0")
+
+    def open_log_level_settings(self):
+        from diagnostics.logging_setup import LOG_LEVELS, current_log_level, set_log_level
+        current = current_log_level()
+        level, ok = QInputDialog.getItem(self, "Log Level", "Minimum level written to the log:",
+                                         LOG_LEVELS, LOG_LEVELS.index(current) if current in LOG_LEVELS else 1, False)
+        if ok:
+            set_log_level(self.db_manager, level)
+
+    @Slot()
+    def schedule_archiving(self):
+        if self.archive_after_days > 0:
+            self.idle_runner.submit("archive", self.archive_step)
+
+    def archive_step(self):
+        # One idle-time batch; True while more tasks are due for the archive
+        if self.is_loading() or self.background_job is not None or self.archive_after_days <= 0:
+            return False  # finish_loading() or the archive timer schedules the next pass
+        with span("ui.archive_step"):
+            archived = self.db_manager.archive_completed_tasks(today_day_number() - self.archive_after_days,
+                                                               ARCHIVE_BATCH_SIZE)
+            if archived:
+                archived_ids = set(archived)
+                self.all_tasks = [task for task in self.all_tasks if task.id not in archived_ids]
+                self.overdue_scheduler.remove_tasks(archived)
+                self.next_up.remove(archived)
+                self.tag_index.remove(archived)
+                self.day_counts.remove(archived)
+                self.saved_views.tasks_removed(archived)
+                # Statistics keep counting archived tasks, so task_snapshot keeps them
+                self._archived_in_pass += len(archived)
+                self._refresh_after_archive |= any(task_id in self.todo_list.task_widgets for task_id in archived)
+        if len(archived) == ARCHIVE_BATCH_SIZE:
+            return True
+        if self._archived_in_pass:
+            logging.info("Archived %d completed tasks", self._archived_in_pass)
+            self.statusBar().showMessage(f"Archived {self._archived_in_pass} completed tasks", 5000)
+            self._archived_in_pass = 0
+        if self._refresh_after_archive:
+            # Rows stay usable until then: writes to them restore the task
+            self._refresh_after_archive = False
+            self.refresh_task_list()
+        return False
+
+    @Slot()
+    def schedule_purge(self):
+        self.idle_runner.submit("purge", self.purge_step)
+
+    def purge_step(self):
+        # One idle-time batch of tombstones past DELETED_RETENTION_DAYS; True
+        # while more remain
+        if self.background_job is not None:
+            return False  # the archive timer schedules the next pass
+        with span("ui.purge_step"):
+            purged = self.db_manager.purge_deleted_tasks(int(time.time()) - DELETED_RETENTION_DAYS * 24 * 60 * 60,
+                                                         PURGE_BATCH_SIZE)
+        self._purged_in_pass += purged
+        if purged == PURGE_BATCH_SIZE:
+            return True
+        if self._purged_in_pass:
+            logging.info("Purged %d deleted tasks", self._purged_in_pass)
+            self._purged_in_pass = 0
+        return False
+
+    @Slot()
+    def schedule_maintenance(self):
+        # One pass of database.maintenance steps, after archiving and purging
+        # have had their turn; a pass still under way keeps its place
+        if not self._maintenance_steps:
+            self._maintenance_steps.extend(maintenance_plan(self.db_manager))
+        self.idle_runner.submit("maintenance", self.maintenance_step)
+
+    def maintenance_step(self):
+        # Starts the next step on a worker thread; on_maintenance_step_finished()
+        # queues the one after it, so steps only start while the user is idle.
+        # Jobs started by run_background_job() cancel a running step.
+        if not self._maintenance_steps or self.background_job is not None or self.maintenance_job is not None:
+            return False  # the archive timer schedules the next pass
+        self.maintenance_job = BackgroundJob(run_maintenance_step, self.db_manager.db_name,
+                                             self._maintenance_steps[0], parent=self)
+        self.maintenance_job.succeeded.connect(self.on_maintenance_step_finished)
+        self.maintenance_job.finished.connect(self.on_maintenance_job_finished)
+        self.maintenance_job.start()
+        return False
+
+    def on_maintenance_job_finished(self):
+        self.maintenance_job.deleteLater()
+        self.maintenance_job = None
+
+    def on_maintenance_step_finished(self, result):
+        self._reclaimed_in_pass += result.reclaimed_bytes
+        if not result.more and self._maintenance_steps and self._maintenance_steps[0] == result.step:
+            self._maintenance_steps.popleft()
+        if result.problems:
+            QMessageBox.warning(self, "Database Check",
+                                "The database check found problems:\n\n" + "\n".join(result.problems[:5]) +
+                                "\n\nRestoring a backup (File > Restore Backup...) may recover the tasks.")
+        if self._maintenance_steps:
+            self.idle_runner.submit("maintenance", self.maintenance_step)
+            return
+        logging.info("Database maintenance finished, %d KB reclaimed", self._reclaimed_in_pass // 1024)
+        self._reclaimed_in_pass = 0
+
+    def schedule_respacing(self, task_ids):
+        self._long_order_keys.update(task_ids)
+        if self._long_order_keys:
+            self.idle_runner.submit("respace", self.respace_step)
+
+    def respace_step(self):
+        # Respaces the keys around one task with a long key; True while more remain
+        if self.is_loading():
+            return False  # finish_loading() schedules the rest
+        known_ids = {task.id for task in self.all_tasks}
+        self._long_order_keys &= known_ids
+        if not self._long_order_keys:
+            return False
+        with span("ui.respace_step"):
+            self.respace_order_keys(next(iter(self._long_order_keys)))
+        return bool(self._long_order_keys)
+
+    def open_archive_settings(self):
+        days, ok = QInputDialog.getInt(self, "Archive Completed Tasks",
+                                       "Move tasks to the archive this many days after they were completed\n"
+                                       "(0 turns archiving off):", self.archive_after_days, 0, 3650)
+        if ok:
+            self.archive_after_days = days
+            self.db_manager.set_setting("archive_after_days", str(days))
+            self.schedule_archiving()
 
     def open_date_format_settings(self):
         new_format, ok = QInputDialog.getText(self, "Date Format Settings",
@@ -618,4 +1760,4 @@ class MainWindow(QMainWindow):
         if ok and new_format:
             self.date_format = new_format
             self.db_manager.set_date_format(new_format)
-            self.apply_filter_and_sort()
+            self.refresh_task_list()
@@ -0,0 +1,145 @@
+import heapq
+import logging
+from datetime import date, datetime, time, timedelta
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from models.task import NO_DUE_DATE, date_to_day_number, today_day_number
+
+OVERDUE = "overdue"
+DUE_SOON = "dueSoon"
+DUE_SOON_DAYS = 1
+# Fire slightly after midnight so date.today() has already rolled over
+ROLLOVER_SLACK_MS = 1000
+
+# Tracks which open tasks are overdue or due soon. Tasks sit in a min-heap keyed
+# by the day of their next status transition and a single-shot timer is armed
+# for the earliest one, so nothing rescans the whole list while the app idles.
+class OverdueScheduler(QObject):
+    statusChanged = Signal(list)  # ids whose status changed
+    tasksBecameOverdue = Signal(list)
+    tasksBecameDueSoon = Signal(list)
+
+    def __init__(self, parent=None, due_soon_days=DUE_SOON_DAYS):
+        super().__init__(parent)
+        self.due_soon_days = due_soon_days
+        self._heap = []  # (transition_day, task_id, due_day)
+        self._due_days = {}
+        self._statuses = {}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.process_transitions)
+
+    def status(self, task_id):
+        return self._statuses.get(task_id)
+
+    def set_tasks(self, tasks):
+        self._heap = []
+        self._due_days = {}
+        self._statuses = {}
+        today = today_day_number()
+        for task in tasks:
+            self._track(task, today)
+        heapq.heapify(self._heap)
+        self._arm()
+
+    def update_task(self, task):
+        changed = self._track(task, today_day_number(), push=heapq.heappush)
+        self._arm()
+        if changed:
+            self.statusChanged.emit([task.id])
+
+    def add_tasks(self, tasks):
+        # Bulk update_task for tasks that have no row on screen yet, so nothing
+        # is emitted; new rows read their status when they are connected
+        today = today_day_number()
+        for task in tasks:
+            self._track(task, today, push=heapq.heappush)
+        self._arm()
+
+    def remove_tasks(self, task_ids):
+        for task_id in task_ids:
+            # Heap entries for removed tasks are dropped lazily when they surface
+            self._due_days.pop(task_id, None)
+            self._statuses.pop(task_id, None)
+        self._arm()
+
+    def _classify(self, due_day, today):
+        if due_day < today:
+            return OVERDUE
+        if due_day - self.due_soon_days <= today:
+            return DUE_SOON
+        return None
+
+    def _next_transition(self, due_day, status):
+        if status is None:
+            return due_day - self.due_soon_days
+        if status == DUE_SOON:
+            return due_day + 1
+        return None
+
+    def _track(self, task, today, push=None):
+        old_status = self._statuses.get(task.id)
+        due_day = NO_DUE_DATE if task.completed else date_to_day_number(task.due_date)
+        if due_day == NO_DUE_DATE:
+            self._due_days.pop(task.id, None)
+            self._statuses.pop(task.id, None)
+            return old_status is not None
+
+        status = self._classify(due_day, today)
+        if self._due_days.get(task.id) == due_day and old_status == status:
+            return False  # already queued for its next transition
+        self._due_days[task.id] = due_day
+        if status:
+            self._statuses[task.id] = status
+        else:
+            self._statuses.pop(task.id, None)
+        transition = self._next_transition(due_day, status)
+        if transition is not None:
+            entry = (transition, task.id, due_day)
+            if push:
+                push(self._heap, entry)
+            else:
+                self._heap.append(entry)
+        return old_status != status
+
+    def _arm(self):
+        while self._heap and self._due_days.get(self._heap[0][1]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+
+        # Wake at the next transition, but never later than the next midnight so
+        # clock changes and suspend/resume are picked up at day rollover.
+        now = datetime.now()
+        next_midnight = datetime.combine(now.date() + timedelta(days=1), time())
+        wake_at = next_midnight
+        if self._heap:
+            wake_at = min(wake_at, datetime.combine(date.fromordinal(self._heap[0][0]), time()))
+        delay_ms = max(0, int((wake_at - now).total_seconds() * 1000)) + ROLLOVER_SLACK_MS
+        self.timer.start(delay_ms)
+
+    def process_transitions(self):
+        today = today_day_number()
+        changed, became_overdue, became_due_soon = [], [], []
+        while self._heap and self._heap[0][0] <= today:
+            _, task_id, due_day = heapq.heappop(self._heap)
+            if self._due_days.get(task_id) != due_day:
+                continue
+            old_status = self._statuses.get(task_id)
+            status = self._classify(due_day, today)
+            if status == old_status:
+                continue  # duplicate entry, the task was already re-queued
+            self._statuses[task_id] = status
+            transition = self._next_transition(due_day, status)
+            if transition is not None:
+                heapq.heappush(self._heap, (transition, task_id, due_day))
+            changed.append(task_id)
+            (became_overdue if status == OVERDUE else became_due_soon).append(task_id)
+
+        self._arm()
+        if changed:
+            logging.info("%d task(s) changed due status (%d overdue, %d due soon)",
+                         len(changed), len(became_overdue), len(became_due_soon))
+            self.statusChanged.emit(changed)
+            if became_overdue:
+                self.tasksBecameOverdue.emit(became_overdue)
+            if became_due_soon:
+                self.tasksBecameDueSoon.emit(became_due_soon)
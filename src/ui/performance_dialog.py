@@ -0,0 +1,101 @@
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QCheckBox, QTableWidget,
+                               QTableWidgetItem, QHeaderView, QFileDialog, QLabel, QMessageBox)
+from PySide6.QtCore import QTimer, QSize, Qt
+
+from diagnostics import tracing
+
+REFRESH_INTERVAL_MS = 1000
+STAT_COLUMNS = [("name", "Span"), ("count", "Calls"), ("total_ms", "Total ms"), ("mean_ms", "Mean ms"),
+                ("p50_ms", "p50 ms"), ("p95_ms", "p95 ms"), ("max_ms", "Max ms")]
+
+class PerformanceDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performance")
+        self.setup_ui()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        controls_layout = QHBoxLayout()
+        self.enable_checkbox = QCheckBox("Enable tracing")
+        self.enable_checkbox.setChecked(tracing.is_enabled())
+        self.enable_checkbox.toggled.connect(self.on_enable_toggled)
+        controls_layout.addWidget(self.enable_checkbox)
+        self.record_checkbox = QCheckBox("Record trace events")
+        self.record_checkbox.setChecked(tracing.is_recording_events())
+        self.record_checkbox.toggled.connect(self.on_enable_toggled)
+        controls_layout.addWidget(self.record_checkbox)
+        controls_layout.addStretch(1)
+
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.on_reset)
+        controls_layout.addWidget(reset_button)
+        export_button = QPushButton("Export Chrome Trace...")
+        export_button.clicked.connect(self.export_trace)
+        controls_layout.addWidget(export_button)
+        layout.addLayout(controls_layout)
+
+        self.stats_table = QTableWidget(0, len(STAT_COLUMNS))
+        self.stats_table.setHorizontalHeaderLabels([title for _, title in STAT_COLUMNS])
+        self.stats_table.verticalHeader().setVisible(False)
+        self.stats_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.stats_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.stats_table)
+
+        self.counters_label = QLabel()
+        self.counters_label.setObjectName("subtextLabel")
+        self.counters_label.setWordWrap(True)
+        layout.addWidget(self.counters_label)
+
+    def showEvent(self, event):
+        self.refresh_timer.start(REFRESH_INTERVAL_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def on_enable_toggled(self, _checked):
+        if self.enable_checkbox.isChecked():
+            tracing.enable(record_events=self.record_checkbox.isChecked())
+        else:
+            tracing.disable()
+        self.refresh()
+
+    def on_reset(self):
+        tracing.reset()
+        self.refresh()
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "todo_trace.json", "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            tracing.write_chrome_trace(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to export trace: {str(e)}")
+
+    def refresh(self):
+        stats = tracing.get_stats()
+        self.stats_table.setRowCount(len(stats))
+        for row, entry in enumerate(stats):
+            for column, (key, _) in enumerate(STAT_COLUMNS):
+                value = entry[key]
+                item = QTableWidgetItem(value if isinstance(value, str) else
+                                        str(value) if isinstance(value, int) else f"{value:.3f}")
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.stats_table.setItem(row, column, item)
+
+        counters = tracing.get_counters()
+        if not tracing.is_enabled():
+            self.counters_label.setText("Tracing is disabled; enable it to collect stats.")
+        else:
+            self.counters_label.setText(", ".join(f"{name}: {value}" for name, value in sorted(counters.items())))
+
+    def sizeHint(self):
+        return QSize(640, 420)
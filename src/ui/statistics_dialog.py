@@ -0,0 +1,104 @@
+import time
+import logging
+from datetime import date
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+                               QTabWidget, QDialogButtonBox, QHeaderView)
+from PySide6.QtCore import QSize
+
+from models.task import today_day_number
+
+HISTOGRAM_DAYS = 28
+COMPLETION_WEEKS = 12
+BAR_WIDTH = 30
+
+class StatisticsDialog(QDialog):
+    def __init__(self, snapshot, parent=None):
+        super().__init__(parent)
+        self.snapshot = snapshot
+        self.setWindowTitle("Statistics")
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        summary_layout = QHBoxLayout()
+        self.summary_labels = {}
+        for key, text in [("total", "Total"), ("open", "Open"), ("completed", "Completed"),
+                          ("overdue", "Overdue"), ("no_due_date", "No Due Date")]:
+            label = QLabel()
+            label.setObjectName("statisticsSummary")
+            self.summary_labels[key] = (label, text)
+            summary_layout.addWidget(label)
+        layout.addLayout(summary_layout)
+
+        self.tabs = QTabWidget()
+        self.category_table = self.create_table(["Category", "Total", "Completed", "Overdue"])
+        self.sub_category_table = self.create_table(["Sub-Category", "Total", "Completed"])
+        self.completion_table = self.create_table(["Week Of", "Due", "Completed", "Rate"])
+        self.histogram_table = self.create_table(["Due", "Open", ""])
+        self.tabs.addTab(self.category_table, "Categories")
+        self.tabs.addTab(self.sub_category_table, "Sub-Categories")
+        self.tabs.addTab(self.completion_table, "Completion Rate")
+        self.tabs.addTab(self.histogram_table, "Due Dates")
+        layout.addWidget(self.tabs)
+
+        self.timing_label = QLabel()
+        self.timing_label.setObjectName("subtextLabel")
+        layout.addWidget(self.timing_label)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def create_table(self, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def fill_table(self, table, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+
+    def refresh(self):
+        start = time.perf_counter()
+        today = today_day_number()
+
+        summary = self.snapshot.summary(today)
+        for key, (label, text) in self.summary_labels.items():
+            label.setText(f"{text}: {summary[key]}")
+
+        overdue = self.snapshot.overdue_by_category(today)
+        categories = sorted(self.snapshot.category_counts().items(), key=lambda item: -item[1][0])
+        self.fill_table(self.category_table, [(name or "No Category", total, done, overdue.get(name, 0))
+                                              for name, (total, done) in categories])
+
+        sub_categories = sorted(self.snapshot.category_counts(sub_categories=True).items(), key=lambda item: -item[1][0])
+        self.fill_table(self.sub_category_table, [(name or "No Sub-Category", total, done)
+                                                  for name, (total, done) in sub_categories])
+
+        weeks = self.snapshot.completion_rate_by_week(today - 7 * (COMPLETION_WEEKS - 1), COMPLETION_WEEKS)
+        self.fill_table(self.completion_table, [
+            (date.fromordinal(week_start).strftime("%Y-%m-%d"), total, done, f"{done / total:.0%}" if total else "-")
+            for week_start, total, done in weeks
+        ])
+
+        histogram = self.snapshot.due_histogram(today, HISTOGRAM_DAYS)
+        peak = max(int(histogram.max()), 1) if len(histogram) else 1
+        self.fill_table(self.histogram_table, [
+            (date.fromordinal(today + offset).strftime("%a %Y-%m-%d"), int(count), "█" * round(BAR_WIDTH * int(count) / peak))
+            for offset, count in enumerate(histogram)
+        ])
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.timing_label.setText(f"{len(self.snapshot)} tasks aggregated in {elapsed_ms:.1f} ms")
+        logging.debug("Statistics refreshed in %.1f ms for %d tasks", elapsed_ms, len(self.snapshot))
+
+    def sizeHint(self):
+        return QSize(520, 480)
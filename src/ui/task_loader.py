@@ -0,0 +1,24 @@
+from PySide6.QtCore import QThread, Signal
+
+from models.task import Task
+from database.db_manager import TASK_CHUNK_SIZE
+
+# Reads tasks on a worker thread and hands them to the GUI thread chunk by
+# chunk. Task objects are built here too, so the GUI thread only adds rows.
+class TaskLoader(QThread):
+    chunkLoaded = Signal(list)
+
+    def __init__(self, db_manager, chunk_size=TASK_CHUNK_SIZE, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+
+    def run(self):
+        for rows in self.db_manager.iter_task_chunks(self.chunk_size):
+            if self.isInterruptionRequested():
+                return
+            self.chunkLoaded.emit([Task.from_dict(row) for row in rows])
+
+    def stop(self):
+        self.requestInterruption()
+        self.wait()
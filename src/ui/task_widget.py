@@ -1,16 +1,23 @@
 from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel, 
                                     QToolButton, QSizePolicy, QApplication, QTextEdit)
-from PySide6.QtCore import Qt, Signal, Slot, QSize, QEvent, QPropertyAnimation, QEasingCurve
-from PySide6.QtGui import QFont, QColor
+from PySide6.QtCore import Qt, Signal, Slot, QSize, QEvent, QPropertyAnimation, QEasingCurve, QMimeData
+from PySide6.QtGui import QFont, QColor, QTextCursor, QDrag
 from .icon_utils import create_colored_icon
+from models.recurrence import recurrence_label
 from datetime import datetime
 import logging
+import html
+
+# What a row dragged by its handle carries: the task id, as ASCII digits
+TASK_MIME_TYPE = "application/x-todo-task-id"
 
 class TaskWidget(QWidget):
     taskChanged = Signal(object)
     taskDeleted = Signal(int)
     taskEdited = Signal(object)
     taskSelectedForDeletion = Signal(int, bool)
+    # Expanded while the notes are not loaded; answered with append_notes()
+    detailsRequested = Signal(object)
 
     def __init__(self, task, date_format="%Y-%m-%d"):
         super().__init__()
@@ -20,6 +27,10 @@ class TaskWidget(QWidget):
         self.delete_button = None
         self.is_expanded = False
         self.shift_held = False
+        self.due_status = None
+        self.notes_requested = False
+        self.drag_handle = None
+        self.drag_start = None
         self.setup_ui()
         self.update_text_style()
         self.installEventFilter(self)
@@ -36,6 +47,7 @@ class TaskWidget(QWidget):
         task_layout = QHBoxLayout(task_widget)
         task_layout.setContentsMargins(5, 5, 5, 5)
         task_layout.setSpacing(10)
+        self.row_layout = task_layout
 
         self.check_button = QToolButton()
         self.check_button.setObjectName("checkButton")
@@ -61,7 +73,7 @@ class TaskWidget(QWidget):
         self.title_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
         title_layout.addWidget(self.title_label)
 
-        if self.task.notes:
+        if self.task.has_notes:
             self.notes_indicator = QLabel("📝")
             self.notes_indicator.setObjectName("notesIndicator")
             title_layout.addWidget(self.notes_indicator)
@@ -108,6 +120,38 @@ class TaskWidget(QWidget):
 
         self.setMinimumWidth(300)
 
+    def set_draggable(self, draggable):
+        # The grip is only made for rows of the manual sort
+        if self.drag_handle is None:
+            if not draggable:
+                return
+            self.drag_handle = QLabel("⠿")
+            self.drag_handle.setObjectName("dragHandle")
+            self.drag_handle.setCursor(Qt.OpenHandCursor)
+            self.drag_handle.setToolTip("Drag to reorder")
+            self.drag_handle.mousePressEvent = self.on_drag_handle_pressed
+            self.drag_handle.mouseMoveEvent = self.on_drag_handle_moved
+            self.row_layout.insertWidget(0, self.drag_handle)
+        self.drag_handle.setVisible(draggable)
+
+    def on_drag_handle_pressed(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_start = event.position().toPoint()
+
+    def on_drag_handle_moved(self, event):
+        if (self.drag_start is None or not event.buttons() & Qt.LeftButton or
+                (event.position().toPoint() - self.drag_start).manhattanLength() < QApplication.startDragDistance()):
+            return
+        self.drag_start = None
+        mime_data = QMimeData()
+        mime_data.setData(TASK_MIME_TYPE, str(self.task.id).encode("ascii"))
+        drag = QDrag(self)
+        drag.setMimeData(mime_data)
+        drag.setPixmap(self.grab())
+        drag.setHotSpot(self.drag_handle.mapTo(self, self.drag_handle.rect().center()))
+        # The list moves the row once it is dropped (TodoListWidget.taskMoved)
+        drag.exec(Qt.MoveAction)
+
     def on_content_clicked(self, event):
         if event.button() == Qt.LeftButton:
             self.toggle_notes_section()
@@ -121,27 +165,51 @@ class TaskWidget(QWidget):
             self.animation = QPropertyAnimation(self.notes_editor, b"minimumHeight")
             self.animation.setDuration(200)
             self.animation.setEasingCurve(QEasingCurve.InOutQuad)
+            # Connected once; the slot only hides the editor after a collapse
+            self.animation.finished.connect(self.on_animation_finished)
 
         if self.animation.state() == QPropertyAnimation.Running:
             return
 
         if not self.is_expanded:
+            if self.task.notes is None and not self.notes_requested:
+                self.notes_requested = True
+                self.notes_editor.setReadOnly(True)
+                self.detailsRequested.emit(self.task)
             self.notes_editor.setVisible(True)
             self.animation.setStartValue(0)
             self.animation.setEndValue(100)
         else:
             self.animation.setStartValue(100)
             self.animation.setEndValue(0)
-            self.animation.finished.connect(self.on_animation_finished)
 
         self.animation.start()
         self.is_expanded = not self.is_expanded
 
+    def append_notes(self, text, complete):
+        # Notes arrive in chunks; the editor stays read-only until the last one,
+        # so a partly loaded text is never saved back
+        cursor = self.notes_editor.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self.notes_editor.setReadOnly(not complete)
+        if complete:
+            self.update_tooltip()
+
+    def set_notes(self, text):
+        self.notes_requested = True
+        self.notes_editor.setPlainText(text)
+        self.notes_editor.setReadOnly(False)
+        self.update_tooltip()
+
     def on_notes_focus_lost(self, event):
         super(QTextEdit, self.notes_editor).focusOutEvent(event)
+        if self.task.notes is None:
+            return  # still loading
         new_notes = self.notes_editor.toPlainText()
         if new_notes != self.task.notes:
             self.task.notes = new_notes
+            self.task.has_notes = bool(new_notes)
             self.taskChanged.emit(self.task)
 
             # Update notes indicator
@@ -157,6 +225,10 @@ class TaskWidget(QWidget):
         due_date = self.format_due_date(self.task.due_date)
         sub_category = self.task.sub_category or 'No Sub-category'
         subtext = f"{self.task.priority} | {self.task.category} | {due_date} | <span class='sub-category'>{sub_category}</span>"
+        if self.task.recurrence:
+            subtext += f" | ↻ {recurrence_label(self.task.recurrence)}"
+        if self.task.tags:
+            subtext += " | " + html.escape(" ".join(f"#{tag}" for tag in self.task.tags))
         self.subtext_label.setText(subtext)
 
     def format_due_date(self, due_date):
@@ -182,7 +254,7 @@ class TaskWidget(QWidget):
             button.setIcon(icon)
             button.setIconSize(QSize(32, 32))
         else:
-            logging.warning(f"Failed to set icon for button: {icon_name}")
+            logging.warning("Failed to set icon for button: %s", icon_name)
 
     def update_tooltip(self):
         tooltip_text = f"Title: {self.task.title}\n"
@@ -192,12 +264,18 @@ class TaskWidget(QWidget):
             # Show first 100 characters of notes with ellipsis if longer
             notes_preview = self.task.notes[:100] + ("..." if len(self.task.notes) > 100 else "")
             tooltip_text += f"Notes: {notes_preview}\n"
+        elif self.task.has_notes:
+            tooltip_text += "Notes: click the task to show them\n"
         tooltip_text += f"Priority: {self.task.priority}\n"
         tooltip_text += f"Category: {self.task.category}\n"
         if self.task.sub_category:
             tooltip_text += f"Sub-category: {self.task.sub_category}\n"
         if self.task.due_date:
             tooltip_text += f"Due: {self.format_due_date(self.task.due_date)}"
+        if self.task.recurrence:
+            tooltip_text += f"\nRepeats: {recurrence_label(self.task.recurrence)}"
+        if self.task.tags:
+            tooltip_text += f"\nTags: {', '.join(self.task.tags)}"
 
         self.setToolTip(tooltip_text)
 
@@ -301,6 +379,15 @@ class TaskWidget(QWidget):
         self.style().unpolish(self.subtext_label)
         self.style().polish(self.subtext_label)
 
+    def set_due_status(self, status):
+        if status == self.due_status:
+            return
+        self.due_status = status
+        self.setProperty("dueStatus", status or "")
+        for widget in (self, self.subtext_label):
+            widget.style().unpolish(widget)
+            widget.style().polish(widget)
+
     def set_date_format(self, date_format):
         self.date_format = date_format
         self.update_subtext()
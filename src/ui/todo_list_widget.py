@@ -1,19 +1,38 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QScrollArea, QFrame, QLabel
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont
-from .task_widget import TaskWidget
+from .task_widget import TASK_MIME_TYPE, TaskWidget
+from models.recurrence import recurrence_label
+from diagnostics.tracing import traced
 from datetime import datetime, date
 import logging
 
+# How close to the bottom, in pixels, counts as having scrolled to the end
+SCROLL_END_MARGIN = 200
+# A row dragged this close to the top or bottom edge scrolls the list, by
+# AUTOSCROLL_STEP pixels per mouse move
+AUTOSCROLL_MARGIN = 40
+AUTOSCROLL_STEP = 20
+
 class TodoListWidget(QScrollArea):
     taskChanged = Signal(object)
     taskDeleted = Signal(list)
     taskEdited = Signal(object)
+    detailsRequested = Signal(object)
     multipleTasksSelected = Signal(bool)
+    # The end of the list is in view: scrolled there, or the rows do not fill it
+    scrolledToEnd = Signal()
+    # A row was dropped elsewhere in a reorderable list: its task id and those
+    # of the rows now above and below it (None at either end). The window
+    # decides where that puts it and moves it with move_task_widget().
+    taskMoved = Signal(int, object, object)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.selected_tasks = set()
+        self.task_widgets = {}
+        self.reorderable = False
+        self.drop_indicator = None
         self.setup_ui()
         self.current_sort_criteria = None
 
@@ -30,22 +49,152 @@ class TodoListWidget(QScrollArea):
         self.tasks_layout.setAlignment(Qt.AlignTop)
         self.main_layout.addLayout(self.tasks_layout)
 
-    def add_task(self, task):
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.valueChanged.connect(self.check_scrolled_to_end)
+        scroll_bar.rangeChanged.connect(self.check_scrolled_to_end)
+
+    def check_scrolled_to_end(self):
+        scroll_bar = self.verticalScrollBar()
+        if scroll_bar.value() >= scroll_bar.maximum() - SCROLL_END_MARGIN:
+            self.scrolledToEnd.emit()
+
+    @traced("list.add_task")
+    def add_task(self, task, index=-1):
         task_widget = TaskWidget(task)
         task_widget.setObjectName("TaskWidget")
         task_widget.taskChanged.connect(self.on_task_changed)
         task_widget.taskDeleted.connect(self.on_task_deleted)
         task_widget.taskEdited.connect(self.on_task_edited)
+        task_widget.detailsRequested.connect(self.on_details_requested)
         task_widget.taskSelectedForDeletion.connect(self.on_task_selected_for_deletion)
         
-        task_widget.setStyleSheet(self.styleSheet())
-        
         if self.current_sort_criteria:
             task_widget.update_sort_criteria_style(self.current_sort_criteria)
+        if self.reorderable:
+            task_widget.set_draggable(True)
         
-        self.tasks_layout.addWidget(task_widget)
+        self.tasks_layout.insertWidget(index, task_widget)
+        self.task_widgets[task.id] = task_widget
         return task_widget
 
+    def add_occurrence(self, task, date_format="%Y-%m-%d", index=-1):
+        # A coming instance of a recurring task (models.recurrence). It has no
+        # row of its own until the current one is completed, so it is shown as
+        # a plain line rather than an editable TaskWidget.
+        due_date = datetime.strptime(task.due_date, "%Y-%m-%d").strftime(date_format)
+        label = QLabel(f"↻ {task.title}  ·  {due_date}")
+        label.setObjectName("OccurrenceRow")
+        label.setToolTip(f"{recurrence_label(task.recurrence)}; created when the current instance is completed")
+        self.tasks_layout.insertWidget(index, label)
+        return label
+
+    def remove_task(self, task_id):
+        task_widget = self.task_widgets.pop(task_id, None)
+        if task_widget is None:
+            return
+        self.tasks_layout.removeWidget(task_widget)
+        task_widget.deleteLater()
+        self.selected_tasks.discard(task_id)
+
+    def set_reorderable(self, reorderable):
+        # Rows added from now on get a drag handle; set before adding them
+        self.reorderable = reorderable
+        self.viewport().setAcceptDrops(reorderable)
+
+    def move_task_widget(self, task_id, after_id=None, before_id=None):
+        # Moves a row right after the row of `after_id`, or else right before
+        # that of `before_id`
+        task_widget = self.task_widgets.get(task_id)
+        anchor = self.task_widgets.get(after_id) or self.task_widgets.get(before_id)
+        if task_widget is None or anchor is None or anchor is task_widget:
+            return
+        self.tasks_layout.removeWidget(task_widget)
+        offset = 1 if anchor is self.task_widgets.get(after_id) else 0
+        self.tasks_layout.insertWidget(self.tasks_layout.indexOf(anchor) + offset, task_widget)
+
+    def adjacent_task_ids(self, task_id):
+        # Ids of the rows just above and below a task's row, or None
+        index = self.tasks_layout.indexOf(self.task_widgets[task_id])
+        above, below = self._task_row_from(index - 1, -1), self._task_row_from(index + 1, 1)
+        return (above.task.id if above else None), (below.task.id if below else None)
+
+    def _task_row_from(self, index, step, skip=None):
+        # The first TaskWidget at or beyond layout position `index` going `step`
+        while 0 <= index < self.tasks_layout.count():
+            widget = self.tasks_layout.itemAt(index).widget()
+            if isinstance(widget, TaskWidget) and widget is not skip:
+                return widget
+            index += step
+        return None
+
+    def _drop_rows(self, event):
+        # The rows above and below the gap nearest to the cursor, found by
+        # bisecting the layout, which is in vertical order
+        y = self.content_widget.mapFrom(self.viewport(), event.position().toPoint()).y()
+        low, high = 0, self.tasks_layout.count()
+        while low < high:
+            middle = (low + high) // 2
+            if self.tasks_layout.itemAt(middle).geometry().center().y() < y:
+                low = middle + 1
+            else:
+                high = middle
+        dragged = event.source()
+        return self._task_row_from(low - 1, -1, dragged), self._task_row_from(low, 1, dragged)
+
+    def _accepts_drag(self, event):
+        return (self.reorderable and event.mimeData().hasFormat(TASK_MIME_TYPE) and
+                isinstance(event.source(), TaskWidget) and self.task_widgets.get(event.source().task.id) is event.source())
+
+    def dragEnterEvent(self, event):
+        if self._accepts_drag(event):
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dragMoveEvent(self, event):
+        if not self._accepts_drag(event):
+            event.ignore()
+            return
+        event.acceptProposedAction()
+        y = event.position().y()
+        scroll_bar = self.verticalScrollBar()
+        if y < AUTOSCROLL_MARGIN:
+            scroll_bar.setValue(scroll_bar.value() - AUTOSCROLL_STEP)
+        elif y > self.viewport().height() - AUTOSCROLL_MARGIN:
+            scroll_bar.setValue(scroll_bar.value() + AUTOSCROLL_STEP)
+        above, below = self._drop_rows(event)
+        if self.drop_indicator is None:
+            self.drop_indicator = QFrame(self.content_widget)
+            self.drop_indicator.setObjectName("DropIndicator")
+            self.drop_indicator.setFrameShape(QFrame.HLine)
+        self.drop_indicator.setGeometry(0, above.geometry().bottom() if above else below.geometry().top() - 1,
+                                        self.content_widget.width(), 2)
+        self.drop_indicator.show()
+        self.drop_indicator.raise_()
+
+    def dragLeaveEvent(self, event):
+        if self.drop_indicator is not None:
+            self.drop_indicator.hide()
+
+    def dropEvent(self, event):
+        if self.drop_indicator is not None:
+            self.drop_indicator.hide()
+        if not self._accepts_drag(event):
+            event.ignore()
+            return
+        above, below = self._drop_rows(event)
+        event.acceptProposedAction()
+        self.taskMoved.emit(event.source().task.id, above.task.id if above else None,
+                            below.task.id if below else None)
+
+    def tasks_in_order(self):
+        tasks = []
+        for i in range(self.tasks_layout.count()):
+            widget = self.tasks_layout.itemAt(i).widget()
+            if isinstance(widget, TaskWidget):
+                tasks.append(widget.task)
+        return tasks
+
     def add_bold_separator(self, text):
         separator = QFrame()
         separator.setFrameShape(QFrame.HLine)
@@ -60,11 +209,15 @@ class TodoListWidget(QScrollArea):
         label.setFont(font)
         self.tasks_layout.addWidget(label)
 
+    @traced("list.clear")
     def clear(self):
+        if self.drop_indicator is not None:
+            self.drop_indicator.hide()
         while self.tasks_layout.count():
             child = self.tasks_layout.takeAt(0)
             if child.widget():
                 child.widget().deleteLater()
+        self.task_widgets.clear()
         self.selected_tasks.clear()
         self.multipleTasksSelected.emit(False)
 
@@ -77,6 +230,9 @@ class TodoListWidget(QScrollArea):
     def on_task_edited(self, task):
         self.taskEdited.emit(task)
 
+    def on_details_requested(self, task):
+        self.detailsRequested.emit(task)
+
     def on_task_selected_for_deletion(self, task_id, selected):
         if selected:
             self.selected_tasks.add(task_id)
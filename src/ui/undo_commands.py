@@ -0,0 +1,60 @@
+from dataclasses import replace
+from PySide6.QtGui import QUndoCommand
+
+# Steps of MainWindow's undo stack. QUndoStack.push() runs redo() at once, so
+# a command does the change itself, through the window, which keeps its
+# indexes in step. Commands hold copies of tasks: the list's widgets edit the
+# task objects they show in place.
+
+def copy_task(task):
+    return replace(task, tags=list(task.tags))
+
+class DeleteTasksCommand(QUndoCommand):
+    def __init__(self, window, task_ids, text):
+        super().__init__(text)
+        self.window = window
+        self.task_ids = list(task_ids)
+
+    def redo(self):
+        self.window.remove_tasks(self.task_ids)
+
+    def undo(self):
+        # Deleted tasks are tombstones until purged, tags and notes included
+        self.window.restore_tasks(self.task_ids)
+
+class UpdateTaskCommand(QUndoCommand):
+    # An edit, completion or notes change. `before` is the task as stored
+    # before it, text included. Completing a recurring task creates its next
+    # instance, which undo deletes again.
+    def __init__(self, window, before, after, text):
+        super().__init__(text)
+        self.window = window
+        self.before = copy_task(before)
+        self.after = copy_task(after)
+        self.next_id = None
+
+    def redo(self):
+        self.next_id = self.window.write_task(copy_task(self.after))
+
+    def undo(self):
+        if self.next_id is not None:
+            self.window.remove_tasks([self.next_id])
+            self.next_id = None
+        self.window.write_task(copy_task(self.before))
+
+class MoveTaskCommand(QUndoCommand):
+    # A move in the manual sort. `before` and `after` are the ids of the tasks
+    # just below and above the task in the manual order, before and after the
+    # move, so undo still finds its old place once keys have been respaced.
+    def __init__(self, window, task_id, before, after, text):
+        super().__init__(text)
+        self.window = window
+        self.task_id = task_id
+        self.before = before
+        self.after = after
+
+    def redo(self):
+        self.window.move_task(self.task_id, *self.after)
+
+    def undo(self):
+        self.window.move_task(self.task_id, *self.before)